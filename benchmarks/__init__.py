@@ -0,0 +1 @@
+""" Comparte Ride API benchmarks. """
@@ -0,0 +1,118 @@
+""" Ride feed latency as history grows.
+
+Load a circle with a constant number of upcoming rides and an increasing
+number of past rides, and time the ride feed with every past ride still in
+the rides table and again once finished rides are archived.
+
+Usage:
+    python -m benchmarks.archive --rides-per-day 200 --history-days 0 90 365
+"""
+
+# Utilities
+from collections import OrderedDict
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--rides-per-day', type=int, default=200)
+    parser.add_argument('--future-days', type=int, default=30)
+    parser.add_argument('--history-days', type=int, nargs='+',
+                        default=[0, 90, 365, 730])
+    parser.add_argument('--archive-days', type=int, default=30)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from datetime import timedelta
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import (setup_test_environment, setup_databases,
+                                   teardown_databases)
+    from django.utils import timezone
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+    from cride.circles.models import Circle, Membership
+    from cride.rides.archive import archive_rides
+    from cride.rides.models import ArchivedRide, Ride
+    from cride.utils.fixtures import FixtureLoader
+    from cride.utils.metrics import QueryCollector
+
+    def feed(client, url):
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            client.get(url)
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+        return OrderedDict([
+            ('queries', collector.count),
+            ('db_ms', round(collector.duration * 1000, 2)),
+            ('median_ms', round(statistics.median(timings), 2)),
+            ('p95_ms', round(sorted(timings)[int(len(timings) * 0.95)], 2)),
+        ])
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    results = OrderedDict()
+    try:
+        for history_days in args.history_days:
+            call_command('flush', interactive=False, verbosity=0)
+            FixtureLoader(
+                users=args.users, circles=1,
+                rides=args.rides_per_day * (history_days + args.future_days),
+                history_days=history_days, future_days=args.future_days
+            ).load()
+            circle = Circle.objects.get()
+            member = Membership.objects.filter(circle=circle).first().user
+            token, _ = Token.objects.get_or_create(user=member)
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION='Token {}'.format(token.key))
+            url = '/circles/{}/rides/'.format(circle.slug_name)
+
+            result = OrderedDict([('rides', Ride.objects.count())])
+            result['before'] = feed(client, url)
+            archive_rides(timezone.now() -
+                          timedelta(days=args.archive_days))
+            result['archived_rides'] = ArchivedRide.objects.count()
+            result['after'] = feed(client, url)
+            results[str(history_days)] = result
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('rides_per_day', args.rides_per_day),
+            ('future_days', args.future_days),
+            ('archive_days', args.archive_days),
+            ('iterations', args.iterations),
+        ])),
+        ('history_days', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
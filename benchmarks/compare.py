@@ -0,0 +1,64 @@
+""" Compare two benchmark results.
+
+Exit with status 1 when a case got slower than the threshold allows or
+runs more queries than before.
+
+Usage:
+    python -m benchmarks.compare base.json head.json --threshold 0.1
+"""
+
+# Utilities
+import argparse
+import json
+import sys
+
+
+def compare(base, head, metric='median_ms', threshold=0.1):
+    """ Return a row per case and whether any of them regressed. """
+    rows = []
+    regressed = False
+    for name, result in head['results'].items():
+        before = base['results'].get(name)
+        if before is None:
+            rows.append((name, None, result[metric], None, 'new'))
+            continue
+        change = (result[metric] - before[metric]) / before[metric]
+        status = 'ok'
+        if change > threshold:
+            status = 'SLOWER'
+        if (result['queries'] or 0) > (before['queries'] or 0):
+            status = 'MORE QUERIES'
+        regressed |= status != 'ok'
+        rows.append((name, before[metric], result[metric], change, status))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--metric', default='median_ms')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    rows, regressed = compare(base, head, args.metric, args.threshold)
+    print('{:<24} {:>12} {:>12} {:>9}  {}'.format(
+        'case', 'base', 'head', 'change', 'status'))
+    for name, before, after, change, status in rows:
+        print('{:<24} {:>12} {:>12} {:>9}  {}'.format(
+            name,
+            '-' if before is None else '{:.3f}'.format(before),
+            '{:.3f}'.format(after),
+            '-' if change is None else '{:+.1%}'.format(change),
+            status
+        ))
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+""" Synthetic dataset generator.
+
+Build realistic datasets for benchmarking: circle sizes follow a power law
+(a few huge circles and a long tail of small ones), rides are offered in
+each circle proportionally to its size and part of them already carry
+passengers. Generation is deterministic for a given seed. """
+
+# Django
+from django.utils import timezone
+
+# Utilities
+from typing import List
+import random
+import factory.random
+from cride.utils.fixtures import (chunked, membership_sizes, next_id,
+                                  reset_sequences)
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Factories
+from benchmarks.factories import (UserFactory, ProfileFactory, CircleFactory,
+                                  RideFactory)
+
+
+SCALES = {
+    'tiny': {'users': 500, 'circles': 20, 'rides': 2000},
+    'small': {'users': 5000, 'circles': 200, 'rides': 50000},
+    'medium': {'users': 50000, 'circles': 2000, 'rides': 1000000},
+    'large': {'users': 200000, 'circles': 5000, 'rides': 5000000},
+}
+
+MAX_PASSENGERS = 3
+
+
+def generate(users, circles, rides, alpha=1.1, passenger_ratio=0.3, seed=42,
+             chunk_size=5000, log=None):
+    """ Generate a dataset and return a summary of what was created.
+
+    Primary keys are assigned here so related rows can be bulk inserted on
+    every database backend, sequences are reset at the end. """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    factory.random.reseed_random(seed)
+    UserFactory.reset_sequence(next_id(User))
+    CircleFactory.reset_sequence(next_id(Circle))
+
+    log('Creating {} users'.format(users))
+    user_ids = _create_users(users, chunk_size)
+
+    log('Creating {} circles'.format(circles))
+    circle_ids = _create_circles(circles, chunk_size)
+
+    sizes = membership_sizes(circles, users, alpha)
+    log('Creating {} memberships'.format(sum(sizes)))
+    members = _create_memberships(rng, circle_ids, user_ids, sizes,
+                                  chunk_size)
+
+    log('Creating {} rides'.format(rides))
+    passengers = _create_rides(rng, members, sizes, rides, passenger_ratio,
+                               chunk_size)
+
+    reset_sequences([User, Profile, Circle, Membership, Ride,
+                     Ride.passenger.through])
+    return {
+        'seed': seed,
+        'users': users,
+        'circles': circles,
+        'memberships': sum(sizes),
+        'rides': rides,
+        'passengers': passengers,
+        'largest_circle': max(sizes),
+    }
+
+
+def _create_users(count, chunk_size):
+    """ Create users along with their profiles. """
+    user_ids: List[int] = []
+    first_id = next_id(User)
+    first_profile_id = next_id(Profile)
+    for chunk in chunked(range(count), chunk_size):
+        batch = UserFactory.build_batch(len(chunk))
+        profiles = []
+        for offset, user in zip(chunk, batch):
+            user.pk = first_id + offset
+            profile = ProfileFactory.build(user=None)
+            profile.pk = first_profile_id + offset
+            profile.user_id = user.pk
+            profiles.append(profile)
+        User.objects.bulk_create(batch)
+        Profile.objects.bulk_create(profiles)
+        user_ids.extend(user.pk for user in batch)
+    return user_ids
+
+
+def _create_circles(count, chunk_size):
+    """ Create public circles. """
+    circle_ids: List[int] = []
+    first_id = next_id(Circle)
+    for chunk in chunked(range(count), chunk_size):
+        batch = CircleFactory.build_batch(len(chunk))
+        for offset, circle in zip(chunk, batch):
+            circle.pk = first_id + offset
+        Circle.objects.bulk_create(batch)
+        circle_ids.extend(circle.pk for circle in batch)
+    return circle_ids
+
+
+def _create_memberships(rng, circle_ids, user_ids, sizes, chunk_size):
+    """ Create memberships and return the members of every circle.
+
+    The first member of each circle is its admin. """
+    # Profiles were created alongside users, so their ids share the offset.
+    profile_offset = Profile.objects.get(user_id=user_ids[0]).pk - user_ids[0]
+    members = {}
+
+    def memberships():
+        for circle_id, size in zip(circle_ids, sizes):
+            members[circle_id] = rng.sample(user_ids, size)
+            for position, user_id in enumerate(members[circle_id]):
+                yield Membership(
+                    user_id=user_id,
+                    profile_id=user_id + profile_offset,
+                    circle_id=circle_id,
+                    is_admin=position == 0,
+                    remaining_invitations=10
+                )
+
+    for batch in chunked(memberships(), chunk_size):
+        Membership.objects.bulk_create(batch)
+    return members
+
+
+def _create_rides(rng, members, sizes, count, passenger_ratio, chunk_size):
+    """ Create rides and their passengers, return the passengers count. """
+    now = timezone.now()
+    circle_ids = list(members)
+    first_id = next_id(Ride)
+    Passenger = Ride.passenger.through
+    created_passengers = 0
+
+    for chunk in chunked(range(count), chunk_size):
+        rides = []
+        passengers: list = []
+        circles = rng.choices(circle_ids, weights=sizes, k=len(chunk))
+        for offset, circle_id in zip(chunk, circles):
+            circle_members = members[circle_id]
+            ride = RideFactory.build(offered_by=None, offered_in=None)
+            ride.pk = first_id + offset
+            ride.offered_in_id = circle_id
+            ride.offered_by_id = rng.choice(circle_members)
+            ride.is_active = ride.arrival_date > now
+
+            if rng.random() < passenger_ratio:
+                candidates = rng.sample(
+                    circle_members,
+                    min(len(circle_members), MAX_PASSENGERS + 1)
+                )
+                taken = [c for c in candidates if c != ride.offered_by_id]
+                taken = taken[:rng.randint(1, ride.available_seats)]
+                ride.available_seats -= len(taken)
+                passengers.extend(
+                    Passenger(ride_id=ride.pk, user_id=user_id)
+                    for user_id in taken
+                )
+            rides.append(ride)
+        Ride.objects.bulk_create(rides)
+        Passenger.objects.bulk_create(passengers)
+        created_passengers += len(passengers)
+    return created_passengers
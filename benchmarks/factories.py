@@ -0,0 +1,116 @@
+""" Model factories used to build synthetic datasets. """
+
+# Django
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+# Utilities
+from datetime import timedelta
+from typing import Dict
+import factory
+from factory import fuzzy
+
+# Models
+from cride.circles.models import Circle, Membership, Invitation
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+
+PASSWORD = 'benchmark-password'
+
+_PASSWORD_HASH_CACHE: Dict[str, str] = {}
+
+
+def password_hash():
+    """ Return the hash of PASSWORD.
+
+    Hashing a password is expensive on purpose, every synthetic user shares
+    the same hash. """
+    if PASSWORD not in _PASSWORD_HASH_CACHE:
+        _PASSWORD_HASH_CACHE[PASSWORD] = make_password(PASSWORD)
+    return _PASSWORD_HASH_CACHE[PASSWORD]
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    """ User factory. """
+
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: 'user{}'.format(n))
+    email = factory.LazyAttribute(lambda o: '{}@example.com'.format(o.username))
+    first_name = factory.Faker('first_name')
+    last_name = factory.Faker('last_name')
+    phone_number = factory.Sequence(lambda n: '+54{:010d}'.format(n))
+    password = factory.LazyFunction(password_hash)
+    is_verified = True
+    is_client = True
+
+
+class ProfileFactory(factory.django.DjangoModelFactory):
+    """ Profile factory. """
+
+    class Meta:
+        model = Profile
+
+    user = factory.SubFactory(UserFactory)
+    biography = factory.Faker('sentence', nb_words=12)
+    reputation = fuzzy.FuzzyFloat(1.0, 5.0)
+
+
+class CircleFactory(factory.django.DjangoModelFactory):
+    """ Circle factory. """
+
+    class Meta:
+        model = Circle
+
+    name = factory.Faker('company')
+    slug_name = factory.Sequence(lambda n: 'circle-{}'.format(n))
+    about = factory.Faker('catch_phrase')
+    verified = fuzzy.FuzzyChoice([True, False])
+    is_public = True
+    is_limited = False
+
+
+class MembershipFactory(factory.django.DjangoModelFactory):
+    """ Membership factory. """
+
+    class Meta:
+        model = Membership
+
+    user = factory.SubFactory(UserFactory)
+    profile = factory.LazyAttribute(lambda o: o.user.profile)
+    circle = factory.SubFactory(CircleFactory)
+    remaining_invitations = 10
+
+
+class InvitationFactory(factory.django.DjangoModelFactory):
+    """ Invitation factory. """
+
+    class Meta:
+        model = Invitation
+
+    code = factory.Sequence(lambda n: 'BENCH{:09d}'.format(n))
+    issue_by = factory.SubFactory(UserFactory)
+    circle = factory.SubFactory(CircleFactory)
+
+
+class RideFactory(factory.django.DjangoModelFactory):
+    """ Ride factory. """
+
+    class Meta:
+        model = Ride
+
+    offered_by = factory.SubFactory(UserFactory)
+    offered_in = factory.SubFactory(CircleFactory)
+    available_seats = fuzzy.FuzzyInteger(1, 6)
+    comments = factory.Faker('sentence', nb_words=8)
+    departure_location = factory.Faker('street_address')
+    arrival_location = factory.Faker('street_address')
+    departure_date = fuzzy.FuzzyDateTime(
+        timezone.now() - timedelta(days=30),
+        timezone.now() + timedelta(days=30)
+    )
+    arrival_date = factory.LazyAttribute(
+        lambda o: o.departure_date + timedelta(minutes=45)
+    )
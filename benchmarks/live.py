@@ -0,0 +1,167 @@
+""" Live ride feed subscribers per process.
+
+Open a growing number of ride streams against the stream ASGI application
+of a single process, then publish events to their circle and time how long
+every subscriber takes to get each one. The memory held per open stream is
+measured with tracemalloc. Events are published from another thread, like
+the Redis listener of the process does.
+
+Usage:
+    python -m benchmarks.live --subscribers 100 1000 10000 --events 50
+"""
+
+# Utilities
+from collections import OrderedDict
+from typing import Any, Dict
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--subscribers', type=int, nargs='+',
+                        default=[100, 1000, 10000])
+    parser.add_argument('--events', type=int, default=50,
+                        help='Events published to every set of streams.')
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def measure(app, path, token, circle_pk, count, events):
+    """ Open count streams, publish the events and close the streams. """
+    from cride.rides.live import event_frame, ride_channel
+    from cride.utils.pubsub import get_broker
+
+    loop = asyncio.get_event_loop()
+    delivered: Dict[str, Any] = {'count': 0, 'done': asyncio.Event()}
+    opened: Dict[str, Any] = {'count': 0, 'done': asyncio.Event()}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            return
+        if message['body'] == b'retry: 5000\n\n':
+            opened['count'] += 1
+            if opened['count'] == count:
+                opened['done'].set()
+        elif message['body'].startswith(b'id: '):
+            delivered['count'] += 1
+            if delivered['count'] == count:
+                delivered['done'].set()
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'authorization', 'Token {}'.format(token).encode())],
+    }
+    disconnects = [asyncio.Event() for _ in range(count)]
+
+    def receiver(disconnect):
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+        return receive
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(app(scope, receiver(disconnect), send))
+             for disconnect in disconnects]
+    await opened['done'].wait()
+    connect = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    broker = get_broker()
+    channel = ride_channel(circle_pk)
+    latencies = []
+    for event_id in range(1, events + 1):
+        frame = event_frame(event_id, 'ride_joined',
+                            {'ride': 1, 'available_seats': 1})
+        delivered['count'] = 0
+        delivered['done'].clear()
+        start = time.perf_counter()
+        await loop.run_in_executor(None, broker.publish, channel, frame)
+        await delivered['done'].wait()
+        latencies.append(time.perf_counter() - start)
+
+    for disconnect in disconnects:
+        disconnect.set()
+    await asyncio.gather(*tasks)
+    return OrderedDict([
+        ('connect_s', round(connect, 3)),
+        ('kb_per_stream', round(held / count / 1024, 2)),
+        ('fanout_p50_ms', round(statistics.median(latencies) * 1000, 3)),
+        ('fanout_p99_ms', round(percentile(latencies, 0.99) * 1000, 3)),
+        ('deliveries_per_s', round(count * len(latencies) / sum(latencies))),
+    ])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.test.utils import (override_settings, setup_databases,
+                                   setup_test_environment,
+                                   teardown_databases)
+    from rest_framework.authtoken.models import Token
+    from cride.circles.models import Circle, Membership
+    from cride.rides.live import live_routes
+    from cride.users.models import Profile, User
+
+    async def not_found(scope, receive, send):
+        raise AssertionError('Not a stream.')
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    results = OrderedDict()
+    try:
+        circle = Circle.objects.create(name='Benchmark', slug_name='bench',
+                                       about='Live feed benchmark')
+        user = User.objects.create(email='bench@comparteride.com',
+                                   username='bench', first_name='Bench',
+                                   last_name='Mark', password='bench1234')
+        Membership.objects.create(user=user, circle=circle,
+                                  profile=Profile.objects.create(user=user))
+        token = Token.objects.create(user=user).key
+        app = live_routes(not_found)
+        path = '/circles/bench/rides/stream/'
+
+        with override_settings(LIVE_FEED_BROKER='local',
+                               LIVE_FEED_KEEPALIVE=60,
+                               LIVE_FEED_QUEUE_SIZE=args.events + 1):
+            for count in args.subscribers:
+                results[str(count)] = asyncio.get_event_loop(
+                ).run_until_complete(measure(app, path, token, circle.pk,
+                                             count, args.events))
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([('events', args.events)])),
+        ('subscribers', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
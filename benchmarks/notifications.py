@@ -0,0 +1,129 @@
+""" New rides notifications throughput.
+
+Notify a few rides to a large circle and send the digests, with tasks run
+in process and the locmem email backend standing in for SMTP. Chunk size 1
+is the naive pipeline: a task and an email connection per member.
+
+Usage:
+    python -m benchmarks.notifications --users 25000 --chunk-sizes 1 500
+"""
+
+# Utilities
+from collections import OrderedDict
+import argparse
+import json
+import os
+import random
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--users', type=int, default=25000,
+                        help='Users generated, the circle gets a fifth.')
+    parser.add_argument('--rides', type=int, default=5)
+    parser.add_argument('--instant', type=float, default=0.2,
+                        help='Share of members emailed for every ride.')
+    parser.add_argument('--never', type=float, default=0.1,
+                        help='Share of members never notified.')
+    parser.add_argument('--chunk-sizes', type=int, nargs='+',
+                        default=[1, 100, 500])
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from celery.signals import task_prerun
+    from datetime import timedelta
+    from django.core import mail
+    from django.test.utils import (override_settings, setup_databases,
+                                   setup_test_environment,
+                                   teardown_databases)
+    from django.utils import timezone
+    from cride.circles.models import Circle, Membership
+    from cride.notifications.models import (NotificationPreference,
+                                            PendingNotification)
+    from cride.rides.models import Ride
+    from cride.taskapp.tasks import notify_new_ride, send_ride_digests
+    from cride.utils.fixtures import FixtureLoader
+
+    tasks = []
+    task_prerun.connect(lambda **kwargs: tasks.append(1), weak=False)
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    results = OrderedDict()
+    try:
+        FixtureLoader(users=args.users, circles=1, rides=0).load()
+        circle = Circle.objects.get()
+        members = list(Membership.objects.values_list('user', flat=True))
+        rng = random.Random(42)
+        preferences = []
+        for pk in members:
+            draw = rng.random()
+            if draw < args.instant:
+                preferences.append(NotificationPreference(
+                    user_id=pk, new_rides=NotificationPreference.INSTANT))
+            elif draw < args.instant + args.never:
+                preferences.append(NotificationPreference(
+                    user_id=pk, new_rides=NotificationPreference.NEVER))
+        NotificationPreference.objects.bulk_create(preferences)
+
+        departure = timezone.now() + timedelta(days=1)
+        rides = [Ride.objects.create(
+            offered_by_id=members[i],
+            offered_in=circle,
+            departure_location='Centro',
+            departure_date=departure,
+            arrival_location='Terminal',
+            arrival_date=departure + timedelta(hours=1)
+        ).pk for i in range(args.rides)]
+
+        for size in args.chunk_sizes:
+            PendingNotification.objects.all().delete()
+            mail.outbox = []
+            del tasks[:]
+            with override_settings(NOTIFICATIONS_CHUNK_SIZE=size):
+                start = time.perf_counter()
+                for pk in rides:
+                    notify_new_ride(pk)
+                fanout = time.perf_counter() - start
+                send_ride_digests()
+                total = time.perf_counter() - start
+            results[str(size)] = OrderedDict([
+                ('tasks', len(tasks)),
+                ('emails', len(mail.outbox)),
+                ('fanout_s', round(fanout, 3)),
+                ('total_s', round(total, 3)),
+                ('notifications_per_s',
+                 round(len(members) * len(rides) / total)),
+            ])
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('users', args.users),
+            ('members', len(members)),
+            ('rides', args.rides),
+            ('instant', args.instant),
+            ('never', args.never),
+        ])),
+        ('chunk_sizes', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
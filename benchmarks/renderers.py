@@ -0,0 +1,108 @@
+""" JSON renderer and parser micro-benchmark.
+
+Serialize pages of rides (nested driver and passengers) with
+RideModelSerializer and time how long JSONRenderer and ORJSONRenderer take
+to render them, and JSONParser and ORJSONParser to parse them back.
+
+Usage:
+    python -m benchmarks.renderers --rides 100 --iterations 200
+"""
+
+# Utilities
+from collections import OrderedDict
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def timed(func, iterations):
+    """ Return the median and best time of func in microseconds. """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return OrderedDict([
+        ('median_us', round(statistics.median(timings), 1)),
+        ('min_us', round(min(timings), 1)),
+    ])
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--rides', type=int, default=100,
+                        help='Rides rendered in every payload.')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.test.utils import (setup_test_environment, setup_databases,
+                                   teardown_databases)
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from cride.rides.models import Ride
+    from cride.rides.serializers import RideModelSerializer
+    from cride.utils.fixtures import FixtureLoader
+    from cride.utils.parsers import ORJSONParser, orjson
+    from cride.utils.renderers import ORJSONRenderer
+
+    if orjson is None:
+        print('orjson is not installed, ORJSONRenderer falls back to the '
+              'stdlib', file=sys.stderr)
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        FixtureLoader(users=200, circles=5, rides=args.rides,
+                      passenger_ratio=1).load()
+        rides = Ride.objects.select_related(
+            'offered_by__profile', 'offered_in'
+        ).prefetch_related('passenger__profile')[:args.rides]
+        data = RideModelSerializer(rides, many=True).data
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    payload = JSONRenderer().render(data)
+    if ORJSONRenderer().render(data) != payload:
+        raise RuntimeError('ORJSONRenderer output differs from JSONRenderer')
+
+    results = OrderedDict()
+    for name, renderer in (('render.json', JSONRenderer()),
+                           ('render.orjson', ORJSONRenderer())):
+        results[name] = timed(lambda: renderer.render(data), args.iterations)
+    for name, parser in (('parse.json', JSONParser()),
+                         ('parse.orjson', ORJSONParser())):
+        results[name] = timed(lambda: parser.parse(io.BytesIO(payload)),
+                              args.iterations)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('rides', len(data)),
+            ('bytes', len(payload)),
+            ('iterations', args.iterations),
+            ('orjson', getattr(orjson, '__version__', None)),
+        ])),
+        ('results', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
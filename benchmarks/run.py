@@ -0,0 +1,287 @@
+""" API benchmark runner.
+
+Generate a synthetic dataset in a dedicated test database and time the hot
+API endpoints through the whole Django stack. Results are emitted as JSON so
+runs from different commits can be compared with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.run --scale small --output results.json
+"""
+
+# Utilities
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Dict
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+CASES: Dict[str, Callable] = OrderedDict()
+
+
+def case(name):
+    """ Register a benchmark case.
+
+    Cases receive the benchmark context and return the request to perform
+    as a (method, url, data, expected status) tuple. """
+    def decorator(func):
+        CASES[name] = func
+        return func
+    return decorator
+
+
+@case('rides.list')
+def ride_list(ctx, i):
+    return 'get', '/circles/{}/rides/'.format(ctx.circle.slug_name), None, 200
+
+
+@case('rides.join')
+def ride_join(ctx, i):
+    ride = ctx.joinable_rides[i % len(ctx.joinable_rides)]
+    url = '/circles/{}/rides/{}/join/'.format(ctx.circle.slug_name, ride)
+    return 'post', url, {}, 200
+
+
+@case('rides.create')
+def ride_create(ctx, i):
+    from django.utils import timezone
+    departure = timezone.now() + timedelta(days=1, minutes=i)
+    data = {
+        'available_seats': 3,
+        'comments': 'Benchmark ride',
+        'departure_location': 'Ciudad Universitaria',
+        'departure_date': departure.isoformat(),
+        'arrival_location': 'Centro',
+        'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+    }
+    return 'post', '/circles/{}/rides/'.format(ctx.circle.slug_name), data, 201
+
+
+@case('members.list')
+def member_list(ctx, i):
+    return 'get', '/circles/{}/members/'.format(ctx.circle.slug_name), None, 200
+
+
+@case('members.invitations')
+def member_invitations(ctx, i):
+    url = '/circles/{}/members/{}/invitations/'.format(
+        ctx.circle.slug_name,
+        ctx.member.username
+    )
+    return 'get', url, None, 200
+
+
+@case('members.create')
+def member_create(ctx, i):
+    ctx.authenticate(ctx.outsider)
+    url = '/circles/{}/members/'.format(ctx.circle.slug_name)
+    return 'post', url, {'invitation_code': ctx.invitation.code}, 201
+
+
+@case('users.login')
+def user_login(ctx, i):
+    from benchmarks.factories import PASSWORD
+    ctx.client.credentials()
+    data = {'email': ctx.member.email, 'password': PASSWORD}
+    return 'post', '/users/login/', data, 201
+
+
+@case('users.retrieve')
+def user_retrieve(ctx, i):
+    return 'get', '/users/{}/'.format(ctx.member.username), None, 200
+
+
+class BenchmarkContext:
+    """ Objects shared by every benchmark case.
+
+    The benchmarked circle is the biggest one, which is the worst case for
+    list endpoints. """
+
+    def __init__(self):
+        from django.db.models import Count
+        from django.utils import timezone
+        from rest_framework.test import APIClient
+        from cride.circles.models import Circle, Invitation
+        from cride.users.models import User
+
+        self.client = APIClient()
+        self.circle = Circle.objects.annotate(
+            size=Count('membership')
+        ).order_by('-size').first()
+        self.member = User.objects.get(
+            membership__circle=self.circle,
+            membership__is_admin=True
+        )
+        self.outsider = User.objects.exclude(
+            membership__circle=self.circle
+        ).order_by('pk').first()
+        self.invitation = Invitation.objects.create(
+            issue_by=self.member,
+            circle=self.circle
+        )
+        self.joinable_rides = list(self.circle.ride_set.filter(
+            departure_date__gte=timezone.now() + timedelta(hours=1),
+            is_active=True,
+            available_seats__gte=1
+        ).exclude(
+            offered_by=self.member
+        ).exclude(
+            passenger=self.member
+        ).values_list('pk', flat=True)[:100])
+
+    def authenticate(self, user):
+        """ Use user's token on the following requests. """
+        from rest_framework.authtoken.models import Token
+        token, _ = Token.objects.get_or_create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token.key))
+
+
+def run_case(ctx, name, iterations, warmup):
+    """ Time a benchmark case.
+
+    Every request runs inside a transaction that is rolled back, so the
+    dataset is the same for every iteration and every run. """
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    queries = None
+    for i in range(warmup + iterations):
+        ctx.authenticate(ctx.member)
+        with transaction.atomic():
+            method, url, data, expected = CASES[name](ctx, i)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = getattr(ctx.client, method)(url, data,
+                                                       format='json')
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        if response.status_code != expected:
+            raise RuntimeError('{} returned {}: {}'.format(
+                name, response.status_code, response.content[:500]))
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries = len(captured)
+
+    timings.sort()
+    return OrderedDict([
+        ('iterations', iterations),
+        ('queries', queries),
+        ('min_ms', round(timings[0], 3)),
+        ('median_ms', round(statistics.median(timings), 3)),
+        ('mean_ms', round(statistics.mean(timings), 3)),
+        ('p95_ms', round(timings[int(len(timings) * 0.95) - 1], 3)),
+        ('max_ms', round(timings[-1], 3)),
+        ('stdev_ms', round(statistics.pstdev(timings), 3)),
+    ])
+
+
+def git_revision():
+    """ Return the current commit hash if available. """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--scale', choices=['tiny', 'small', 'medium', 'large'],
+                        default='small')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--circles', type=int)
+    parser.add_argument('--rides', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--bulk', action='store_true',
+                        help='Generate the dataset with the bulk fixture '
+                             'loader instead of factories (much faster, '
+                             'meant for medium and large scales).')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--case', action='append', dest='cases',
+                        choices=list(CASES), help='Run only these cases.')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Keep the benchmark database and reuse its data.')
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment, setup_databases,
+                                   teardown_databases)
+    from cride.rides.models import Ride
+    from cride.utils.fixtures import FixtureLoader
+    from benchmarks.datasets import SCALES, generate
+    from benchmarks.factories import PASSWORD
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False,
+                                 keepdb=args.keepdb)
+    try:
+        size = dict(SCALES[args.scale])
+        for key in ('users', 'circles', 'rides'):
+            if getattr(args, key):
+                size[key] = getattr(args, key)
+
+        if args.keepdb and Ride.objects.exists():
+            log('Reusing existing dataset')
+            dataset = None
+        else:
+            start = time.perf_counter()
+            if args.bulk:
+                dataset = FixtureLoader(seed=args.seed, password=PASSWORD,
+                                        log=log, **size).load()
+            else:
+                dataset = generate(seed=args.seed, log=log, **size)
+            dataset['seconds'] = round(time.perf_counter() - start, 2)
+
+        ctx = BenchmarkContext()
+        results = OrderedDict()
+        for name in args.cases or CASES:
+            log('Running {}'.format(name))
+            results[name] = run_case(ctx, name, args.iterations, args.warmup)
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=args.keepdb)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('revision', git_revision()),
+            ('timestamp', int(time.time())),
+            ('python', platform.python_version()),
+            ('django', django.get_version()),
+            ('database', connection.vendor),
+            ('scale', args.scale),
+            ('size', size),
+            ('dataset', dataset),
+        ])),
+        ('results', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
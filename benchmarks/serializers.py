@@ -0,0 +1,114 @@
+""" List serializers micro-benchmark.
+
+Time how long a page of rides and of members takes to be serialized with the
+model serializers (as served before, and with select/prefetch related) and
+with the row serializers, queries included. Reports the cost per row.
+
+Usage:
+    python -m benchmarks.serializers --page-size 50 --iterations 50
+"""
+
+# Utilities
+from collections import OrderedDict
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (CaptureQueriesContext,
+                                   setup_test_environment, setup_databases,
+                                   teardown_databases)
+    from cride.circles.models import Membership
+    from cride.circles.serializers import (MembershipModelSerializer,
+                                           MembershipRowSerializer)
+    from cride.rides.models import Ride
+    from cride.rides.serializers import (RideModelSerializer,
+                                         RideRowSerializer)
+    from cride.utils.fixtures import FixtureLoader
+
+    def model(serializer_class, queryset):
+        return lambda: serializer_class(
+            queryset[:args.page_size], many=True).data
+
+    def rows(serializer_class, queryset):
+        serializer = serializer_class()
+        return lambda: serializer.serialize(
+            serializer.values(queryset)[:args.page_size])
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        FixtureLoader(users=args.page_size * 20, circles=1,
+                      rides=args.page_size * 4, passenger_ratio=0.8).load()
+        rides = Ride.objects.order_by('departure_date')
+        members = Membership.objects.all()
+        cases = OrderedDict([
+            ('rides.model', model(RideModelSerializer, rides)),
+            ('rides.model_prefetch', model(
+                RideModelSerializer,
+                rides.select_related(
+                    'offered_by__profile', 'offered_in'
+                ).prefetch_related('passenger__profile')
+            )),
+            ('rides.rows', rows(RideRowSerializer, rides)),
+            ('members.model', model(MembershipModelSerializer, members)),
+            ('members.model_prefetch', model(
+                MembershipModelSerializer,
+                members.select_related('user__profile', 'invited_by')
+            )),
+            ('members.rows', rows(MembershipRowSerializer, members)),
+        ])
+
+        results = OrderedDict()
+        for name, func in cases.items():
+            with CaptureQueriesContext(connection) as queries:
+                func()
+            timings = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1e6)
+            median = statistics.median(timings)
+            results[name] = OrderedDict([
+                ('queries', len(queries)),
+                ('page_us', round(median, 1)),
+                ('row_us', round(median / args.page_size, 1)),
+            ])
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('page_size', args.page_size),
+            ('iterations', args.iterations),
+        ])),
+        ('results', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+""" WSGI vs ASGI throughput benchmark.
+
+Start the project under gunicorn with sync workers (config.wsgi) and with
+uvicorn workers (config.asgi) using the same number of processes, and hammer
+the read heavy endpoints with a fixed number of concurrent keep-alive
+connections. Reports requests per second and latency percentiles per server.
+
+The servers use the database configured by DATABASE_URL, load it first with
+`python manage.py load_fixtures`.
+
+Usage:
+    python -m benchmarks.servers --workers 4 --concurrency 64 --duration 20
+"""
+
+# Utilities
+from collections import OrderedDict
+from typing import List, Optional
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+
+SERVERS = OrderedDict([
+    ('wsgi', ['gunicorn', 'config.wsgi']),
+    ('asgi', ['gunicorn', 'config.asgi',
+              '--worker-class', 'uvicorn.workers.UvicornWorker']),
+])
+
+
+def build_targets():
+    """ Return the benchmarked paths and the token used to request them.
+
+    The biggest circle and one of its admins are used, like in
+    benchmarks.run. """
+    import django
+    django.setup()
+
+    from django.db.models import Count
+    from rest_framework.authtoken.models import Token
+    from cride.circles.models import Circle
+    from cride.users.models import User
+
+    circle = Circle.objects.annotate(
+        size=Count('membership')
+    ).order_by('-size').first()
+    if circle is None:
+        raise SystemExit('The database is empty, run load_fixtures first.')
+    member = User.objects.get(
+        membership__circle=circle,
+        membership__is_admin=True
+    )
+    token, _ = Token.objects.get_or_create(user=member)
+    paths = [
+        '/circles/{}/rides/'.format(circle.slug_name),
+        '/circles/{}/'.format(circle.slug_name),
+        '/circles/{}/members/'.format(circle.slug_name),
+    ]
+    return paths, token.key
+
+
+def start_server(name, workers, port):
+    """ Start the server and wait until it accepts connections. """
+    env = dict(os.environ)
+    env['DJANGO_ASYNC_VIEWS'] = str(name == 'asgi')
+    command = SERVERS[name] + [
+        '--workers', str(workers),
+        '--bind', '127.0.0.1:{}'.format(port),
+        '--log-level', 'warning',
+    ]
+    process = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('{} exited with {}'.format(name,
+                                                          process.returncode))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError('{} did not start'.format(name))
+
+
+def stop_server(process):
+    """ Gracefully stop the server. """
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def read_response(reader):
+    """ Read a whole HTTP/1.1 response and return its status code. """
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection') == 'close'
+
+
+async def worker(port, requests, deadline, warmup, latencies, errors):
+    """ Send requests over a keep-alive connection until the deadline. """
+    reader = writer = None
+    i = 0
+    while time.monotonic() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        start = time.monotonic()
+        writer.write(requests[i % len(requests)])
+        i += 1
+        try:
+            status, close = await read_response(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            status, close = None, True
+        if start >= warmup:
+            if status == 200:
+                latencies.append(time.monotonic() - start)
+            else:
+                errors.append(status)
+        if close:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, token, concurrency, duration, warmup):
+    """ Run the load and return the successful latencies and errors. """
+    requests = [
+        'GET {} HTTP/1.1\r\n'
+        'Host: 127.0.0.1\r\n'
+        'Accept: application/json\r\n'
+        'Authorization: Token {}\r\n'
+        'Connection: keep-alive\r\n\r\n'.format(path, token).encode()
+        for path in paths
+    ]
+    now = time.monotonic()
+    latencies: List[float] = []
+    errors: List[Optional[int]] = []
+    await asyncio.gather(*[
+        worker(port, requests[i:] + requests[:i], now + warmup + duration,
+               now + warmup, latencies, errors)
+        for i in range(concurrency)
+    ])
+    return latencies, errors
+
+
+def summarize(latencies, errors, duration):
+    """ Return the throughput and latency percentiles of a run. """
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies] or [0]
+    return OrderedDict([
+        ('requests', len(latencies)),
+        ('errors', len(errors)),
+        ('rps', round(len(latencies) / duration, 1)),
+        ('median_ms', round(statistics.median(ms), 3)),
+        ('p95_ms', round(ms[int(len(ms) * 0.95) - 1], 3)),
+        ('p99_ms', round(ms[int(len(ms) * 0.99) - 1], 3)),
+        ('max_ms', round(ms[-1], 3)),
+    ])
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.production')
+    parser.add_argument('--server', action='append', dest='servers',
+                        choices=list(SERVERS), help='Run only these servers.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    paths, token = build_targets()
+
+    results = OrderedDict()
+    for name in args.servers or SERVERS:
+        print('Running {}'.format(name), file=sys.stderr)
+        process = start_server(name, args.workers, args.port)
+        try:
+            latencies, errors = asyncio.run(load(
+                args.port, paths, token, args.concurrency,
+                args.duration, args.warmup
+            ))
+        finally:
+            stop_server(process)
+        results[name] = summarize(latencies, errors, args.duration)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('workers', args.workers),
+            ('concurrency', args.concurrency),
+            ('duration', args.duration),
+            ('paths', paths),
+        ])),
+        ('results', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+""" Ride suggestions latency.
+
+Load a dataset with a few huge circles, pick the member of the most circles
+and time the suggestions of a one hour window, with the number of candidate
+rides scored.
+
+Usage:
+    python -m benchmarks.suggestions --users 5000 --circles 20 --rides 200000
+"""
+
+# Utilities
+from collections import OrderedDict
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='config.settings.test')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--circles', type=int, default=20)
+    parser.add_argument('--rides', type=int, default=200000)
+    parser.add_argument('--window-hours', type=int, nargs='+',
+                        default=[1, 6, 24])
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', help='Write results to this file.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+
+    import django
+    django.setup()
+
+    from datetime import timedelta
+    from django.db.models import Count
+    from django.test.utils import (setup_test_environment, setup_databases,
+                                   teardown_databases)
+    from django.utils import timezone
+    from cride.rides import suggestions
+    from cride.users.models import User
+    from cride.utils.fixtures import FixtureLoader
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    results = OrderedDict()
+    try:
+        FixtureLoader(users=args.users, circles=args.circles,
+                      rides=args.rides, history_days=0,
+                      future_days=30).load()
+        user = User.objects.annotate(
+            circles=Count('membership')).order_by('-circles').first()
+        start = timezone.now() + timedelta(days=3)
+        for hours in args.window_hours:
+            end = start + timedelta(hours=hours)
+            candidates = suggestions.candidates(user, start, end).count()
+            timings = []
+            for _ in range(args.iterations):
+                begin = time.perf_counter()
+                suggestions.suggest_rides(user, 'Ciudad Universitaria',
+                                          'Centro', start, end,
+                                          limit=args.limit, budget=60)
+                timings.append((time.perf_counter() - begin) * 1000)
+            results[str(hours)] = OrderedDict([
+                ('candidates', candidates),
+                ('median_ms', round(statistics.median(timings), 2)),
+                ('max_ms', round(max(timings), 2)),
+            ])
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+    report = OrderedDict([
+        ('meta', OrderedDict([
+            ('users', args.users),
+            ('circles', args.circles),
+            ('rides', args.rides),
+            ('member_of', user.circles),
+            ('iterations', args.iterations),
+        ])),
+        ('window_hours', results),
+    ])
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
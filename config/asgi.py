@@ -0,0 +1,36 @@
+"""
+ASGI config for Comparte Ride project.
+
+This module contains the ASGI application used by production ASGI servers
+(uvicorn workers managed by gunicorn). It should expose a module-level
+variable named ``application``.
+
+Under ASGI the read heavy endpoints (ride feed, circle detail and member list)
+are served by async views, so a worker process keeps accepting requests while
+others wait on the database. The live ride streams are served in front of
+Django, see cride.rides.live.
+
+"""
+import os
+import sys
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# cride directory.
+app_path = os.path.abspath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.append(os.path.join(app_path, 'cride'))
+
+# We defer to a DJANGO_SETTINGS_MODULE already in the environment.
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+os.environ.setdefault("DJANGO_ASYNC_VIEWS", "True")
+
+# This application object is used by any ASGI server configured to use this
+# file.
+application = get_asgi_application()
+
+# Imported once the apps are loaded.
+from cride.rides.live import live_routes  # noqa: E402
+
+application = live_routes(application)
@@ -2,6 +2,7 @@
 
 import environ
 from pathlib import Path
+from datetime import timedelta
 
 ROOT_DIR = environ.Path(__file__) - 3
 APPS_DIR = ROOT_DIR.path('cride')
@@ -33,12 +34,43 @@ DATABASES = {
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
 
+# Read replicas
+# Non-mutating API requests read from one of these databases.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = 'replica_{}'.format(index)
+    DATABASES[alias] = env.db_url_config(url)
+    DATABASE_REPLICAS.append(alias)
+
+# Shards
+# Circle-scoped data is split by circle between the default database and
+# these ones, see cride.utils.shards. Their 64-bit primary keys are taken
+# from disjoint ranges of DATABASE_SHARD_ID_SPACING keys (10^12 by
+# default), `manage.py check --database default` reports full ranges.
+DATABASE_SHARDS = []
+for index, url in enumerate(env.list('DATABASE_SHARD_URLS', default=[])):
+    alias = 'shard_{}'.format(index + 1)
+    DATABASES[alias] = env.db_url_config(url)
+    DATABASE_SHARDS.append(alias)
+if DATABASE_SHARDS:
+    DATABASE_SHARDS.insert(0, 'default')
+DATABASE_SHARD_ID_SPACING = env.int('DATABASE_SHARD_ID_SPACING', default=10 ** 12)
+# Tasks about a circle being moved to another shard are retried after this
+# many seconds.
+DATABASE_SHARD_MOVE_RETRY_DELAY = 60
+DATABASE_ROUTERS = ['cride.utils.shards.ShardRouter',
+                    'cride.utils.db.ReplicaRouter']
+
 # URLs
 ROOT_URLCONF = 'config.urls'
 
 # WSGI
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# ASGI
+# Serve the read heavy endpoints with async views (enabled by config.asgi).
+ASYNC_VIEWS = env.bool('DJANGO_ASYNC_VIEWS', default=False)
+
 # Users & Authentication
 AUTH_USER_MODEL = 'users.User'
 
@@ -61,6 +93,10 @@ LOCAL_APPS = [
     'cride.users.apps.UsersAppConfig',
     'cride.circles.apps.CirclesAppConfig',
     'cride.rides.apps.RidesAppConfig',
+    'cride.exports.apps.ExportsAppConfig',
+    'cride.notifications.apps.NotificationsAppConfig',
+    'cride.events.apps.EventsAppConfig',
+    'cride.utils.apps.UtilsAppConfig',
 ]
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
@@ -89,6 +125,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # Middlewares
 MIDDLEWARE = [
+    'cride.utils.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,6 +135,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Metrics
+METRICS_ENABLED = env.bool('DJANGO_METRICS_ENABLED', default=True)
+METRICS_PROFILE_SAMPLE_RATE = env.float('DJANGO_METRICS_PROFILE_SAMPLE_RATE', default=0.01)
+METRICS_PROFILE_THRESHOLD = env.float('DJANGO_METRICS_PROFILE_THRESHOLD', default=1.0)
+METRICS_PROFILE_DIR = env('DJANGO_METRICS_PROFILE_DIR', default=str(ROOT_DIR('profiles')))
+# /metrics/ answers requests sending this token (Authorization: Bearer
+# <token>), it's disabled while empty.
+METRICS_TOKEN = env('DJANGO_METRICS_TOKEN', default='')
+
 # Static files
 STATIC_ROOT = str(ROOT_DIR('staticfiles'))
 STATIC_URL = '/static/'
@@ -112,6 +158,69 @@ STATICFILES_FINDERS = [
 # Media
 MEDIA_ROOT = str(APPS_DIR('media'))
 MEDIA_URL = '/media/'
+# Uploaded pictures are resized to fit in boxes of these sizes (px).
+PICTURE_VARIANTS = {
+    'small': 96,
+    'medium': 320,
+    'large': 1080,
+}
+PICTURE_QUALITY = 82
+
+# Exports
+# Exports hold personal data and are only served by the admin download
+# view. Finished exports are saved to EXPORTS_STORAGE (dotted path of a
+# private storage class), or under EXPORTS_ROOT if empty, outside of
+# MEDIA_ROOT. Running exports are written to EXPORTS_WORK_DIR, which must
+# be shared by every Celery worker.
+EXPORTS_STORAGE = env('DJANGO_EXPORTS_STORAGE', default='')
+EXPORTS_ROOT = env('DJANGO_EXPORTS_ROOT', default=str(ROOT_DIR('exports')))
+EXPORTS_WORK_DIR = env('DJANGO_EXPORTS_WORK_DIR', default=str(ROOT_DIR.path('exports', 'work')))
+EXPORTS_CHUNK_SIZE = env.int('DJANGO_EXPORTS_CHUNK_SIZE', default=5000)
+EXPORTS_STALE_AFTER = timedelta(minutes=15)
+
+# Rides expiry
+# Arrived rides are disabled every RIDES_EXPIRY_INTERVAL, in transactions
+# of RIDES_EXPIRY_CHUNK_SIZE rides.
+RIDES_EXPIRY_INTERVAL = timedelta(seconds=env.int('DJANGO_RIDES_EXPIRY_INTERVAL', default=60))
+RIDES_EXPIRY_CHUNK_SIZE = env.int('DJANGO_RIDES_EXPIRY_CHUNK_SIZE', default=1000)
+
+# Rides archive
+# Rides are moved to the archive table RIDES_ARCHIVE_AFTER after arriving,
+# RIDES_ARCHIVE_CHUNKS chunks of RIDES_ARCHIVE_CHUNK_SIZE rides per task.
+RIDES_ARCHIVE_AFTER = timedelta(days=env.int('DJANGO_RIDES_ARCHIVE_DAYS', default=30))
+RIDES_ARCHIVE_CHUNK_SIZE = env.int('DJANGO_RIDES_ARCHIVE_CHUNK_SIZE', default=2000)
+RIDES_ARCHIVE_CHUNKS = 50
+
+# Invitations
+# Unused invitations expire INVITATIONS_EXPIRE_AFTER after being issued,
+# expired ones are deleted INVITATIONS_CLEANUP_CHUNKS chunks of
+# INVITATIONS_CLEANUP_CHUNK_SIZE invitations per task.
+INVITATIONS_EXPIRE_AFTER = timedelta(days=env.int('DJANGO_INVITATIONS_EXPIRE_DAYS', default=30))
+INVITATIONS_CLEANUP_CHUNK_SIZE = env.int('DJANGO_INVITATIONS_CLEANUP_CHUNK_SIZE', default=5000)
+INVITATIONS_CLEANUP_CHUNKS = 20
+
+# Notifications
+# New rides are notified to NOTIFICATIONS_CHUNK_SIZE members per task.
+NOTIFICATIONS_CHUNK_SIZE = env.int('DJANGO_NOTIFICATIONS_CHUNK_SIZE', default=500)
+
+# Idempotency
+# Responses to ride creations and joins sent with an Idempotency-Key header
+# are stored in the IDEMPOTENCY_CACHE cache, shared by the web processes,
+# and replayed to the retries of the same key for IDEMPOTENCY_TTL seconds.
+# The lock of a running request lasts IDEMPOTENCY_LOCK_TTL seconds, well past
+# the request timeout, its retries wait IDEMPOTENCY_LOCK_WAIT seconds for it.
+IDEMPOTENCY_CACHE = 'default'
+IDEMPOTENCY_TTL = env.int('DJANGO_IDEMPOTENCY_TTL', default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_TTL = env.int('DJANGO_IDEMPOTENCY_LOCK_TTL', default=5 * 60)
+IDEMPOTENCY_LOCK_WAIT = env.float('DJANGO_IDEMPOTENCY_LOCK_WAIT', default=1)
+
+# Outbox
+# The relay publishes up to OUTBOX_RELAY_BATCH_SIZE events per shard every
+# OUTBOX_RELAY_INTERVAL seconds, published events are deleted after
+# OUTBOX_RETENTION.
+OUTBOX_RELAY_BATCH_SIZE = env.int('DJANGO_OUTBOX_RELAY_BATCH_SIZE', default=500)
+OUTBOX_RELAY_INTERVAL = env.float('DJANGO_OUTBOX_RELAY_INTERVAL', default=1.0)
+OUTBOX_RETENTION = timedelta(days=env.int('DJANGO_OUTBOX_RETENTION_DAYS', default=7))
 
 # Templates
 TEMPLATES = [
@@ -155,9 +264,12 @@ ADMINS = [
     ("""Pablo Trinidad""", 'pablotrinidad@ciencias.unam.mx'),
 ]
 MANAGERS = ADMINS
+# Changelists of querysets the planner estimates above this number of rows
+# show the estimate instead of running an exact COUNT(*) (PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int('DJANGO_ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000)
 
 # Celery
-INSTALLED_APPS += ['cride.taskapp.celery.CeleryAppConfig']
+INSTALLED_APPS += ['cride.taskapp.apps.CeleryAppConfig']
 if USE_TZ:
     CELERY_TIMEZONE = TIME_ZONE
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://redis:6379/0')
@@ -167,12 +279,58 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERYD_TASK_TIME_LIMIT = 5 * 60
 CELERYD_TASK_SOFT_TIME_LIMIT = 60
+CELERY_BEAT_SCHEDULE = {
+    'disable_finished_rides': {
+        'task': 'disable_finished_rides',
+        'schedule': RIDES_EXPIRY_INTERVAL,
+    },
+    'archive_finished_rides': {
+        'task': 'archive_finished_rides',
+        'schedule': timedelta(hours=1),
+    },
+    'send_ride_digests': {
+        'task': 'send_ride_digests',
+        'schedule': timedelta(hours=3),
+    },
+    'rollup_daily_stats': {
+        'task': 'rollup_daily_stats',
+        'schedule': timedelta(hours=1),
+    },
+    'delete_expired_invitations': {
+        'task': 'delete_expired_invitations',
+        'schedule': timedelta(hours=6),
+    },
+    'resume_exports': {
+        'task': 'resume_exports',
+        'schedule': timedelta(minutes=10),
+    },
+    'purge_outbox': {
+        'task': 'purge_outbox',
+        'schedule': timedelta(days=1),
+    },
+}
+
+# Live feed
+# Ride events are pushed to the stream subscribers of every ASGI process
+# through LIVE_FEED_BROKER ('redis', or 'local' for a single process).
+# Subscribers more than LIVE_FEED_QUEUE_SIZE events behind are disconnected.
+# Stream tokens (for browsers) open a stream up to LIVE_FEED_TOKEN_MAX_AGE
+# seconds after they're issued.
+LIVE_FEED_BROKER = env('DJANGO_LIVE_FEED_BROKER', default='redis')
+LIVE_FEED_REDIS_URL = env('REDIS_URL', default='redis://redis:6379/0')
+LIVE_FEED_KEEPALIVE = env.float('DJANGO_LIVE_FEED_KEEPALIVE', default=15.0)
+LIVE_FEED_QUEUE_SIZE = env.int('DJANGO_LIVE_FEED_QUEUE_SIZE', default=100)
+LIVE_FEED_TOKEN_MAX_AGE = env.int('DJANGO_LIVE_FEED_TOKEN_MAX_AGE', default=60)
 
 # REST FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'cride.utils.renderers.ORJSONRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'cride.utils.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.TokenAuthentication',
@@ -33,6 +33,12 @@ EMAIL_PORT = 1025
 # django-extensions
 INSTALLED_APPS += ['django_extensions']  # noqa F405
 
+# Django REST Framework
+REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (  # noqa F405
+    'cride.utils.renderers.ORJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+)
+
 # Celery
 # CELERY_TASK_ALWAYS_EAGER = True
 # CELERY_TASK_EAGER_PROPAGATES = True
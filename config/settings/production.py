@@ -47,9 +47,12 @@ AWS_S3_OBJECT_PARAMETERS = {
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+DEFAULT_FILE_STORAGE = 'cride.utils.storages.MediaStorage'
 MEDIA_URL = f'https://{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com/'
 
+# Exports
+EXPORTS_STORAGE = env('DJANGO_EXPORTS_STORAGE', default='cride.utils.storages.PrivateStorage')
+
 # Templates
 TEMPLATES[0]['OPTIONS']['loaders'] = [  # noqa F405
     (
@@ -11,6 +11,25 @@ DEBUG = False
 SECRET_KEY = env("DJANGO_SECRET_KEY", default="7lEaACt4wsCj8JbXYgQLf4BmdG5QbuHTMYUGir2Gc1GHqqb2Pv8w9iXwwlIIviI2")
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
 
+# Databases
+# The replica mirrors the primary, tests enable it with DATABASE_REPLICAS.
+DATABASES["replica"] = dict(  # NOQA
+    DATABASES["default"],  # NOQA
+    ATOMIC_REQUESTS=False,
+    TEST={"MIRROR": "default"}
+)
+DATABASE_REPLICAS = []
+
+# Shards
+# Separate databases, tests enable them with DATABASE_SHARDS.
+for alias in ("shard_1", "shard_2"):
+    DATABASES[alias] = dict(DATABASES["default"], ATOMIC_REQUESTS=False,  # NOQA
+                            TEST={})
+    if "sqlite" not in DATABASES[alias]["ENGINE"]:  # NOQA
+        DATABASES[alias]["TEST"]["NAME"] = "test_{}_{}".format(  # NOQA
+            DATABASES["default"]["NAME"], alias)  # NOQA
+DATABASE_SHARDS = []
+
 # Cache
 CACHES = {
     "default": {
@@ -19,6 +38,16 @@ CACHES = {
     }
 }
 
+# Celery
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# Live feed
+LIVE_FEED_BROKER = "local"
+
+# Metrics
+METRICS_PROFILE_SAMPLE_RATE = 0
+
 # Passwords
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 
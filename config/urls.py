@@ -5,11 +5,16 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.contrib import admin
 
+from cride.utils import views as utils_views
+
 
 urlpatterns = [
     # Django Admin
     path(settings.ADMIN_URL, admin.site.urls),
 
+    # Metrics
+    path('metrics/', utils_views.metrics, name='metrics'),
+
     path('', include(('cride.circles.urls', 'circles'), namespace='circle')),
     path('', include(('cride.users.urls', 'users'), namespace='users')),
     path('', include(('cride.rides.urls', 'rides'), namespace='rides')),
@@ -1,75 +1,133 @@
 """ Circles admin. """
 
 # Django
+from django import forms
 from django.contrib import admin
-from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils.html import format_html
 
 # Models
 from cride.circles.models import Circle
-from cride.rides.models import Ride
+from cride.exports.models import ExportJob
+
+# Exports
+from cride.exports.admin import queue_export
 
 # Utilities
 from django.utils import timezone
-from datetime import datetime, timedelta
-import csv
+from cride.utils.admin import LargeTableAdminMixin, display
+from cride.utils.pictures import queue_variants
+from cride.utils.shards import replicate
+from cride.rides.exports import (RIDE_EXPORT_HEADER, local_day_range,
+                                 ride_export_rows)
+from cride.utils.exports import streaming_csv_response
+
+
+class RideExportForm(forms.Form):
+    """ Rides export date range form. """
+
+    start = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        """ Verify the range isn't reversed. """
+        data = super(RideExportForm, self).clean()
+        if data.get('start') and data.get('end') and \
+                data['start'] > data['end']:
+            raise forms.ValidationError('Start date must be before the end '
+                                        'date.')
+        return data
 
 
 @admin.register(Circle)
-class CircleAdmin(admin.ModelAdmin):
+class CircleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """ Circle admin. """
     list_display = ('slug_name', 'name',
                     'is_public', 'verified',
                     'is_limited', 'members_limit')
     search_fields = ('slug_name', 'name')
     list_filter = ('is_public', 'verified', 'is_limited')
+    readonly_fields = ('shard', 'moving')
+
+    actions = ['make_verified', 'make_unverified', 'download_todays_rides',
+               'download_rides', 'export_memberships', 'export_rides']
 
-    actions = ['make_verified', 'make_unverified', 'download_todays_rides']
+    def save_model(self, request, obj, form, change):
+        """ Create the variants of new pictures. """
+        super(CircleAdmin, self).save_model(request, obj, form, change)
+        if 'picture' in form.changed_data:
+            queue_variants(obj)
 
+    @display('Make selected circles verified')
     def make_verified(self, request, queryset):
         """ Make circles verified. """
         queryset.update(verified=True)
-    make_verified.short_description = 'Make selected circles verified'
+        replicate(Circle, queryset.values_list('pk', flat=True))
 
+    @display('Make selected circles unverified')
     def make_unverified(self, request, queryset):
         """ Make circles verified. """
         queryset.update(verified=False)
-    make_unverified.short_description = 'Make selected circles unverified'
+        replicate(Circle, queryset.values_list('pk', flat=True))
     
+    @display('Download todays rides')
     def download_todays_rides(self, request, queryset):
         """ Return today's rides. """
-        circles_ids = queryset.values_list('id')
-        now = timezone.now()
-        start = datetime (now.year, now.month, now.day, 0, 0, 0)
-        end = start + timedelta(days=1)
-        rides = Ride.objects.filter(
-            offered_in__in=circles_ids,
-            departure_date__gte=start,
-            departure_date__lte=end
-        ).order_by('departure_date')
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="rides.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'id', 
-            'passenger', 
-            'departure_location', 
-            'departure_date',
-            'arrival_location', 
-            'arrival_date', 
-            'rating'
-        ])
-        for ride in rides:
-            writer.writerow([
-                ride.pk,
-                ride.passenger.count(),
-                ride.departure_location,
-                str(ride.departure_date),
-                ride.arrival_location,
-                str(ride.arrival_date),
-                str(ride.rating)
-            ])
-        
-        return response
-
-    download_todays_rides.short_description = 'Download todays rides'
+        today = timezone.localdate()
+        return self.rides_csv_response(queryset, today, today)
+
+    @display('Download rides of a date range')
+    def download_rides(self, request, queryset):
+        """ Return the rides of a date range.
+
+        Render a form asking for the date range first. """
+        form = RideExportForm(request.POST if 'apply' in request.POST
+                              else None)
+        if form.is_valid():
+            return self.rides_csv_response(queryset,
+                                           form.cleaned_data['start'],
+                                           form.cleaned_data['end'])
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title='Download rides',
+            opts=self.model._meta,
+            form=form,
+            queryset=queryset,
+            action_checkbox_name=admin.helpers.ACTION_CHECKBOX_NAME,
+        )
+        return TemplateResponse(request,
+                                'admin/circles/circle/download_rides.html',
+                                context)
+
+    def rides_csv_response(self, queryset, start_date, end_date):
+        """ Stream the circles' rides departing between both dates. """
+        start, end = local_day_range(start_date, end_date)
+        rows = ride_export_rows(list(queryset.values_list('pk', flat=True)),
+                                start, end)
+        filename = 'rides-{}-{}.csv'.format(start_date.isoformat(),
+                                            end_date.isoformat())
+        return streaming_csv_response(RIDE_EXPORT_HEADER, rows, filename)
+
+    def export_dataset(self, request, queryset, dataset):
+        """ Queue an export job of the circles' dataset. """
+        job = ExportJob.objects.create(
+            dataset=dataset,
+            filters={'circles': list(queryset.values_list('pk', flat=True))},
+            requested_by=request.user
+        )
+        queue_export(job)
+        url = reverse('admin:exports_exportjob_change', args=[job.pk])
+        self.message_user(request, format_html(
+            'Export queued, follow its progress <a href="{}">here</a>.', url))
+
+    @display('Export memberships (background)')
+    def export_memberships(self, request, queryset):
+        """ Export the circles' memberships in background. """
+        self.export_dataset(request, queryset, 'memberships')
+
+    @display('Export all rides (background)')
+    def export_rides(self, request, queryset):
+        """ Export every ride of the circles in background. """
+        self.export_dataset(request, queryset, 'rides')
@@ -1,7 +1,8 @@
 """ Circle invitation manager. """
 
 # Django
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 
 # Utilities
 import random
@@ -11,7 +12,7 @@ from string import ascii_uppercase, digits
 class InvitationManager(models.Manager):
     """ Invitation manager.
 
-     Used to handle code creation.
+     Used to handle code creation and expiry.
      """
 
     CODE_LENGTH = 10
@@ -25,3 +26,34 @@ class InvitationManager(models.Manager):
             code = ''.join(random.choices(pool, k=self.CODE_LENGTH))
         kwargs['code'] = code
         return super(InvitationManager, self).create(**kwargs)
+
+    def usable(self, **filters):
+        """ Return the unused invitations that haven't expired. """
+        return self.filter(used=False, expires_at__gt=timezone.now(),
+                           **filters)
+
+    def delete_expired(self, chunk_size=5000, chunks=None):
+        """ Delete the unused invitations that expired.
+
+        Every chunk is deleted in its own short transaction, skipping the
+        rows locked by someone else and the circles being moved. Stops after
+        chunks chunks if given and returns the number of invitations
+        deleted. """
+        now = timezone.now()
+        deleted = 0
+        done = 0
+        while chunks is None or done < chunks:
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                pks = list(self.filter(
+                    used=False,
+                    expires_at__lte=now,
+                    circle__moving=False
+                ).order_by('expires_at').select_for_update(
+                    skip_locked=True, of=('self',)
+                ).values_list('pk', flat=True)[:chunk_size])
+                if not pks:
+                    break
+                self.filter(pk__in=pks, used=False).delete()
+            deleted += len(pks)
+            done += 1
+        return deleted
@@ -1,3 +1,4 @@
 from .circles import Circle
 from .membership import Membership
 from .invitations import Invitation
+from .stats import CircleDailyStats, MemberDailyStats, StatsWatermark
@@ -1,7 +1,7 @@
 """ Circle model. """
 
 # Django
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
 
 # Utilities
 from cride.utils.models import CrideModel
@@ -13,13 +13,14 @@ class Circle(CrideModel):
     A circle is a private group where rides are offered and taken by its
     members. To join a circle a user must receive an unique invitation
     code from an existing member. """
-    name = models.CharField('circle name', max_length=140)
+    name = models.CharField('circle name', max_length=140, db_index=True)
     slug_name = models.SlugField(unique=True, max_length=40)
 
     about = models.CharField('circle description', max_length=255)
     picture = models.ImageField(upload_to='circles/pictures',
                                 blank=True,
                                 null=True)
+    picture_variants = models.JSONField(default=dict, editable=False)
     members = models.ManyToManyField('users.User',
                                      through='circles.Membership',
                                      through_fields=('circle', 'user'))
@@ -48,6 +49,21 @@ class Circle(CrideModel):
                   'the number of members.'
     )
 
+    # Sharding
+    shard = models.CharField(
+        max_length=100,
+        default=DEFAULT_DB_ALIAS,
+        editable=False,
+        help_text='Database holding the circle memberships, invitations '
+                  'and rides.'
+    )
+    moving = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text='Set while the circle is moved to another shard, writes '
+                  'to its data are refused meanwhile.'
+    )
+
     def __str__(self):
         """ Return circle name. """
         return self.name
@@ -1,7 +1,9 @@
 """ Circle invitations models. """
 
 # Django
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # Utilities
 from cride.utils.models import CrideModel
@@ -10,13 +12,20 @@ from cride.utils.models import CrideModel
 from cride.circles.managers.invitations import InvitationManager
 
 
+def invitation_expiry():
+    """ Return the expiration date of an invitation issued now. """
+    return timezone.now() + settings.INVITATIONS_EXPIRE_AFTER
+
+
 class Invitation(CrideModel):
     """ Circle invitation.
 
     A circle invitation is a random text that acts as a unique code that grants
     access to a specific circle. This codes are generated by users that are
     already members of the circle and have a 'remaining_invitations' value
-    greater that 0. """
+    greater that 0. Unused codes expire at expires_at and are deleted by
+    the delete_expired_invitations task. """
+    id = models.BigAutoField(primary_key=True)
     code = models.CharField(max_length=50, unique=True)
     issue_by = models.ForeignKey(
         'users.User',
@@ -33,10 +42,23 @@ class Invitation(CrideModel):
     circle = models.ForeignKey('circles.Circle', on_delete=models.CASCADE)
     used = models.BooleanField(default=False)
     used_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(default=invitation_expiry)
 
     # Manager
     objects = InvitationManager()
 
+    class Meta(CrideModel.Meta):
+        """ Meta class. """
+        indexes = [
+            # Unused codes of a member and expired codes to delete.
+            models.Index(fields=['circle', 'issue_by'],
+                         condition=models.Q(used=False),
+                         name='circles_inv_unused_issuer'),
+            models.Index(fields=['expires_at'],
+                         condition=models.Q(used=False),
+                         name='circles_inv_unused_expiry'),
+        ]
+
     def __str__(self):
         """ Return code and circle. """
         return '#{}: {}'.format(self.circle.slug_name, self.code)
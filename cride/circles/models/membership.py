@@ -12,6 +12,7 @@ class Membership(CrideModel):
 
     A membership is the table that holds the relationship between
     a user and a circle. """
+    id = models.BigAutoField(primary_key=True)
     user = models.ForeignKey('users.User', on_delete=models.CASCADE)
     profile = models.ForeignKey('users.Profile', on_delete=models.CASCADE)
     circle = models.ForeignKey('circles.Circle', on_delete=models.CASCADE)
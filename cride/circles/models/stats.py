@@ -0,0 +1,60 @@
+""" Circle statistics models. """
+
+# Django
+from django.db import models
+
+
+class CircleDailyStats(models.Model):
+    """ Circle daily stats model.
+
+    Rides offered and seats taken in the rides of a circle departing on a
+    given local day, rolled up by the rollup_daily_stats task. """
+
+    circle = models.ForeignKey('circles.Circle',
+                               on_delete=models.CASCADE,
+                               related_name='daily_stats')
+    day = models.DateField()
+
+    rides_offered = models.PositiveIntegerField(default=0)
+    rides_taken = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """ Meta option. """
+        unique_together = ('circle', 'day')
+        ordering = ['day']
+
+
+class MemberDailyStats(models.Model):
+    """ Member daily stats model.
+
+    Rides offered and taken by a member in the rides of a circle departing
+    on a given local day. """
+
+    circle = models.ForeignKey('circles.Circle',
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    user = models.ForeignKey('users.User',
+                             on_delete=models.CASCADE,
+                             related_name='+')
+    day = models.DateField()
+
+    rides_offered = models.PositiveIntegerField(default=0)
+    rides_taken = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        """ Meta option. """
+        unique_together = ('circle', 'user', 'day')
+        ordering = ['day']
+
+
+class StatsWatermark(models.Model):
+    """ Stats watermark model.
+
+    Last day rolled up by a stats rollup. """
+
+    name = models.CharField(max_length=50, unique=True)
+    day = models.DateField()
+
+    def __str__(self):
+        """ Return rollup name and last day. """
+        return '{}: {}'.format(self.name, self.day)
@@ -1,2 +1,3 @@
 from .circles import *
 from .membership import *
+from .stats import *
@@ -6,8 +6,12 @@ from rest_framework import serializers
 # Models
 from cride.circles.models import Circle
 
+# Utilities
+from cride.utils.pictures import PictureModelSerializer
+from cride.utils.serializers import RowSerializer, RowField, PictureRowField
 
-class CircleModelSerializer(serializers.ModelSerializer):
+
+class CircleModelSerializer(PictureModelSerializer):
     """ Circle model serializer. """
     members_limit = serializers.IntegerField(
         required=False,
@@ -41,3 +45,22 @@ class CircleModelSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'If circle is limited, a member limit must be provided')
         return attrs
+
+
+class CircleRowSerializer(RowSerializer):
+    """ Circle row serializer, stands for CircleModelSerializer. """
+
+    model = Circle
+    key = 'slug_name'
+    fields = (
+        ('name', RowField()),
+        ('members_limit', RowField()),
+        ('slug_name', RowField()),
+        ('about', RowField()),
+        ('picture', PictureRowField()),
+        ('rides_offered', RowField()),
+        ('rides_taken', RowField()),
+        ('verified', RowField()),
+        ('is_public', RowField()),
+        ('is_limited', RowField()),
+    )
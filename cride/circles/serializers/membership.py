@@ -7,10 +7,17 @@ from django.utils import timezone
 from rest_framework import serializers
 
 # Serializers
-from cride.users.serializers import UserModelSerializer
+from cride.users.serializers import UserModelSerializer, UserRowSerializer
 
 # Models
 from cride.circles.models import Membership, Invitation
+from cride.events.models import OutboxEvent
+
+# Utilities
+from cride.events.outbox import record
+from cride.utils.serializers import (RowSerializer, RowField,
+                                     DateTimeRowField, StringRowField,
+                                     NestedRowField)
 
 
 class MembershipModelSerializer(serializers.ModelSerializer):
@@ -38,6 +45,23 @@ class MembershipModelSerializer(serializers.ModelSerializer):
         )
 
 
+class MembershipRowSerializer(RowSerializer):
+    """ Member row serializer, stands for MembershipModelSerializer. """
+
+    model = Membership
+    fields = (
+        ('user', NestedRowField(UserRowSerializer)),
+        ('is_admin', RowField()),
+        ('is_active', RowField()),
+        ('used_invitations', RowField()),
+        ('remaining_invitations', RowField()),
+        ('invited_by', StringRowField('invited_by', 'username')),
+        ('rides_taken', RowField()),
+        ('rides_offered', RowField()),
+        ('joined_at', DateTimeRowField('created')),
+    )
+
+
 class AddMemberSerializer(serializers.Serializer):
     """ Add member serializer.
 
@@ -58,12 +82,12 @@ class AddMemberSerializer(serializers.Serializer):
         return data
 
     def validate_invitation_code(self, data):
-        """ Verify code exists and that it is related to the circle. """
+        """ Verify code exists, is related to the circle and hasn't
+        expired. """
         try:
-            invitation = Invitation.objects.get(
+            invitation = Invitation.objects.usable().get(
                 code=data,
-                circle=self.context['circle'],
-                used=False
+                circle=self.context['circle']
             )
         except Invitation.DoesNotExist:
             raise serializers.ValidationError('Invalid invitation code.')
@@ -74,7 +98,8 @@ class AddMemberSerializer(serializers.Serializer):
         """ Verify circle is capable of accepting a new member. """
         circle = self.context['circle']
         if circle.is_limited and \
-            circle.members.count() >= circle.members_limit:
+            Membership.objects.filter(circle=circle).count() >= \
+            circle.members_limit:
             raise serializers.ValidationError('Circle has reached its member'
                                               'limit.')
         return attrs
@@ -94,11 +119,14 @@ class AddMemberSerializer(serializers.Serializer):
             invited_by=invitation.issue_by
         )
 
-        # Update Invitation
-        invitation.used_by = user
-        invitation.used = True
-        invitation.used_at = now
-        invitation.save()
+        # Update Invitation, unless it was used or deleted meanwhile
+        updated = Invitation.objects.filter(
+            pk=invitation.pk,
+            used=False
+        ).update(used_by=user, used=True, used_at=now, modified=now)
+        if not updated:
+            raise serializers.ValidationError(
+                {'invitation_code': 'Invalid invitation code.'})
 
         # Update issuer data
         issuer = Membership.objects.get(user=invitation.issue_by,
@@ -107,4 +135,8 @@ class AddMemberSerializer(serializers.Serializer):
         issuer.remaining_invitations -= 1
         issuer.save()
 
+        record(OutboxEvent.MEMBER_ADDED, circle, user=user.pk,
+               invited_by=invitation.issue_by_id)
+        record(OutboxEvent.INVITATION_USED, circle, invitation=invitation.pk,
+               user=user.pk, issued_by=invitation.issue_by_id)
         return member
@@ -0,0 +1,45 @@
+""" Circle statistics serializers. """
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Utilities
+from cride.circles.stats import daily_series, rolled_up_until
+from datetime import timedelta
+
+
+class DailyStatsQuerySerializer(serializers.Serializer):
+    """ Daily stats query serializer.
+
+    Defaults to the last 30 rolled up days. """
+
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+    MAX_DAYS = 366
+
+    def validate(self, data):
+        """ Verify the days range. """
+        until = data.get('until') or rolled_up_until()
+        if until is None:
+            raise serializers.ValidationError('No stats available yet.')
+        since = data.get('since') or until - timedelta(days=29)
+        if since > until:
+            raise serializers.ValidationError(
+                'The range must end after it starts.')
+        if (until - since).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                'The range cannot be longer than {} days.'.format(
+                    self.MAX_DAYS))
+        return {'since': since, 'until': until}
+
+    def series(self, queryset):
+        """ Return the response data of the stats queryset. """
+        since = self.validated_data['since']
+        until = self.validated_data['until']
+        return {
+            'since': since,
+            'until': until,
+            'rolled_up_until': rolled_up_until(),
+            'days': daily_series(queryset, since, until),
+        }
@@ -0,0 +1,157 @@
+""" Circle statistics rollups.
+
+Rides offered and taken are rolled up by circle, member and local day of
+departure into CircleDailyStats and MemberDailyStats. Only closed days are
+rolled up (rides can't be joined or left once they depart), continuing from
+the last rolled up day, so every ride is aggregated once. Archived rides and
+rides of every shard are read as well, rides are counted once even if they
+are archived or moved meanwhile. """
+
+# Django
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+# Models
+from cride.circles.models import (CircleDailyStats, MemberDailyStats,
+                                  StatsWatermark)
+
+# Utilities
+from cride.rides.archive import RIDE_MODELS
+from cride.rides.exports import local_day_range
+from cride.utils.shards import each_shard
+from datetime import timedelta
+from typing import Dict, List, Set
+
+
+ROLLUP = 'daily_stats'
+DAY = timedelta(days=1)
+
+
+def rides_by_day(model, after, before, seen_rides, seen_passengers):
+    """ Yield (circle, user, day, offered, taken) counts of the rides of
+    model departing in [after, before).
+
+    Rides in seen_rides and the passengers of the rides in seen_passengers
+    were already counted from another table and are skipped, both sets are
+    updated: a ride archived between the reads of the rides table and the
+    archive is only counted once. """
+    rides = model.objects.filter(
+        departure_date__gte=after,
+        departure_date__lt=before,
+        offered_in__isnull=False
+    ).annotate(
+        day=TruncDate('departure_date')
+    ).values_list('pk', 'offered_in', 'offered_by', 'day').order_by()
+    counted = set()
+    for pk, circle, user, day in rides.iterator():
+        if pk not in seen_rides:
+            counted.add(pk)
+            yield circle, user, day, 1, 0
+    seen_rides |= counted
+
+    ride = model.passenger.field.m2m_field_name()
+    passengers = model.passenger.through.objects.filter(**{
+        ride + '__departure_date__gte': after,
+        ride + '__departure_date__lt': before,
+        ride + '__offered_in__isnull': False,
+    }).annotate(
+        day=TruncDate(ride + '__departure_date')
+    ).values_list(ride, ride + '__offered_in', 'user', 'day').order_by()
+    counted = set()
+    for pk, circle, user, day in passengers.iterator():
+        if pk not in seen_passengers:
+            counted.add(pk)
+            yield circle, user, day, 0, 1
+    seen_passengers |= counted
+
+
+def rollup_days(start, end):
+    """ Roll up the days from start to end (excluded). """
+    after, before = local_day_range(start, end - DAY)
+    circles: Dict[tuple, List[int]] = {}
+    members: Dict[tuple, List[int]] = {}
+    seen_rides: Set[int] = set()
+    seen_passengers: Set[int] = set()
+    for model in RIDE_MODELS:
+        for _ in each_shard():
+            for circle, user, day, offered, taken in rides_by_day(
+                    model, after, before, seen_rides, seen_passengers):
+                stats = circles.setdefault((circle, day), [0, 0])
+                stats[0] += offered
+                stats[1] += taken
+                if user is not None:
+                    stats = members.setdefault((circle, user, day), [0, 0])
+                    stats[0] += offered
+                    stats[1] += taken
+
+    with transaction.atomic():
+        watermark = StatsWatermark.objects.select_for_update().filter(
+            name=ROLLUP).first()
+        if watermark is not None and watermark.day >= start:
+            # Rolled up by a concurrent run.
+            return
+        CircleDailyStats.objects.bulk_create([
+            CircleDailyStats(circle_id=circle, day=day,
+                             rides_offered=offered, rides_taken=taken)
+            for (circle, day), (offered, taken) in circles.items()
+        ])
+        MemberDailyStats.objects.bulk_create([
+            MemberDailyStats(circle_id=circle, user_id=user, day=day,
+                             rides_offered=offered, rides_taken=taken)
+            for (circle, user, day), (offered, taken) in members.items()
+        ])
+        StatsWatermark.objects.update_or_create(
+            name=ROLLUP, defaults={'day': end - DAY})
+
+
+def first_day():
+    """ Return the local day of the first ride departure, if any. """
+    dates = [model.objects.aggregate(first=Min('departure_date'))['first']
+             for model in RIDE_MODELS for _ in each_shard()]
+    dates = [date for date in dates if date is not None]
+    if not dates:
+        return None
+    return timezone.localdate(min(dates))
+
+
+def rolled_up_until():
+    """ Return the last rolled up day, None before the first rollup. """
+    return StatsWatermark.objects.filter(name=ROLLUP).values_list(
+        'day', flat=True).first()
+
+
+def rollup_daily_stats(until=None, chunk_days=7):
+    """ Roll up the closed days after the watermark, chunk_days per
+    transaction, and return the number of days rolled up.
+
+    until is the first day left out, today by default. """
+    until = until or timezone.localdate()
+    watermark = rolled_up_until()
+    start = watermark + DAY if watermark else first_day()
+    if start is None:
+        return 0
+    days = 0
+    while start < until:
+        end = min(start + timedelta(days=chunk_days), until)
+        rollup_days(start, end)
+        days += (end - start).days
+        start = end
+    return days
+
+
+def daily_series(queryset, since, until):
+    """ Return the day by day rides of a stats queryset from since to until
+    included, days without rides are zero filled. """
+    stats = {day: (offered, taken) for day, offered, taken in
+             queryset.filter(day__gte=since, day__lte=until).values_list(
+                 'day', 'rides_offered', 'rides_taken')}
+    series = []
+    day = since
+    while day <= until:
+        offered, taken = stats.get(day, (0, 0))
+        series.append({'day': day, 'rides_offered': offered,
+                       'rides_taken': taken})
+        day += DAY
+    return series
@@ -0,0 +1,77 @@
+""" Circle admin tests. """
+
+# Django
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.test import TestCase
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import Ride
+from cride.users.models import User
+
+# Utilities
+from datetime import timedelta
+import csv
+
+
+class RidesExportTestCase(TestCase):
+    """ Circle admin rides export test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.admin = User.objects.create_superuser(
+            email='admin@comparteride.com',
+            username='admin',
+            password='admin1234',
+            first_name='Nicolas',
+            last_name='Catalano'
+        )
+        self.client.force_login(self.admin)
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        now = timezone.localtime()
+        for days in (-40, -3, 0, 2):
+            ride = Ride.objects.create(
+                offered_by=self.admin,
+                offered_in=self.circle,
+                departure_location='Ciudad Universitaria',
+                departure_date=now + timedelta(days=days),
+                arrival_location='Centro',
+                arrival_date=now + timedelta(days=days, hours=1),
+            )
+            ride.passenger.add(self.admin)
+        self.url = '/admin/circles/circle/'
+
+    def export(self, **data):
+        data.update({
+            'action': 'download_rides',
+            ACTION_CHECKBOX_NAME: [self.circle.pk],
+        })
+        return self.client.post(self.url, data)
+
+    def test_date_range(self):
+        """ Only rides of the range are streamed, with passenger counts. """
+        today = timezone.localdate()
+        response = self.export(start=today - timedelta(days=5),
+                               end=today, apply='Download')
+        self.assertTrue(response.streaming)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0][:2], ['id', 'passenger'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row[1] for row in rows[1:]], ['1', '1'])
+
+    def test_form(self):
+        """ The date range is asked first and validated. """
+        response = self.export()
+        self.assertContains(response, 'name="start"')
+
+        today = timezone.localdate()
+        response = self.export(start=today, end=today - timedelta(days=1),
+                               apply='Download')
+        self.assertContains(response, 'Start date must be before')
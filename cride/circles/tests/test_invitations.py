@@ -2,6 +2,7 @@
 
 # Django
 from django.test import TestCase
+from django.utils import timezone
 
 # Django REST Framework
 from rest_framework.test import APITestCase
@@ -15,6 +16,9 @@ from rest_framework.authtoken.models import Token
 # Manager
 from cride.circles.managers import InvitationManager
 
+# Utilities
+from datetime import timedelta
+
 
 class InvitationsManagerTestCase(TestCase):
     """ Invitations manager test case. """
@@ -134,3 +138,81 @@ class MemberInvitationsAPITestCase(APITestCase):
         self.assertEqual(invitations.count(), self.membership.remaining_invitations)
         for inv in invitations:
             self.assertIn(inv.code, request.data['invitations'])
+
+
+class InvitationExpiryTestCase(APITestCase):
+    """ Invitation expiry test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.issuer = User.objects.create(
+            first_name='Nicolas',
+            last_name='Catalano',
+            email='nec.catalano@gmail.com',
+            username='nicolasCatalano',
+            password='nico1234'
+        )
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+            verified=True
+        )
+        self.membership = Membership.objects.create(
+            user=self.issuer,
+            profile=Profile.objects.create(user=self.issuer),
+            circle=self.circle,
+            remaining_invitations=3
+        )
+        self.expired = timezone.now() - timedelta(minutes=1)
+
+    def test_expired_code(self):
+        """ Expired codes don't grant access to the circle. """
+        user = User.objects.create(
+            first_name='Ana',
+            last_name='Diaz',
+            email='ana@example.com',
+            username='anaDiaz',
+            password='ana12345'
+        )
+        Profile.objects.create(user=user)
+        invitation = Invitation.objects.create(issue_by=self.issuer,
+                                               circle=self.circle,
+                                               expires_at=self.expired)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=user).key))
+        request = self.client.post(
+            '/circles/{}/members/'.format(self.circle.slug_name),
+            {'invitation_code': invitation.code})
+        self.assertEqual(request.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Membership.objects.filter(user=user).exists())
+
+    def test_expired_codes_replaced(self):
+        """ Members get new codes in place of the expired ones. """
+        expired = Invitation.objects.create(issue_by=self.issuer,
+                                            circle=self.circle,
+                                            expires_at=self.expired)
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            Token.objects.create(user=self.issuer).key))
+        request = self.client.get('/circles/{}/members/{}/invitations/'.format(
+            self.circle.slug_name, self.issuer.username))
+        self.assertEqual(len(request.data['invitations']), 3)
+        self.assertNotIn(expired.code, request.data['invitations'])
+
+    def test_delete_expired(self):
+        """ Expired unused codes are deleted in chunks, used ones kept. """
+        for _ in range(5):
+            Invitation.objects.create(issue_by=self.issuer,
+                                      circle=self.circle,
+                                      expires_at=self.expired)
+        used = Invitation.objects.create(issue_by=self.issuer,
+                                         circle=self.circle,
+                                         used=True,
+                                         expires_at=self.expired)
+        valid = Invitation.objects.create(issue_by=self.issuer,
+                                          circle=self.circle)
+
+        self.assertEqual(Invitation.objects.delete_expired(chunk_size=2,
+                                                           chunks=2), 4)
+        self.assertEqual(Invitation.objects.delete_expired(chunk_size=2), 1)
+        self.assertEqual(set(Invitation.objects.all()), {used, valid})
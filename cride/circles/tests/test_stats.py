@@ -0,0 +1,150 @@
+""" Circle statistics tests. """
+
+# Django
+from django.test import TestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import (Circle, CircleDailyStats, Membership,
+                                  MemberDailyStats)
+from cride.rides.models import Ride
+from cride.users.models import User
+
+# Utilities
+from cride.circles.stats import (first_day, rides_by_day,
+                                 rollup_daily_stats, rolled_up_until)
+from cride.rides.archive import RIDE_MODELS, archive_rides
+from cride.utils.fixtures import FixtureLoader
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+
+class DailyStatsTestCase(TestCase):
+    """ Daily stats rollup test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=60, circles=3, rides=300, passenger_ratio=0.8,
+                      history_days=40, future_days=5).load()
+        archive_rides(timezone.now() - timedelta(days=20))
+        self.today = timezone.localdate()
+
+    def expected(self):
+        """ Return the circle and member stats from the raw rides. """
+        circles: Counter = Counter()
+        members: Counter = Counter()
+        for model in RIDE_MODELS:
+            for ride in model.objects.prefetch_related('passenger'):
+                day = timezone.localdate(ride.departure_date)
+                if day >= self.today:
+                    continue
+                circle = ride.offered_in_id
+                circles[(circle, day, 'offered')] += 1
+                members[(circle, ride.offered_by_id, day, 'offered')] += 1
+                for user in ride.passenger.all():
+                    circles[(circle, day, 'taken')] += 1
+                    members[(circle, user.pk, day, 'taken')] += 1
+        return circles, members
+
+    def rolled_up(self):
+        circles: Counter = Counter()
+        members: Counter = Counter()
+        for stats in CircleDailyStats.objects.all():
+            day = (stats.circle_id, stats.day)
+            circles[day + ('offered',)] += stats.rides_offered
+            circles[day + ('taken',)] += stats.rides_taken
+        for stats in MemberDailyStats.objects.all():
+            member_day = (stats.circle_id, stats.user_id, stats.day)
+            members[member_day + ('offered',)] += stats.rides_offered
+            members[member_day + ('taken',)] += stats.rides_taken
+        return +circles, +members
+
+    def test_rollup(self):
+        """ Closed days are rolled up from rides and archived rides. """
+        days = (self.today - first_day()).days
+        self.assertEqual(rollup_daily_stats(), days)
+        self.assertEqual(self.rolled_up(), self.expected())
+        self.assertEqual(rolled_up_until(), self.today - timedelta(days=1))
+        self.assertEqual(rollup_daily_stats(), 0)
+
+    def test_incremental(self):
+        """ Rollups continue from the watermark. """
+        rollup_daily_stats(until=self.today - timedelta(days=10),
+                           chunk_days=3)
+        rows = CircleDailyStats.objects.count()
+        self.assertEqual(rollup_daily_stats(), 10)
+        self.assertGreater(CircleDailyStats.objects.count(), rows)
+        self.assertEqual(self.rolled_up(), self.expected())
+
+    def test_rides_archived_during_rollup(self):
+        """ Rides archived between the reads of the rides table and the
+        archive are counted once. """
+        def archive_after_rides(model, *args):
+            yield from rides_by_day(model, *args)
+            if model is Ride:
+                archive_rides(timezone.now())
+
+        with mock.patch('cride.circles.stats.rides_by_day',
+                        archive_after_rides):
+            rollup_daily_stats(chunk_days=100)
+        self.assertFalse(Ride.objects.filter(
+            departure_date__lt=timezone.now() - timedelta(days=1)).exists())
+        self.assertEqual(self.rolled_up(), self.expected())
+
+
+class StatsEndpointTestCase(TestCase):
+    """ Stats endpoints test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=30, circles=2, rides=100, history_days=20,
+                      future_days=0).load()
+        rollup_daily_stats()
+        self.circle = Circle.objects.first()
+        self.member = Membership.objects.filter(circle=self.circle).first()
+        self.client = self.client_for(self.member.user)
+        self.url = '/circles/{}/stats/'.format(self.circle.slug_name)
+
+    def client_for(self, user):
+        token = Token.objects.create(user=user).key
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+        return client
+
+    def test_circle_stats(self):
+        """ Members get a zero filled day series. """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        days = response.data['days']
+        self.assertEqual(len(days), 30)
+        self.assertEqual(days[-1]['day'], rolled_up_until())
+        self.assertEqual(
+            sum(day['rides_offered'] for day in days),
+            sum(CircleDailyStats.objects.filter(
+                circle=self.circle).values_list('rides_offered', flat=True))
+        )
+
+        response = self.client.get(self.url, {'since': '2020-01-10',
+                                              'until': '2020-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_member_stats(self):
+        """ Member series only count the member rides. """
+        url = '/circles/{}/members/{}/stats/'.format(
+            self.circle.slug_name, self.member.user.username)
+        since = rolled_up_until() - timedelta(days=6)
+        response = self.client.get(url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['days']), 7)
+
+    def test_not_member(self):
+        """ Circle stats are only available to its members. """
+        members = Membership.objects.filter(circle=self.circle)
+        user = User.objects.exclude(membership__in=members).first()
+        response = self.client_for(user).get(self.url)
+        self.assertEqual(response.status_code, 403)
@@ -1,7 +1,8 @@
 """ Circles URLs. """
 
 # Django
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 
 # Django REST Framework
 from rest_framework.routers import DefaultRouter
@@ -9,6 +10,7 @@ from rest_framework.routers import DefaultRouter
 # Views
 from .views import circles as circle_view
 from .views import membership as membership_views
+from .views import feed as feed_views
 
 router = DefaultRouter()
 router.register(r'circles', circle_view.CircleViewSet, basename='circle')
@@ -18,6 +20,18 @@ router.register(
     basename='membership'
 )
 
-urlpatterns = [
+urlpatterns = []
+
+if settings.ASYNC_VIEWS:
+    urlpatterns += [
+        re_path(r'^circles/(?P<slug_name>[^/.]+)/$',
+                feed_views.circle_detail,
+                name='circle-detail'),
+        re_path(r'^circles/(?P<slug_name>[-a-zA-Z0-9_]+)/members/$',
+                feed_views.member_list,
+                name='membership-list'),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
 ]
@@ -1,7 +1,13 @@
 """ Circle views. """
 
+# Django
+from django.db import DEFAULT_DB_ALIAS, transaction
+
 # Django REST Framework
 from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
 # Permissions
 from rest_framework.permissions import IsAuthenticated
@@ -12,21 +18,35 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 
 # Serializers
-from cride.circles.serializers import CircleModelSerializer
+from cride.circles.serializers import (CircleModelSerializer,
+                                       CircleRowSerializer,
+                                       DailyStatsQuerySerializer)
 
 # Models
-from cride.circles.models import Circle, Membership
+from cride.circles.models import Circle, CircleDailyStats, Membership
+
+# Utilities
+from cride.circles.views.mixins import CircleShardMixin
+from cride.utils.db import ReplicaReadMixin
+from cride.utils.shards import pick_shard, use_shard
+from cride.utils.views import BatchRetrieveMixin, RowListModelMixin
+import functools
 
 
-class CircleViewSet(mixins.CreateModelMixin,
+class CircleViewSet(CircleShardMixin,
+                    ReplicaReadMixin,
+                    BatchRetrieveMixin,
+                    mixins.CreateModelMixin,
                     mixins.RetrieveModelMixin,
                     mixins.UpdateModelMixin,
-                    mixins.ListModelMixin,
+                    RowListModelMixin,
                     viewsets.GenericViewSet):
     """ Circle view set. """
 
     serializer_class = CircleModelSerializer
+    row_serializer_class = CircleRowSerializer
     lookup_field = 'slug_name'
+    batch_param = 'slugs'
 
     # Filters
     filter_backends = (SearchFilter, OrderingFilter, DjangoFilterBackend)
@@ -51,15 +71,35 @@ class CircleViewSet(mixins.CreateModelMixin,
         return [permission() for permission in permissions]
 
     def perform_create(self, serializer):
-        """ Assign circle admin. """
-        circle = serializer.save()
-        user = self.request.user
-        profile = user.profile
-
-        Membership.objects.create(
-            user=user,
-            profile=profile,
-            circle=circle,
-            is_admin=True,
-            remaining_invitations=10
-        )
+        """ Assign circle admin.
+
+        New circles go to the shard holding the fewest circles. The admin
+        membership is written there once the circle is committed and
+        copied to it. """
+        circle = serializer.save(shard=pick_shard())
+        transaction.on_commit(functools.partial(
+            self.add_admin, circle, self.request.user), using=DEFAULT_DB_ALIAS)
+
+    def add_admin(self, circle, user):
+        """ Make user the admin of a new circle. """
+        with use_shard(circle.shard):
+            Membership.objects.create(
+                user=user,
+                profile=user.profile,
+                circle=circle,
+                is_admin=True,
+                remaining_invitations=10
+            )
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """ Return the circle rides per day, only for its members. """
+        circle = self.get_object()
+        if not Membership.objects.filter(user=request.user, circle=circle,
+                                         is_active=True).exists():
+            raise PermissionDenied(
+                'You are not an active member of the circle.')
+        serializer = DailyStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.series(
+            CircleDailyStats.objects.filter(circle=circle)))
@@ -0,0 +1,56 @@
+""" Circles async views. """
+
+# Django REST Framework
+from rest_framework.generics import get_object_or_404
+
+# Views
+from cride.circles.views.circles import CircleViewSet
+from cride.circles.views.membership import MembershipViewSet
+
+# Models
+from cride.circles.models import Circle
+
+# Utilities
+from cride.utils.asyncviews import (async_safe_methods, authenticate,
+                                    database_sync_to_async, render,
+                                    viewset_action)
+from cride.utils.shards import use_shard
+
+
+def retrieve_circle(request, user, slug_name):
+    """ Return the circle details. """
+    return viewset_action(CircleViewSet, 'retrieve', request, user,
+                          {'slug_name': slug_name})
+
+
+def list_members(request, user, slug_name):
+    """ Return the circle's active members page. """
+    circle = get_object_or_404(Circle, slug_name=slug_name)
+    with use_shard(circle.shard):
+        return viewset_action(MembershipViewSet, 'list', request, user,
+                              {'slug_name': slug_name}, circle=circle)
+
+
+@async_safe_methods(CircleViewSet.as_view({
+    'get': 'retrieve',
+    'put': 'update',
+    'patch': 'partial_update'
+}))
+async def circle_detail(request, slug_name):
+    """ Retrieve a circle. """
+    user = await authenticate(request)
+    data = await database_sync_to_async(retrieve_circle)(request, user,
+                                                         slug_name)
+    return render(data)
+
+
+@async_safe_methods(MembershipViewSet.as_view({
+    'get': 'list',
+    'post': 'create'
+}))
+async def member_list(request, slug_name):
+    """ List the circle's active members. """
+    user = await authenticate(request)
+    data = await database_sync_to_async(list_members)(request, user,
+                                                      slug_name)
+    return render(data)
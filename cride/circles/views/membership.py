@@ -14,14 +14,25 @@ from cride.circles.permissions.memberships import (IsActiveCircleMember,
                                                    IsSelfMember)
 
 # Models
-from cride.circles.models import Circle, Membership, Invitation
+from cride.circles.models import Membership, Invitation, MemberDailyStats
+from cride.events.models import OutboxEvent
 
 # Serializer
 from cride.circles.serializers import (MembershipModelSerializer,
-                                       AddMemberSerializer)
+                                       MembershipRowSerializer,
+                                       AddMemberSerializer,
+                                       DailyStatsQuerySerializer)
 
+# Utilities
+from cride.circles.views.mixins import CircleShardMixin
+from cride.events.outbox import record
+from cride.utils.db import ReplicaReadMixin
+from cride.utils.views import RowListModelMixin
 
-class MembershipViewSet(mixins.ListModelMixin,
+
+class MembershipViewSet(CircleShardMixin,
+                        ReplicaReadMixin,
+                        RowListModelMixin,
                         mixins.RetrieveModelMixin,
                         mixins.CreateModelMixin,
                         mixins.DestroyModelMixin,
@@ -29,14 +40,7 @@ class MembershipViewSet(mixins.ListModelMixin,
     """ Circle membership view set. """
 
     serializer_class = MembershipModelSerializer
-
-    def dispatch(self, request, *args, **kwargs):
-        """ Verify that the circle exists. """
-        slug_name = kwargs['slug_name']
-        self.circle = get_object_or_404(Circle, slug_name=slug_name)
-        return super(MembershipViewSet, self).dispatch(request,
-                                                       *args,
-                                                       **kwargs)
+    row_serializer_class = MembershipRowSerializer
 
     def get_permissions(self):
         """ Assign permissions based on action. """
@@ -69,6 +73,7 @@ class MembershipViewSet(mixins.ListModelMixin,
         """ Disable membership. """
         instance.is_active = False
         instance.save()
+        record(OutboxEvent.MEMBER_REMOVED, self.circle, user=instance.user_id)
 
     @action(detail=True, methods=['get'])
     def invitations(self, request, *args, **kwargs):
@@ -76,7 +81,8 @@ class MembershipViewSet(mixins.ListModelMixin,
 
         Will return a list containing all the members that have used it's
         invitations and another list containing the invitations that
-        haven't begin used yet. """
+        haven't begin used yet. Expired invitations are replaced by new
+        ones. """
         member = self.get_object()
         invited_members = Membership.objects.filter(
             circle=self.circle,
@@ -84,10 +90,9 @@ class MembershipViewSet(mixins.ListModelMixin,
             is_active=True
         )
 
-        unused_invitations = Invitation.objects.filter(
+        unused_invitations = Invitation.objects.usable(
             circle=self.circle,
-            issue_by=request.user,
-            used=False
+            issue_by=request.user
         ).values_list('code')
         diff = member.remaining_invitations - len(unused_invitations)
 
@@ -107,6 +112,15 @@ class MembershipViewSet(mixins.ListModelMixin,
         }
         return Response(data)
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """ Return the rides per day of a member in the circle. """
+        member = self.get_object()
+        serializer = DailyStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.series(MemberDailyStats.objects.filter(
+            circle=self.circle, user=member.user_id)))
+
     def create(self, request, *args, **kwargs):
         """ Handle member creation form invitation code. """
         serializer = AddMemberSerializer(
@@ -0,0 +1,66 @@
+""" Circle views mixins. """
+
+# Django
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Django REST Framework
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.generics import get_object_or_404
+
+# Models
+from cride.circles.models import Circle
+
+# Utilities
+from cride.utils.db import SAFE_METHODS
+from cride.utils.shards import pin_shard, shard_routed
+from cride.utils.views import ViewSetMixin
+
+
+class CircleMoving(APIException):
+    """ The circle is being moved to another shard. """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The circle is being moved, try again in a moment.'
+    default_code = 'circle_moving'
+
+
+class CircleShardMixin(ViewSetMixin):
+    """ Viewset mixin routing the requests of a circle URL to its shard.
+
+    The circle of the slug_name URL argument is set as the view's circle.
+    Its data is read from its shard and, for unsafe methods, written in a
+    transaction on it, rolled back if the response is an error. Writes
+    are refused while the circle is moved. Views without a slug_name
+    argument (lists, creation) aren't routed. Must come before
+    ReplicaReadMixin. """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return shard_routed(super().as_view(*args, **kwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        """ Verify that the circle exists. """
+        if 'slug_name' not in kwargs:
+            return super(CircleShardMixin, self).dispatch(request, *args,
+                                                          **kwargs)
+        self.circle = get_object_or_404(Circle,
+                                        slug_name=kwargs['slug_name'])
+        pin_shard(self.circle.shard)
+        if request.method in SAFE_METHODS or \
+                self.circle.shard == DEFAULT_DB_ALIAS:
+            return super(CircleShardMixin, self).dispatch(request, *args,
+                                                          **kwargs)
+        with transaction.atomic(using=self.circle.shard):
+            response = super(CircleShardMixin, self).dispatch(request, *args,
+                                                              **kwargs)
+            if getattr(response, 'exception', False):
+                transaction.set_rollback(True, using=self.circle.shard)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        """ Refuse writes to a circle being moved. """
+        super(CircleShardMixin, self).initial(request, *args, **kwargs)
+        circle = getattr(self, 'circle', None)
+        if circle is not None and circle.moving and \
+                request.method not in SAFE_METHODS:
+            raise CircleMoving()
@@ -0,0 +1,10 @@
+""" Events app. """
+
+# Django
+from django.apps import AppConfig
+
+
+class EventsAppConfig(AppConfig):
+    """ Events app config. """
+    name = 'cride.events'
+    verbose_name = 'Events'
@@ -0,0 +1,121 @@
+""" Outbox event consumers.
+
+Every consumer gets the batches of events published by the relay and
+handles them in a transaction on the default database, recording the
+events it handled in it. Events delivered again are skipped, and two
+workers handling the same batch at once conflict on the recorded events,
+so the loser's task is retried and finds them handled. """
+
+# Django
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+
+# Models
+from cride.circles.models import Circle
+from cride.events.models import OutboxEvent, ProcessedEvent
+from cride.users.models import Profile
+
+# Tasks
+from cride.taskapp.dispatch import send_task
+
+# Utilities
+from cride.rides.live import publish
+from cride.utils.shards import replicate
+from collections import Counter
+from typing import Dict
+import functools
+
+
+def count_rides(events):
+    """ Update the rides counters of the profiles and circles.
+
+    Deltas are added up per row, so a batch makes one UPDATE per profile
+    and circle instead of one per event. """
+    profiles: Dict[int, Counter] = {}
+    circles: Dict[int, Counter] = {}
+    for event in events:
+        payload = event['payload']
+        if event['name'] == OutboxEvent.RIDE_CREATED:
+            field, delta = 'rides_offered', 1
+        elif event['name'] == OutboxEvent.RIDE_JOINED:
+            field, delta = 'rides_taken', 1
+        elif event['name'] == OutboxEvent.RIDE_LEFT:
+            field, delta = 'rides_taken', -1
+        else:
+            continue
+        profiles.setdefault(payload['user'], Counter())[field] += delta
+        circles.setdefault(event['circle'], Counter())[field] += delta
+
+    for model, lookup, deltas in ((Profile, 'user', profiles),
+                                  (Circle, 'pk', circles)):
+        for pk, fields in deltas.items():
+            updates = {field: F(field) + delta
+                       for field, delta in fields.items() if delta}
+            if updates:
+                model.objects.filter(**{lookup: pk}).update(**updates)
+    replicate(Profile, Profile.objects.filter(
+        user__in=profiles).values_list('pk', flat=True))
+    replicate(Circle, circles)
+
+
+def notify(events):
+    """ Queue the new ride and waitlist promotion notifications. """
+    for event in events:
+        payload = event['payload']
+        if event['name'] == OutboxEvent.RIDE_CREATED:
+            transaction.on_commit(functools.partial(
+                send_task, 'notify_new_ride', payload['ride'],
+                event['circle']))
+        elif event['name'] == OutboxEvent.RIDE_JOINED and \
+                payload.get('promoted'):
+            transaction.on_commit(functools.partial(
+                send_task, 'notify_waitlist_promotion', payload['ride'],
+                payload['user'], event['circle']))
+
+
+# Events pushed to the live ride feed, and the payload fields sent.
+LIVE_EVENTS = {
+    OutboxEvent.RIDE_CREATED: ('ride', 'available_seats'),
+    OutboxEvent.RIDE_JOINED: ('ride', 'available_seats'),
+    OutboxEvent.RIDE_LEFT: ('ride', 'available_seats'),
+    OutboxEvent.RIDE_EXPIRED: ('ride',),
+}
+
+
+def push_live(events):
+    """ Push the ride events to the live feed of their circle. """
+    for event in events:
+        fields = LIVE_EVENTS.get(event['name'])
+        if fields is None:
+            continue
+        data = {field: event['payload'].get(field) for field in fields}
+        transaction.on_commit(functools.partial(
+            publish, event['circle'], event['id'], event['name'], data))
+
+
+# Consumers by name, the name is recorded with the events they handled.
+CONSUMERS = {
+    'counters': count_rides,
+    'notifications': notify,
+    'live': push_live,
+}
+
+
+def handle_events(events):
+    """ Run every consumer on a batch of events, skipping the events it
+    already handled. Return the number of events handled per consumer. """
+    handled = {}
+    for consumer, handler in CONSUMERS.items():
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            done = set(ProcessedEvent.objects.filter(
+                consumer=consumer,
+                event_id__in=[event['id'] for event in events]
+            ).values_list('event_id', flat=True))
+            pending = [event for event in events if event['id'] not in done]
+            ProcessedEvent.objects.bulk_create([
+                ProcessedEvent(consumer=consumer, event_id=event['id'])
+                for event in pending
+            ])
+            handler(pending)
+        handled[consumer] = len(pending)
+    return handled
@@ -0,0 +1 @@
+from .outbox import OutboxEvent, ProcessedEvent
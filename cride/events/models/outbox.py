@@ -0,0 +1,69 @@
+""" Outbox models. """
+
+# Django
+from django.db import models
+
+
+class OutboxEvent(models.Model):
+    """ Outbox event model.
+
+    A ride or membership change of a circle, written in the transaction
+    making it and published afterwards by the outbox relay. """
+
+    RIDE_CREATED = 'ride_created'
+    RIDE_JOINED = 'ride_joined'
+    RIDE_LEFT = 'ride_left'
+    RIDE_EXPIRED = 'ride_expired'
+    MEMBER_ADDED = 'member_added'
+    MEMBER_REMOVED = 'member_removed'
+    INVITATION_USED = 'invitation_used'
+    NAMES = (
+        (RIDE_CREATED, 'Ride created'),
+        (RIDE_JOINED, 'Ride joined'),
+        (RIDE_LEFT, 'Ride left'),
+        (RIDE_EXPIRED, 'Ride expired'),
+        (MEMBER_ADDED, 'Member added'),
+        (MEMBER_REMOVED, 'Member removed'),
+        (INVITATION_USED, 'Invitation used'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    circle = models.ForeignKey('circles.Circle',
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    name = models.CharField(max_length=20, choices=NAMES)
+    payload = models.JSONField(default=dict)
+    created = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """ Meta option. """
+        indexes = [
+            # The relay only reads the unpublished events.
+            models.Index(fields=['id'], name='outbox_unpublished',
+                         condition=models.Q(published_at__isnull=True)),
+        ]
+
+    def as_message(self):
+        """ Return the event as sent to the consumers. """
+        return {
+            'id': self.pk,
+            'name': self.name,
+            'circle': self.circle_id,
+            'payload': self.payload,
+        }
+
+
+class ProcessedEvent(models.Model):
+    """ Processed event model.
+
+    An outbox event already handled by a consumer. Written in the
+    transaction of the consumer, so events delivered twice are skipped. """
+
+    consumer = models.CharField(max_length=30)
+    event_id = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """ Meta option. """
+        unique_together = ('consumer', 'event_id')
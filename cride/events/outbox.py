@@ -0,0 +1,69 @@
+""" Transactional outbox.
+
+Ride and membership changes record an event in the outbox table of their
+circle shard, in the transaction making them, instead of updating the
+counters of other tables or queueing tasks right away. The relay reads the
+unpublished events of every shard in primary key order and publishes them
+in batches, a handle_events task per batch, marking them as published in
+the same transaction. An event is published again if the relay dies before
+committing, and consumers record the events they handle (see
+cride.events.consumers), so each one takes effect once. """
+
+# Django
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+# Models
+from cride.events.models import OutboxEvent, ProcessedEvent
+
+# Tasks
+from cride.taskapp.dispatch import send_task
+
+# Utilities
+from cride.utils.shards import each_shard
+
+
+def record(name, circle, **payload):
+    """ Write an event of the circle to the outbox, in the current
+    transaction. The payload must be JSON serializable. """
+    return OutboxEvent.objects.create(name=name, circle_id=getattr(
+        circle, 'pk', circle), payload=payload)
+
+
+def relay_events(batch_size=None):
+    """ Publish a batch of unpublished events of every shard, return the
+    number of events published.
+
+    Events are locked skipping the ones locked by another relay, so
+    several relays can run at once. Events of circles being moved to
+    another shard are published from it afterwards. """
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    published = 0
+    for _ in each_shard():
+        with transaction.atomic(using=router.db_for_write(OutboxEvent)):
+            events = list(OutboxEvent.objects.select_for_update(
+                skip_locked=True, of=('self',)
+            ).filter(
+                published_at__isnull=True,
+                circle__moving=False
+            ).order_by('pk')[:batch_size])
+            if not events:
+                continue
+            send_task('handle_events',
+                      [event.as_message() for event in events])
+            OutboxEvent.objects.filter(
+                pk__in=[event.pk for event in events]
+            ).update(published_at=timezone.now())
+            published += len(events)
+    return published
+
+
+def purge_events():
+    """ Delete the events published and processed OUTBOX_RETENTION ago,
+    return the number of rows deleted. """
+    before = timezone.now() - settings.OUTBOX_RETENTION
+    deleted = sum(OutboxEvent.objects.filter(
+        published_at__lt=before).delete()[0] for _ in each_shard())
+    deleted += ProcessedEvent.objects.filter(created__lt=before).delete()[0]
+    return deleted
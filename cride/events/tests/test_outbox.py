@@ -0,0 +1,146 @@
+""" Transactional outbox tests. """
+
+# Django
+from django.core import mail
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Invitation, Membership
+from cride.events.models import OutboxEvent, ProcessedEvent
+from cride.notifications.models import NotificationPreference
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Tasks
+from cride.taskapp.tasks import handle_events, purge_outbox
+
+# Utilities
+from cride.events.outbox import relay_events
+from datetime import timedelta
+
+
+class OutboxTestCase(TransactionTestCase):
+    """ Transactional outbox test case.
+
+    Consumers queue their tasks once their transaction commits. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+            is_limited=False
+        )
+        self.users = {}
+        for name in ('driver', 'ana', 'juan'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Profile.objects.create(user=user)
+            self.users[name] = user
+            if name != 'juan':
+                Membership.objects.create(user=user, profile=user.profile,
+                                          circle=self.circle,
+                                          remaining_invitations=3)
+        NotificationPreference.objects.create(
+            user=self.users['ana'], new_rides=NotificationPreference.INSTANT)
+
+    def client_for(self, name):
+        token, _ = Token.objects.get_or_create(user=self.users[name])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token.key))
+        return client
+
+    def offer_ride(self):
+        departure = timezone.now() + timedelta(days=1)
+        response = self.client_for('driver').post(
+            '/circles/fciencias/rides/', {
+                'available_seats': 1,
+                'departure_location': 'Ciudad Universitaria',
+                'departure_date': departure.isoformat(),
+                'arrival_location': 'Centro',
+                'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Ride.objects.get()
+
+    def profile(self, name):
+        return Profile.objects.get(user=self.users[name])
+
+    def test_events_are_relayed(self):
+        """ Counters and notifications follow the relayed events. """
+        ride = self.offer_ride()
+        url = '/circles/fciencias/rides/{}/'.format(ride.pk)
+        self.client_for('ana').post(url + 'join/')
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('name', flat=True)),
+            [OutboxEvent.RIDE_CREATED, OutboxEvent.RIDE_JOINED])
+        self.assertEqual(self.profile('driver').rides_offered, 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(relay_events(), 2)
+        self.assertEqual(relay_events(), 0)
+        self.assertFalse(OutboxEvent.objects.filter(
+            published_at__isnull=True).exists())
+        self.assertEqual(self.profile('driver').rides_offered, 1)
+        self.assertEqual(self.profile('ana').rides_taken, 1)
+        circle = Circle.objects.get()
+        self.assertEqual((circle.rides_offered, circle.rides_taken), (1, 1))
+        self.assertEqual([message.to for message in mail.outbox],
+                         [['ana@comparteride.com']])
+
+        self.client_for('ana').post(url + 'leave/')
+        relay_events()
+        self.assertEqual(self.profile('ana').rides_taken, 0)
+        self.assertEqual(Circle.objects.get().rides_taken, 0)
+
+    def test_membership_events(self):
+        """ Joining and leaving a circle record their events. """
+        invitation = Invitation.objects.create(issue_by=self.users['driver'],
+                                               circle=self.circle)
+        response = self.client_for('juan').post(
+            '/circles/fciencias/members/',
+            {'invitation_code': invitation.code})
+        self.assertEqual(response.status_code, 201)
+        response = self.client_for('juan').delete(
+            '/circles/fciencias/members/juan/')
+        self.assertEqual(response.status_code, 204)
+        events = OutboxEvent.objects.order_by('pk')
+        self.assertEqual([event.name for event in events], [
+            OutboxEvent.MEMBER_ADDED,
+            OutboxEvent.INVITATION_USED,
+            OutboxEvent.MEMBER_REMOVED
+        ])
+        self.assertEqual(events[1].payload['invitation'], invitation.pk)
+
+    def test_redelivered_events_are_skipped(self):
+        """ Events delivered twice are only handled once. """
+        self.offer_ride()
+        messages = [event.as_message() for event in OutboxEvent.objects.all()]
+        handle_events(messages)
+        handle_events(messages)
+        self.assertEqual(self.profile('driver').rides_offered, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(ProcessedEvent.objects.count(), 3)
+
+    def test_purge(self):
+        """ Published events are deleted after OUTBOX_RETENTION. """
+        self.offer_ride()
+        relay_events()
+        self.assertEqual(purge_outbox(), 0)
+        OutboxEvent.objects.update(
+            published_at=timezone.now() - timedelta(days=30))
+        ProcessedEvent.objects.update(
+            created=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge_outbox(), 4)
+        self.assertFalse(OutboxEvent.objects.exists())
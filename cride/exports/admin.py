@@ -0,0 +1,93 @@
+""" Exports admin. """
+
+# Django
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+# Models
+from cride.exports.models import ExportJob
+
+# Tasks
+from cride.taskapp.dispatch import send_task
+
+# Utilities
+from cride.utils.admin import display
+import os
+
+
+def queue_export(job):
+    """ Run the export job once the current transaction commits. """
+    transaction.on_commit(lambda: send_task('export_dataset', job.pk))
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """ Export job admin. """
+    list_display = ('dataset', 'format', 'status', 'progress_display',
+                    'requested_by', 'created', 'download_link')
+    list_filter = ('dataset', 'format', 'status')
+    readonly_fields = ('requested_by', 'status', 'progress_display',
+                       'total_rows', 'exported_rows', 'started_at',
+                       'finished_at', 'download_link', 'error')
+    fields = ('dataset', 'format', 'filters') + readonly_fields
+
+    actions = ['retry']
+
+    def get_readonly_fields(self, request, obj=None):
+        """ Jobs can't be edited once created. """
+        if obj is not None:
+            return ('dataset', 'format', 'filters') + self.readonly_fields
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        """ Queue new jobs. """
+        if not change:
+            obj.requested_by = request.user
+        super(ExportJobAdmin, self).save_model(request, obj, form, change)
+        if not change:
+            queue_export(obj)
+
+    @display('Progress')
+    def progress_display(self, obj):
+        """ Return the exported rows share. """
+        return '{}%'.format(obj.progress)
+
+    @display('File')
+    def download_link(self, obj):
+        """ Return the link to download a finished export. """
+        if obj.status != ExportJob.FINISHED or not obj.file:
+            return '-'
+        url = reverse('admin:exports_exportjob_download', args=[obj.pk])
+        return format_html('<a href="{}">Download</a>', url)
+
+    def get_urls(self):
+        urls = [
+            path('<int:pk>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='exports_exportjob_download'),
+        ]
+        return urls + super(ExportJobAdmin, self).get_urls()
+
+    def download_view(self, request, pk):
+        """ Stream a finished export file. """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        job = get_object_or_404(ExportJob, pk=pk)
+        if job.status != ExportJob.FINISHED or not job.file:
+            raise Http404('Export not finished.')
+        return FileResponse(job.file.open('rb'), as_attachment=True,
+                            filename=os.path.basename(job.file.name))
+
+    @display('Resume selected failed exports')
+    def retry(self, request, queryset):
+        """ Resume failed exports where they stopped. """
+        jobs = queryset.filter(status=ExportJob.FAILED)
+        for job in jobs:
+            queue_export(job)
+        self.message_user(request, '{} exports queued.'.format(len(jobs)),
+                          messages.SUCCESS)
@@ -0,0 +1,10 @@
+""" Exports app. """
+
+# Django
+from django.apps import AppConfig
+
+
+class ExportsAppConfig(AppConfig):
+    """ Exports app config. """
+    name = 'cride.exports'
+    verbose_name = 'Exports'
@@ -0,0 +1,135 @@
+""" Exportable datasets. """
+
+# Django
+from django.db.models import Count
+from django.utils.dateparse import parse_date
+
+# Models
+from cride.circles.models import Membership
+from cride.users.models import User
+
+# Utilities
+from cride.rides.archive import RIDE_MODELS
+from cride.rides.exports import local_day_range
+from cride.utils.shards import shards
+from itertools import product
+from typing import Dict
+
+
+class Dataset:
+    """ Exportable dataset.
+
+    columns are (header, lookup) pairs, the first one must be the primary
+    key: rows are read in primary key order, one chunk at a time, so an
+    export can resume after the last exported key. querysets returns the
+    querysets of every table holding the dataset (rides are split between
+    the rides table and the archive, and between shards), their primary
+    keys must not overlap.
+    """
+
+    def __init__(self, name, querysets, columns, annotations=None):
+        self.name = name
+        self.get_querysets = querysets
+        self.columns = columns
+        self.annotations = annotations or {}
+
+    @property
+    def header(self):
+        return [header for header, _ in self.columns]
+
+    def sources(self, filters):
+        """ Return the rows querysets of every table. """
+        sources = []
+        for queryset in self.get_querysets(filters or {}):
+            if self.annotations:
+                queryset = queryset.annotate(**self.annotations)
+            sources.append(queryset.order_by('pk').values_list(
+                *[lookup for _, lookup in self.columns]))
+        return sources
+
+    def count(self, filters):
+        """ Return the number of rows. """
+        return sum(source.count() for source in self.sources(filters))
+
+    def chunk(self, filters, after, size):
+        """ Return the next size rows after the after primary key.
+
+        A row moved from a table to the next one between the queries is
+        only returned once. """
+        rows: Dict[int, tuple] = {}
+        for source in self.sources(filters):
+            if after is not None:
+                source = source.filter(pk__gt=after)
+            for row in source[:size]:
+                rows.setdefault(row[0], row)
+        return [rows[pk] for pk in sorted(rows)[:size]]
+
+
+def filter_circles(queryset, filters, lookup):
+    """ Restrict queryset to the circles listed in the filters. """
+    if filters.get('circles'):
+        queryset = queryset.filter(**{lookup + '__in': filters['circles']})
+    return queryset
+
+
+def users(filters):
+    return [User.objects.all()]
+
+
+def memberships(filters):
+    return [filter_circles(Membership.objects.using(alias), filters, 'circle')
+            for alias in shards()]
+
+
+def rides(filters):
+    querysets = []
+    for model, alias in product(RIDE_MODELS, shards()):
+        queryset = filter_circles(model.objects.using(alias), filters,
+                                  'offered_in')
+        if filters.get('start') and filters.get('end'):
+            start, end = local_day_range(parse_date(filters['start']),
+                                         parse_date(filters['end']))
+            queryset = queryset.filter(departure_date__gte=start,
+                                       departure_date__lt=end)
+        querysets.append(queryset)
+    return querysets
+
+
+DATASETS = {dataset.name: dataset for dataset in (
+    Dataset('users', users, (
+        ('id', 'pk'),
+        ('username', 'username'),
+        ('email', 'email'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('phone_number', 'phone_number'),
+        ('is_verified', 'is_verified'),
+        ('created', 'created'),
+    )),
+    Dataset('memberships', memberships, (
+        ('id', 'pk'),
+        ('circle', 'circle__slug_name'),
+        ('user', 'user__username'),
+        ('is_admin', 'is_admin'),
+        ('is_active', 'is_active'),
+        ('invited_by', 'invited_by__username'),
+        ('used_invitations', 'used_invitations'),
+        ('remaining_invitations', 'remaining_invitations'),
+        ('rides_taken', 'rides_taken'),
+        ('rides_offered', 'rides_offered'),
+        ('joined_at', 'created'),
+    )),
+    Dataset('rides', rides, (
+        ('id', 'pk'),
+        ('circle', 'offered_in__slug_name'),
+        ('offered_by', 'offered_by__username'),
+        ('passengers', 'passengers'),
+        ('available_seats', 'available_seats'),
+        ('departure_location', 'departure_location'),
+        ('departure_date', 'departure_date'),
+        ('arrival_location', 'arrival_location'),
+        ('arrival_date', 'arrival_date'),
+        ('rating', 'rating'),
+        ('is_active', 'is_active'),
+    ), annotations={'passengers': Count('passenger')}),
+)}
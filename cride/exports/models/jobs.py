@@ -0,0 +1,82 @@
+""" Export job model. """
+
+# Django
+from django.db import models
+
+# Utilities
+from cride.exports.storage import export_storage
+from cride.utils.models import CrideModel
+
+
+class ExportJob(CrideModel):
+    """ Export job model.
+
+    An export of a whole dataset to a CSV or JSON lines file, written by a
+    Celery task. Progress is saved after every chunk (the last exported
+    primary key and the bytes written) so the task can resume where it
+    stopped if its worker dies. """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (FINISHED, 'Finished'),
+        (FAILED, 'Failed'),
+    )
+
+    DATASET_CHOICES = (
+        ('users', 'Users'),
+        ('memberships', 'Memberships'),
+        ('rides', 'Rides'),
+    )
+
+    CSV = 'csv'
+    JSONL = 'jsonl'
+    FORMAT_CHOICES = (
+        (CSV, 'CSV'),
+        (JSONL, 'JSON lines'),
+    )
+
+    dataset = models.CharField(max_length=20, choices=DATASET_CHOICES)
+    format = models.CharField(max_length=5, choices=FORMAT_CHOICES,
+                              default=CSV)
+    filters = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Dataset filters, like {"circles": [1, 2]}.'
+    )
+    requested_by = models.ForeignKey('users.User',
+                                     on_delete=models.SET_NULL,
+                                     null=True,
+                                     blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=PENDING)
+    error = models.TextField(blank=True)
+    file = models.FileField(upload_to='exports/', storage=export_storage,
+                            blank=True)
+
+    # Progress
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    exported_rows = models.PositiveIntegerField(default=0)
+    last_pk = models.BigIntegerField(null=True, blank=True)
+    bytes_written = models.BigIntegerField(default=0)
+
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self):
+        """ Return the exported share of the rows, from 0 to 100. """
+        if self.status == self.FINISHED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return int(self.exported_rows * 100 / self.total_rows)
+
+    def __str__(self):
+        """ Return dataset, format and status. """
+        return '{} {} ({})'.format(self.dataset, self.format, self.status)
@@ -0,0 +1,171 @@
+""" Export jobs runner. """
+
+# Django
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+# Models
+from cride.exports.models import ExportJob
+
+# Utilities
+from cride.exports.datasets import DATASETS
+from datetime import datetime
+from typing import Dict, Type, Union
+import csv
+import fcntl
+import io
+import json
+import os
+import traceback
+
+
+class ExportConflict(Exception):
+    """ Another worker is running the same export. """
+
+
+def format_value(value):
+    """ Return datetimes in local time, as the API does. """
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+class CSVWriter:
+    """ Encode rows as CSV lines. """
+
+    def __init__(self, header):
+        self.header = header
+
+    def encode_header(self):
+        return self.encode([self.header])
+
+    def encode(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if value is None else format_value(value)
+                             for value in row])
+        return buffer.getvalue().encode()
+
+
+class JSONLinesWriter:
+    """ Encode rows as JSON objects, one per line. """
+
+    def __init__(self, header):
+        self.header = header
+
+    def encode_header(self):
+        return b''
+
+    def encode(self, rows):
+        return ''.join(
+            json.dumps(dict(zip(self.header, map(format_value, row))),
+                       cls=DjangoJSONEncoder) + '\n'
+            for row in rows
+        ).encode()
+
+
+WRITERS: Dict[str, Type[Union[CSVWriter, JSONLinesWriter]]] = {
+    ExportJob.CSV: CSVWriter,
+    ExportJob.JSONL: JSONLinesWriter,
+}
+
+
+def partial_path(job):
+    """ Return the path of the file the job is being written to. """
+    return os.path.join(settings.EXPORTS_WORK_DIR,
+                        'export-{}.{}.part'.format(job.pk, job.format))
+
+
+def save_progress(job, previous_pk, **fields):
+    """ Save the job progress, unless another worker already moved it. """
+    fields['modified'] = timezone.now()
+    updated = ExportJob.objects.filter(
+        pk=job.pk,
+        last_pk=previous_pk
+    ).update(**fields)
+    if not updated:
+        raise ExportConflict('Export {} was resumed by another worker.'.format(
+            job.pk))
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def run_export(job_pk, chunk_size=None):
+    """ Run or resume an export job.
+
+    Rows are read by primary key chunks and appended to a partial file in
+    EXPORTS_WORK_DIR, saving the progress after every chunk. A resumed job
+    truncates whatever was written after the last saved chunk and goes on
+    from there. Finished files are moved to the exports storage. """
+    chunk_size = chunk_size or settings.EXPORTS_CHUNK_SIZE
+    job = ExportJob.objects.get(pk=job_pk)
+    if job.status == ExportJob.FINISHED:
+        return job
+
+    dataset = DATASETS[job.dataset]
+    writer = WRITERS[job.format](dataset.header)
+    path = partial_path(job)
+
+    os.makedirs(settings.EXPORTS_WORK_DIR, exist_ok=True)
+    try:
+        with open(path, 'ab') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise ExportConflict('Export {} is already running.'.format(
+                    job.pk))
+            job.refresh_from_db()
+            if job.status == ExportJob.FINISHED:
+                os.remove(path)
+                return job
+
+            if job.started_at is None:
+                job.total_rows = dataset.count(job.filters)
+                job.started_at = timezone.now()
+            job.status = ExportJob.RUNNING
+            job.error = ''
+            job.save()
+
+            f.truncate(job.bytes_written)
+            if job.bytes_written == 0:
+                f.write(writer.encode_header())
+
+            while True:
+                chunk = dataset.chunk(job.filters, job.last_pk, chunk_size)
+                if not chunk:
+                    break
+
+                f.write(writer.encode(chunk))
+                f.flush()
+                os.fsync(f.fileno())
+                save_progress(
+                    job, job.last_pk,
+                    last_pk=chunk[-1][0],
+                    exported_rows=job.exported_rows + len(chunk),
+                    bytes_written=f.tell()
+                )
+
+            with open(path, 'rb') as source:
+                name = 'export-{}-{}.{}'.format(
+                    job.dataset,
+                    timezone.localtime().strftime('%Y%m%d%H%M%S'),
+                    job.format
+                )
+                job.file.save(name, File(source), save=False)
+            job.status = ExportJob.FINISHED
+            job.finished_at = timezone.now()
+            job.save()
+            os.remove(path)
+    except ExportConflict:
+        raise
+    except Exception:
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.FAILED,
+            error=traceback.format_exc(),
+            modified=timezone.now()
+        )
+        raise
+    return job
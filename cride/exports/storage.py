@@ -0,0 +1,36 @@
+""" Exports storage. """
+
+# Django
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.module_loading import import_string
+
+# Utilities
+import os
+
+
+class PrivateFileSystemStorage(FileSystemStorage):
+    """ File system storage under EXPORTS_ROOT, outside of MEDIA_ROOT.
+
+    Its files have no URL, they are only served by the views reading them. """
+
+    @property
+    def base_location(self):
+        return settings.EXPORTS_ROOT
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Private files have no URL.')
+
+
+def export_storage():
+    """ Return the storage finished exports are saved to.
+
+    EXPORTS_STORAGE is the dotted path of a private storage class, files
+    are saved under EXPORTS_ROOT when it's not set. """
+    if settings.EXPORTS_STORAGE:
+        return import_string(settings.EXPORTS_STORAGE)()
+    return PrivateFileSystemStorage()
@@ -0,0 +1,85 @@
+""" Export jobs tests. """
+
+# Django
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Membership
+from cride.exports.models import ExportJob
+from cride.rides.models import Ride
+
+# Utilities
+from cride.exports.runner import partial_path, run_export
+from cride.utils.fixtures import FixtureLoader
+import csv
+import io
+import os
+import shutil
+import tempfile
+
+
+class ExportJobTestCase(TestCase):
+    """ Export job test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=30, circles=3, rides=50).load()
+        self.directory = directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(
+            EXPORTS_ROOT=directory,
+            EXPORTS_WORK_DIR=os.path.join(directory, 'work')
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def read(self, job):
+        with job.file.open('rb') as f:
+            return f.read()
+
+    def test_csv_export(self):
+        """ Every ride is exported with its passenger count. """
+        job = ExportJob.objects.create(dataset='rides')
+        job = run_export(job.pk, chunk_size=7)
+
+        self.assertEqual(job.status, ExportJob.FINISHED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.exported_rows, 50)
+        self.assertFalse(os.path.exists(partial_path(job)))
+        self.assertTrue(job.file.path.startswith(self.directory))
+        with self.assertRaises(ValueError):
+            job.file.url
+
+        rows = list(csv.DictReader(io.StringIO(self.read(job).decode())))
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(sum(int(row['passengers']) for row in rows),
+                         Ride.passenger.through.objects.count())
+
+    def test_resume(self):
+        """ A stopped export resumes after its last saved chunk. """
+        expected = self.read(run_export(
+            ExportJob.objects.create(dataset='memberships',
+                                     format='jsonl').pk))
+
+        # Simulate a worker killed while writing its third chunk.
+        done = 4
+        lines = expected.splitlines(keepends=True)
+        written = b''.join(lines[:done])
+        job = ExportJob.objects.create(
+            dataset='memberships',
+            format='jsonl',
+            status=ExportJob.RUNNING,
+            started_at=timezone.now(),
+            total_rows=len(lines),
+            exported_rows=done,
+            last_pk=Membership.objects.order_by('pk')[done - 1].pk,
+            bytes_written=len(written)
+        )
+        os.makedirs(os.path.dirname(partial_path(job)), exist_ok=True)
+        with open(partial_path(job), 'wb') as f:
+            f.write(written + lines[done][:10])
+
+        job = run_export(job.pk, chunk_size=2)
+        self.assertEqual(job.exported_rows, len(lines))
+        self.assertEqual(self.read(job), expected)
@@ -0,0 +1,17 @@
+""" Notifications admin. """
+
+# Django
+from django.contrib import admin
+
+# Models
+from cride.notifications.models import NotificationPreference
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    """ Notification preference admin. """
+    list_display = ('user', 'new_rides')
+    list_filter = ('new_rides',)
+    search_fields = ('user__username', 'user__email')
+    raw_id_fields = ('user',)
+    filter_horizontal = ('muted_circles',)
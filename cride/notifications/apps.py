@@ -0,0 +1,10 @@
+""" Notifications app. """
+
+# Django
+from django.apps import AppConfig
+
+
+class NotificationsAppConfig(AppConfig):
+    """ Notifications app config. """
+    name = 'cride.notifications'
+    verbose_name = 'Notifications'
@@ -0,0 +1,137 @@
+""" New rides notifications delivery.
+
+A new ride is notified to its circle members in chunks (see the
+notify_new_ride task). Members that want every ride get an email right
+away, the rest of them get the ride queued for their next digest. Emails of
+a chunk are sent over a single connection of the email backend. """
+
+# Django
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Membership
+from cride.notifications.models import (NotificationPreference,
+                                        PendingNotification)
+from cride.rides.models import Ride
+from cride.users.models import User
+
+# Utilities
+from cride.utils.shards import each_shard
+from typing import Dict, List
+
+
+FROM_EMAIL = 'Comparte Ride <noreply@comparteride.com>'
+
+
+def ride_recipients(ride):
+    """ Return the pks of the members to notify of a ride. """
+    return list(Membership.objects.filter(
+        circle=ride.offered_in_id,
+        is_active=True
+    ).exclude(
+        user=ride.offered_by_id
+    ).order_by('user').values_list('user', flat=True))
+
+
+def split_recipients(ride, user_pks):
+    """ Return the pks of the users to email right away and the pks of the
+    users to queue the ride for, following their preferences. """
+    preferences = dict(NotificationPreference.objects.filter(
+        user__in=user_pks
+    ).values_list('user', 'new_rides'))
+    muted = set(NotificationPreference.muted_circles.through.objects.filter(
+        notificationpreference__user__in=user_pks,
+        circle=ride.offered_in_id
+    ).values_list('notificationpreference__user', flat=True))
+
+    instant, digest = [], []
+    for pk in user_pks:
+        preference = preferences.get(pk, NotificationPreference.DIGEST)
+        if pk in muted or preference == NotificationPreference.NEVER:
+            continue
+        if preference == NotificationPreference.INSTANT:
+            instant.append(pk)
+        else:
+            digest.append(pk)
+    return instant, digest
+
+
+def email(user, subject, template, context):
+    """ Return the email of a notification. """
+    content = render_to_string(template, dict(context, user=user))
+    message = EmailMultiAlternatives(subject, content, FROM_EMAIL,
+                                     [user.email])
+    message.attach_alternative(content, 'text/html')
+    return message
+
+
+def notify_members(ride_pk, user_pks):
+    """ Notify a chunk of members of a ride, return the emails sent. """
+    ride = Ride.objects.select_related('offered_in', 'offered_by').filter(
+        pk=ride_pk,
+        is_active=True
+    ).first()
+    if ride is None:
+        return 0
+
+    instant, digest = split_recipients(ride, user_pks)
+    PendingNotification.objects.bulk_create(
+        [PendingNotification(user_id=pk, ride=ride) for pk in digest],
+        ignore_conflicts=True
+    )
+    subject = 'New ride in {}: {} to {}'.format(
+        ride.offered_in, ride.departure_location, ride.arrival_location)
+    messages = [
+        email(user, subject, 'emails/notifications/new_ride.html',
+              {'ride': ride})
+        for user in User.objects.filter(pk__in=instant).only('username',
+                                                             'email')
+    ]
+    return get_connection().send_messages(messages) or 0
+
+
+def send_digests(user_pks):
+    """ Send their digest to a chunk of users, return the emails sent.
+
+    Rides that already left or were disabled are dropped from the digest.
+    Rides of every shard go to the same digest, except the ones of circles
+    being moved to another shard, left for the next digest.
+    """
+    pending = {}
+    rides: Dict[int, List[Ride]] = {}
+    for alias in each_shard():
+        pending[alias] = list(PendingNotification.objects.filter(
+            user__in=user_pks,
+            ride__offered_in__moving=False
+        ).select_related('ride__offered_in'))
+        for notification in pending[alias]:
+            ride = notification.ride
+            if ride.is_active and ride.departure_date > timezone.now():
+                rides.setdefault(notification.user_id, []).append(ride)
+    for user_rides in rides.values():
+        user_rides.sort(key=lambda ride: ride.departure_date)
+
+    messages = [
+        email(user, '{} new rides in your circles'.format(
+            len(rides[user.pk])), 'emails/notifications/ride_digest.html',
+            {'rides': rides[user.pk]})
+        for user in User.objects.filter(pk__in=rides).only('username',
+                                                           'email')
+    ]
+    sent = get_connection().send_messages(messages) or 0
+    for alias in each_shard():
+        PendingNotification.objects.filter(pk__in=[
+            notification.pk for notification in pending[alias]]).delete()
+    return sent
+
+
+def notify_promotion(ride_pk, user_pk):
+    """ Email a member promoted from the waitlist of a ride. """
+    ride = Ride.objects.select_related('offered_in', 'offered_by').get(
+        pk=ride_pk)
+    user = User.objects.get(pk=user_pk)
+    email(user, 'You got a seat in {}'.format(ride),
+          'emails/notifications/waitlist_promotion.html',
+          {'ride': ride}).send()
@@ -0,0 +1,2 @@
+from .preferences import NotificationPreference
+from .pending import PendingNotification
@@ -0,0 +1,23 @@
+""" Pending notifications model. """
+
+# Django
+from django.db import models
+
+
+class PendingNotification(models.Model):
+    """ Pending notification model.
+
+    A new ride waiting to be sent to a member in their next digest. """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey('users.User',
+                             on_delete=models.CASCADE,
+                             related_name='+')
+    ride = models.ForeignKey('rides.Ride',
+                             on_delete=models.CASCADE,
+                             related_name='+')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """ Meta option. """
+        unique_together = ('user', 'ride')
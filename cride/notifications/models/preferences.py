@@ -0,0 +1,40 @@
+""" Notification preferences model. """
+
+# Django
+from django.db import models
+
+# Utilities
+from cride.utils.models import CrideModel
+
+
+class NotificationPreference(CrideModel):
+    """ Notification preference model.
+
+    Users without preferences get a digest of the new rides of all their
+    circles. """
+
+    INSTANT = 'instant'
+    DIGEST = 'digest'
+    NEVER = 'never'
+    NEW_RIDES_CHOICES = (
+        (INSTANT, 'Every new ride'),
+        (DIGEST, 'Digest'),
+        (NEVER, 'Never'),
+    )
+
+    user = models.OneToOneField('users.User',
+                                on_delete=models.CASCADE,
+                                related_name='notification_preference')
+    new_rides = models.CharField(max_length=7,
+                                 choices=NEW_RIDES_CHOICES,
+                                 default=DIGEST)
+    muted_circles = models.ManyToManyField(
+        'circles.Circle',
+        blank=True,
+        related_name='+',
+        help_text='Circles whose new rides are not notified.'
+    )
+
+    def __str__(self):
+        """ Return user and new rides preference. """
+        return '{}: {}'.format(self.user, self.new_rides)
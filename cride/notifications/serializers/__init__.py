@@ -0,0 +1 @@
+from .preferences import *
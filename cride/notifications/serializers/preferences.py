@@ -0,0 +1,24 @@
+""" Notification preferences serializers. """
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Models
+from cride.circles.models import Circle
+from cride.notifications.models import NotificationPreference
+
+
+class NotificationPreferenceModelSerializer(serializers.ModelSerializer):
+    """ Notification preference model serializer. """
+
+    muted_circles = serializers.SlugRelatedField(
+        slug_field='slug_name',
+        queryset=Circle.objects.all(),
+        many=True,
+        required=False
+    )
+
+    class Meta:
+        """ Meta class. """
+        model = NotificationPreference
+        fields = ('new_rides', 'muted_circles')
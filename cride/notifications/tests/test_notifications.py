@@ -0,0 +1,145 @@
+""" New rides notifications tests. """
+
+# Django
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.notifications.models import (NotificationPreference,
+                                        PendingNotification)
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Tasks
+from cride.taskapp.tasks import notify_new_ride, send_ride_digests
+
+# Utilities
+from datetime import timedelta
+
+
+@override_settings(NOTIFICATIONS_CHUNK_SIZE=2)
+class NewRideNotificationsTestCase(TestCase):
+    """ New rides notifications test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        self.users = {}
+        for name in ('driver', 'instant', 'never', 'muted', 'default',
+                     'digest', 'inactive'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Membership.objects.create(
+                user=user,
+                profile=Profile.objects.create(user=user),
+                circle=self.circle,
+                is_active=name != 'inactive'
+            )
+            self.users[name] = user
+        for name in ('instant', 'never', 'digest'):
+            NotificationPreference.objects.create(user=self.users[name],
+                                                  new_rides=name)
+        NotificationPreference.objects.create(
+            user=self.users['muted'],
+            new_rides=NotificationPreference.INSTANT
+        ).muted_circles.add(self.circle)
+
+    def create_ride(self, hours):
+        departure = timezone.now() + timedelta(hours=hours)
+        return Ride.objects.create(
+            offered_by=self.users['driver'],
+            offered_in=self.circle,
+            departure_location='Ciudad Universitaria',
+            departure_date=departure,
+            arrival_location='Centro',
+            arrival_date=departure + timedelta(hours=1),
+        )
+
+    def recipients(self):
+        return sorted(message.to[0].split('@')[0]
+                      for message in mail.outbox)
+
+    def test_new_ride(self):
+        """ Members are emailed or queued following their preferences. """
+        notify_new_ride(self.create_ride(2).pk, self.circle.pk)
+        self.assertEqual(self.recipients(), ['instant'])
+        self.assertEqual(
+            set(PendingNotification.objects.values_list('user__username',
+                                                        flat=True)),
+            {'default', 'digest'}
+        )
+
+    def test_digests(self):
+        """ Queued rides are collapsed in a digest per member. """
+        rides = [self.create_ride(hours) for hours in (3, 2, 1)]
+        for ride in rides:
+            notify_new_ride(ride.pk, self.circle.pk)
+        Ride.objects.filter(pk=rides[2].pk).update(is_active=False)
+        mail.outbox = []
+
+        send_ride_digests()
+
+        self.assertEqual(self.recipients(), ['default', 'digest'])
+        self.assertEqual(mail.outbox[0].subject,
+                         '2 new rides in your circles')
+        body = mail.outbox[0].body
+        self.assertLess(body.index(str(rides[1])), body.index(str(rides[0])))
+        self.assertFalse(PendingNotification.objects.exists())
+
+        send_ride_digests()
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class NotificationPreferencesTestCase(TestCase):
+    """ Notification preferences endpoint test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.user = User.objects.create(
+            first_name='Nicolas',
+            last_name='Catalano',
+            email='nec.catalano@gmail.com',
+            username='nicolasCatalano',
+            password='nico1234'
+        )
+        Profile.objects.create(user=self.user)
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        token = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+        self.url = '/users/nicolasCatalano/notifications/'
+
+    def test_preferences(self):
+        """ Preferences default to digests and can be updated. """
+        response = self.client.get(self.url)
+        self.assertEqual(response.data, {'new_rides': 'digest',
+                                         'muted_circles': []})
+
+        response = self.client.patch(self.url, {
+            'new_rides': 'instant',
+            'muted_circles': ['fciencias']
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        preference = self.user.notification_preference
+        preference.refresh_from_db()
+        self.assertEqual(preference.new_rides, 'instant')
+        self.assertEqual(list(preference.muted_circles.all()), [self.circle])
@@ -1,18 +1,53 @@
-""" Circles admin. """
+""" Rides admin. """
 
 # Django
 from django.contrib import admin
 
 # Models
-from cride.rides.models import Ride
+from cride.rides.models import (ArchivedRide, ArchivedRidePassenger, Ride,
+                                RidePassenger)
+
+# Utilities
+from cride.utils.admin import LargeTableAdminMixin
+
+
+class RidePassengerInline(admin.TabularInline):
+    """ Ride passengers inline. """
+    model = RidePassenger
+    raw_id_fields = ('user',)
+    extra = 0
+
+
+class ArchivedRidePassengerInline(RidePassengerInline):
+    """ Archived ride passengers inline. """
+    model = ArchivedRidePassenger
 
 
 @admin.register(Ride)
-class CircleAdmin(admin.ModelAdmin):
-    """ Circle admin. """
+class RideAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """ Ride admin. """
     list_display = ('offered_by', 'offered_in',
                     'available_seats', 'comments',
                     'departure_location', 'arrival_location')
-    search_fields = ('offered_by', 'offered_in')
-    list_filter = ('offered_by', 'offered_in',
-                   'departure_date', 'arrival_date')
+    list_select_related = ('offered_by', 'offered_in')
+    search_fields = ('offered_by__username', 'offered_in__slug_name')
+    list_filter = ('is_active', 'departure_date', 'arrival_date')
+    raw_id_fields = ('offered_by', 'offered_in')
+    inlines = (RidePassengerInline,)
+
+
+@admin.register(ArchivedRide)
+class ArchivedRideAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    """ Archived ride admin. """
+    list_display = ('offered_by', 'offered_in',
+                    'departure_location', 'arrival_location',
+                    'departure_date', 'archived')
+    list_select_related = ('offered_by', 'offered_in')
+    search_fields = ('offered_by__username', 'offered_in__slug_name')
+    list_filter = ('departure_date',)
+    raw_id_fields = ('offered_by', 'offered_in')
+    inlines = (ArchivedRidePassengerInline,)
+
+    def has_add_permission(self, request):
+        """ Rides are only archived by the archive_finished_rides task. """
+        return False
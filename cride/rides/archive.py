@@ -0,0 +1,58 @@
+""" Rides archival. """
+
+# Django
+from django.db import router, transaction
+from django.db.models import Model
+
+# Models
+from cride.rides.models import ArchivedRide, Ride
+
+# Utilities
+from typing import Tuple, Type
+
+
+RIDE_COLUMNS = ('id', 'created', 'modified', 'offered_by_id',
+                'offered_in_id', 'available_seats', 'comments',
+                'departure_location', 'departure_date', 'arrival_location',
+                'arrival_date', 'rating', 'is_active')
+
+RIDE_MODELS: Tuple[Type[Model], ...] = (Ride, ArchivedRide)
+
+
+def archive_rides(before, chunk_size=2000, chunks=None):
+    """ Move the rides that arrived before the given date to the archive.
+
+    Every chunk of rides is copied along with its passengers and deleted
+    from the rides table in its own short transaction, locked rows and the
+    rides of circles being moved are left for the next run. Stops after
+    chunks chunks if given and returns the number of rides archived. """
+    Passenger = Ride.passenger.through
+    ArchivedPassenger = ArchivedRide.passenger.through
+    archived = 0
+    done = 0
+    while chunks is None or done < chunks:
+        with transaction.atomic(using=router.db_for_write(Ride)):
+            pks = list(Ride.objects.filter(
+                arrival_date__lt=before,
+                offered_in__moving=False
+            ).order_by('pk').select_for_update(
+                skip_locked=True, of=('self',)
+            ).values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+
+            rides = Ride.objects.filter(pk__in=pks)
+            ArchivedRide.objects.bulk_create(
+                ArchivedRide(**dict(zip(RIDE_COLUMNS, row)))
+                for row in rides.values_list(*RIDE_COLUMNS)
+            )
+            ArchivedPassenger.objects.bulk_create(
+                ArchivedPassenger(archivedride_id=ride, user_id=user)
+                for ride, user in Passenger.objects.filter(
+                    ride__in=pks
+                ).values_list('ride', 'user')
+            )
+            rides.delete()
+        archived += len(pks)
+        done += 1
+    return archived
@@ -0,0 +1,48 @@
+""" Rides expiry.
+
+Rides are disabled by the disable_finished_rides periodic sweep once they
+arrive, every RIDES_EXPIRY_INTERVAL. The sweep reads the partial index on
+the arrival date of active rides, which only holds the rides left to
+expire, so it costs the same whatever the size of the rides table. """
+
+# Django
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+# Models
+from cride.events.models import OutboxEvent
+from cride.rides.models import Ride
+
+
+def expire_rides(**filters):
+    """ Disable the active rides that already arrived and return how many.
+
+    Rides are disabled in transactions of RIDES_EXPIRY_CHUNK_SIZE rides,
+    and a ride_expired event is recorded for every ride disabled. Rides of
+    circles being moved to another shard are left for the next sweep. """
+    size = settings.RIDES_EXPIRY_CHUNK_SIZE
+    now = timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic(using=router.db_for_write(Ride)):
+            rides = list(Ride.objects.select_for_update(
+                of=('self',)
+            ).filter(
+                is_active=True,
+                arrival_date__lte=now,
+                offered_in__moving=False,
+                **filters
+            ).order_by('arrival_date').values_list('pk', 'offered_in')[:size])
+            if not rides:
+                return expired
+            Ride.objects.filter(pk__in=[pk for pk, _ in rides]).update(
+                is_active=False)
+            OutboxEvent.objects.bulk_create([
+                OutboxEvent(name=OutboxEvent.RIDE_EXPIRED, circle_id=circle,
+                            payload={'ride': pk})
+                for pk, circle in rides
+            ])
+        expired += len(rides)
+        if len(rides) < size:
+            return expired
@@ -0,0 +1,70 @@
+""" Rides exports. """
+
+# Django
+from django.db.models import Count
+from django.utils import timezone
+
+# Utilities
+from cride.rides.archive import RIDE_MODELS
+from cride.utils.shards import shards
+from datetime import datetime, time, timedelta
+from heapq import merge
+from itertools import product
+
+
+RIDE_EXPORT_HEADER = (
+    'id',
+    'passenger',
+    'departure_location',
+    'departure_date',
+    'arrival_location',
+    'arrival_date',
+    'rating'
+)
+
+
+def local_day_range(start_date, end_date):
+    """ Return aware datetimes covering start_date to end_date included, in
+    the current time zone. """
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1),
+                                               time.min))
+    return start, end
+
+
+def ride_export_rows(circles, start, end, chunk_size=2000):
+    """ Yield a row per ride of circles departing in [start, end).
+
+    Passengers are counted by the same query and rows are fetched in
+    chunks (with a server side cursor where supported), so any date range
+    can be exported in constant memory. Rides and archived rides of every
+    shard are read side by side and merged in departure order. """
+    queries = [model.objects.using(alias).filter(
+        offered_in__in=circles,
+        departure_date__gte=start,
+        departure_date__lt=end
+    ).annotate(
+        passengers=Count('passenger')
+    ).order_by('departure_date', 'pk').values_list(
+        'pk',
+        'passengers',
+        'departure_location',
+        'departure_date',
+        'arrival_location',
+        'arrival_date',
+        'rating'
+    ) for model, alias in product(RIDE_MODELS, shards())]
+    rows = merge(*[query.iterator(chunk_size=chunk_size)
+                   for query in queries],
+                 key=lambda row: (row[3], row[0]))
+    for pk, passengers, departure_location, departure_date, \
+            arrival_location, arrival_date, rating in rows:
+        yield (
+            pk,
+            passengers,
+            departure_location,
+            timezone.localtime(departure_date).isoformat(),
+            arrival_location,
+            timezone.localtime(arrival_date).isoformat(),
+            '' if rating is None else rating
+        )
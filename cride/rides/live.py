@@ -0,0 +1,181 @@
+""" Live ride feed.
+
+GET /circles/<slug_name>/rides/stream/ pushes the ride events of a circle
+to its active members as Server-Sent Events, instead of them polling the
+ride feed:
+
+* ride_created: a new ride, with its available seats.
+* ride_joined, ride_left: the available seats of a ride changed.
+* ride_expired: the ride arrived and left the feed.
+
+Events are published by the live outbox consumer (see
+cride.events.consumers) through the pub/sub broker, and streamed by a raw
+ASGI application served in front of Django by config.asgi: an open stream
+costs a queue in the process, without a thread or a database connection.
+Streams send a comment every LIVE_FEED_KEEPALIVE seconds so proxies keep
+them open, and clients reconnecting should fetch the ride feed again.
+
+Browsers' EventSource can't send the Authorization header: they get a
+signed stream token of the circle from POST .../rides/stream-token/ and
+open the stream with ?token=<token> within LIVE_FEED_TOKEN_MAX_AGE
+seconds. """
+
+# Django
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404
+from django.utils.encoding import force_bytes
+
+# Django REST Framework
+from rest_framework import exceptions
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User
+
+# Utilities
+from cride.utils.asyncviews import (authenticate, database_sync_to_async,
+                                    render_exception)
+from cride.utils.db import read_only
+from cride.utils.pubsub import get_broker
+from cride.utils.shards import use_shard
+import asyncio
+import io
+import json
+import re
+
+
+STREAM_PATH = re.compile(
+    r'^/circles/(?P<slug_name>[-a-zA-Z0-9_]+)/rides/stream/$')
+
+TOKEN_SALT = 'cride.rides.live.stream'
+
+HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    # Disable nginx response buffering.
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def ride_channel(circle_pk):
+    """ Return the pub/sub channel of the rides of a circle. """
+    return 'rides:{}'.format(circle_pk)
+
+
+def event_frame(event_id, name, data):
+    """ Return a Server-Sent Event. """
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (
+        event_id, force_bytes(name),
+        json.dumps(data, separators=(',', ':')).encode())
+
+
+def publish(circle_pk, event_id, name, data):
+    """ Push an event to the live feed subscribers of a circle. """
+    get_broker().publish(ride_channel(circle_pk),
+                         event_frame(event_id, name, data))
+
+
+def stream_token(user, circle):
+    """ Return a token opening the stream of the circle for the user. """
+    return signing.dumps([user.pk, circle.pk], salt=TOKEN_SALT)
+
+
+def token_user(token):
+    """ Return the user of a stream token and the pk of its circle. """
+    try:
+        user_pk, circle_pk = signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.LIVE_FEED_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid or expired token.')
+    user = User.objects.filter(pk=user_pk, is_active=True).first()
+    if user is None:
+        raise exceptions.AuthenticationFailed('Invalid or expired token.')
+    return user, circle_pk
+
+
+def stream_circle(user, slug_name):
+    """ Return the pk of the circle if the user is an active member. """
+    with read_only():
+        circle = Circle.objects.filter(slug_name=slug_name).first()
+        if circle is None:
+            raise Http404
+        with use_shard(circle.shard):
+            if not Membership.objects.filter(user=user, circle=circle,
+                                             is_active=True).exists():
+                raise exceptions.PermissionDenied()
+    return circle.pk
+
+
+async def send_response(send, response):
+    """ Send a complete Django response. """
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(force_bytes(name.lower()), force_bytes(value))
+                    for name, value in response.items()],
+    })
+    await send({'type': 'http.response.body', 'body': response.content})
+
+
+async def close_on_disconnect(receive, subscription):
+    """ Close the subscription once the client disconnects. """
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+async def ride_stream(scope, receive, send, slug_name):
+    """ Stream the ride events of a circle. """
+    request = ASGIRequest(scope, io.BytesIO())
+    try:
+        if request.method != 'GET':
+            raise exceptions.MethodNotAllowed(request.method)
+        token_circle = None
+        if 'token' in request.GET:
+            user, token_circle = await database_sync_to_async(token_user)(
+                request.GET['token'])
+        else:
+            user = await authenticate(request)
+        circle_pk = await database_sync_to_async(stream_circle)(user,
+                                                                slug_name)
+        if token_circle not in (None, circle_pk):
+            raise exceptions.PermissionDenied()
+    except Http404:
+        return await send_response(send,
+                                   render_exception(exceptions.NotFound()))
+    except exceptions.APIException as exc:
+        return await send_response(send, render_exception(exc))
+
+    with get_broker().subscribe(ride_channel(circle_pk)) as subscription:
+        watcher = asyncio.ensure_future(close_on_disconnect(receive,
+                                                            subscription))
+        try:
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': HEADERS})
+            await send({'type': 'http.response.body',
+                        'body': b'retry: 5000\n\n', 'more_body': True})
+            while True:
+                messages = await subscription.read(
+                    settings.LIVE_FEED_KEEPALIVE)
+                if messages is None:
+                    break
+                await send({'type': 'http.response.body',
+                            'body': b''.join(messages) or b': keepalive\n\n',
+                            'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+
+
+def live_routes(application):
+    """ Serve the ride streams in front of an ASGI application. """
+    async def router(scope, receive, send):
+        if scope['type'] == 'http':
+            match = STREAM_PATH.match(scope['path'])
+            if match is not None:
+                return await ride_stream(scope, receive, send,
+                                         match.group('slug_name'))
+        return await application(scope, receive, send)
+    return router
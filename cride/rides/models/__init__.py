@@ -1 +1,3 @@
-from .ride import Ride
+from .ride import Ride, RidePassenger
+from .archive import ArchivedRide, ArchivedRidePassenger
+from .waitlist import WaitlistEntry
@@ -0,0 +1,66 @@
+""" Archived rides models. """
+
+# Django
+from django.db import models
+
+# Models
+from cride.rides.models.ride import Ride
+
+
+class ArchivedRide(models.Model):
+    """ Archived ride model.
+
+    Finished rides are moved here from the rides table by the
+    archive_finished_rides task, keeping their primary key and timestamps,
+    so the tables and indexes the ride feed scans only hold recent rides.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    created = models.DateTimeField('created at')
+    modified = models.DateTimeField('modified at')
+    archived = models.DateTimeField('archived at', auto_now_add=True)
+
+    offered_by = models.ForeignKey('users.User',
+                                   on_delete=models.SET_NULL,
+                                   null=True)
+    offered_in = models.ForeignKey('circles.Circle',
+                                   on_delete=models.SET_NULL,
+                                   null=True)
+
+    passenger = models.ManyToManyField('users.User',
+                                       through='rides.ArchivedRidePassenger',
+                                       related_name='archived_passengers')
+
+    available_seats = models.PositiveSmallIntegerField(default=1)
+    comments = models.TextField(blank=True)
+
+    departure_location = models.CharField(max_length=255)
+    departure_date = models.DateTimeField()
+    arrival_location = models.CharField(max_length=255)
+    arrival_date = models.DateTimeField()
+
+    rating = models.FloatField(null=True)
+
+    is_active = models.BooleanField('active status', default=False)
+
+    class Meta:
+        """ Meta option. """
+        get_latest_by = 'departure_date'
+        ordering = ['-departure_date']
+        indexes = [models.Index(fields=['offered_in', 'departure_date'])]
+
+    __str__ = Ride.__str__
+
+
+class ArchivedRidePassenger(models.Model):
+    """ Archived ride passenger model, see RidePassenger. """
+
+    id = models.BigAutoField(primary_key=True)
+    archivedride = models.ForeignKey('rides.ArchivedRide',
+                                     on_delete=models.CASCADE)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE)
+
+    class Meta:
+        """ Meta option. """
+        db_table = 'rides_archivedride_passenger'
+        unique_together = ('archivedride', 'user')
@@ -10,6 +10,8 @@ from cride.utils.models import CrideModel
 class Ride(CrideModel):
     """ Ride model. """
 
+    id = models.BigAutoField(primary_key=True)
+
     offered_by = models.ForeignKey('users.User',
                                    on_delete=models.SET_NULL,
                                    null=True)
@@ -17,7 +19,9 @@ class Ride(CrideModel):
                                    on_delete=models.SET_NULL,
                                    null=True)
 
-    passenger = models.ManyToManyField('users.User', related_name='passengers')
+    passenger = models.ManyToManyField('users.User',
+                                       through='rides.RidePassenger',
+                                       related_name='passengers')
 
     available_seats = models.PositiveSmallIntegerField(default=1)
     comments = models.TextField(blank=True)
@@ -44,3 +48,30 @@ class Ride(CrideModel):
             i_time=self.departure_date.strftime('%I:%M %p'),
             f_time=self.arrival_date.strftime('%I:%M %p'),
         )
+
+    class Meta(CrideModel.Meta):
+        """ Meta option. """
+        indexes = [
+            # Upcoming rides of a circle, for the feed and suggestions.
+            models.Index(fields=['offered_in', 'departure_date'],
+                         name='rides_ride_circle_departure'),
+            # Rides left to expire, for the disable_finished_rides scan.
+            models.Index(fields=['arrival_date'],
+                         condition=models.Q(is_active=True),
+                         name='rides_ride_active_arrival'),
+        ]
+
+
+class RidePassenger(models.Model):
+    """ Ride passenger model.
+
+    The passengers table of rides, declared for its 64-bit primary key. """
+
+    id = models.BigAutoField(primary_key=True)
+    ride = models.ForeignKey('rides.Ride', on_delete=models.CASCADE)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE)
+
+    class Meta:
+        """ Meta option. """
+        db_table = 'rides_ride_passenger'
+        unique_together = ('ride', 'user')
@@ -0,0 +1,32 @@
+""" Rides waitlist models. """
+
+# Django
+from django.db import models
+
+# Utilities
+from cride.utils.models import CrideModel
+
+
+class WaitlistEntry(CrideModel):
+    """ Waitlist entry model.
+
+    A circle member waiting for a seat in a full ride. Entries are served
+    in primary key order. """
+
+    id = models.BigAutoField(primary_key=True)
+    ride = models.ForeignKey('rides.Ride',
+                             on_delete=models.CASCADE,
+                             related_name='waitlist')
+    user = models.ForeignKey('users.User',
+                             on_delete=models.CASCADE,
+                             related_name='+')
+
+    class Meta(CrideModel.Meta):
+        """ Meta option. """
+        ordering = ['id']
+        unique_together = ('ride', 'user')
+        indexes = [models.Index(fields=['ride', 'id'])]
+
+    def __str__(self):
+        """ Return user and ride. """
+        return '@{} waiting for {}'.format(self.user, self.ride)
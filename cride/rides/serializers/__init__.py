@@ -1 +1,3 @@
 from .ride import *
+from .rows import *
+from .suggestions import *
@@ -7,14 +7,22 @@ from datetime import timedelta
 # Django REST Framework
 from rest_framework import serializers
 
+# Django
+from django.db import router, transaction
+
 # Models
-from cride.rides.models import Ride
+from cride.events.models import OutboxEvent
+from cride.rides.models import Ride, WaitlistEntry
 from cride.circles.models import Membership
 from cride.users.models import User
 
 # Serializers
 from cride.users.serializers import UserModelSerializer
 
+# Utilities
+from cride.events.outbox import record
+from cride.rides.waitlist import add_passenger, promote
+
 
 class RideModelSerializer(serializers.ModelSerializer):
     """ Ride model serializer. """
@@ -31,13 +39,24 @@ class RideModelSerializer(serializers.ModelSerializer):
         read_only_fields = ('offered_in', 'offered_by', 'rating')
 
     def update(self, instance, validated_data):
-        """ Allow updates only before departure date. """
-        now = timezone.now()
-        if instance.departure_date <= now:
-            raise serializers.ValidationError(
-                'Ongoing rides cannot be modified.')
-        return super(RideModelSerializer, self).update(instance,
-                                                       validated_data)
+        """ Allow updates only before departure date.
+
+        The changes are applied to the ride read again holding its lock, so
+        seats taken by joins since the ride was loaded aren't overwritten,
+        and added seats are promoted before any other join gets them. """
+        with transaction.atomic(using=router.db_for_write(
+                Ride, instance=instance)):
+            ride = Ride.objects.select_for_update().get(pk=instance.pk)
+            if ride.departure_date <= timezone.now():
+                raise serializers.ValidationError(
+                    'Ongoing rides cannot be modified.')
+            available_seats = ride.available_seats
+            ride = super(RideModelSerializer, self).update(ride,
+                                                           validated_data)
+            if ride.available_seats > available_seats:
+                promote(ride)
+                ride.refresh_from_db()
+        return ride
 
 
 class CreateRideSerializer(serializers.ModelSerializer):
@@ -91,24 +110,20 @@ class CreateRideSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        """ Create ride and update stats. """
+        """ Create ride and update stats.
+
+        The profile and circle stats and the members notification follow
+        the ride_created event. """
         circle = self.context['circle']
         ride = Ride.objects.create(**validated_data, offered_in=circle)
 
-        # Circle
-        circle.rides_offered += 1
-        circle.save()
-
         # Membership
         membership = self.context['membership']
         membership.rides_offered += 1
         membership.save()
 
-        # Profile
-        profile = validated_data['offered_by'].profile
-        profile.rides_offered += 1
-        profile.save()
-
+        record(OutboxEvent.RIDE_CREATED, circle, ride=ride.pk,
+               user=ride.offered_by_id, available_seats=ride.available_seats)
         return ride
 
 
@@ -149,39 +164,38 @@ class JoinRideSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Join can't join this ride now"
             )
-        if ride.available_seats < 1:
-            raise serializers.ValidationError("Ride is already full!")
 
-        ride_passengers = ride.passenger.all()
-        ride_passengers_pk = [r.pk for r in ride_passengers]
-        if attrs['passenger'] in ride_passengers_pk:
+        self.check_not_joined(ride, attrs['passenger'])
+        return attrs
+
+    def check_not_joined(self, ride, passenger):
+        """ Verify the passenger isn't in the ride or its waitlist yet. """
+        if ride.passenger.filter(pk=passenger).exists():
             raise serializers.ValidationError(
                 'Passenger is already in this trip.')
-        return attrs
+        if ride.waitlist.filter(user=passenger).exists():
+            raise serializers.ValidationError(
+                'Passenger is already in the waitlist.')
 
     def update(self, instance, validated_data):
-        """ Add passenger to ride, and update stats. """
-        ride = self.context['ride']
-        user = self.context['user']
-
-        ride.passenger.add(user)
-        instance.available_seats -= 1
-        instance.save()
-
-        # Profile
-        profile = user.profile
-        profile.rides_taken += 1
-        profile.save()
-
-        # Membership
-        member = self.context['member']
-        member.rides_taken += 1
-        member.save()
-
-        # Circle
-        circle = self.context['circle']
-        circle.rides_taken += 1
-        circle.save()
+        """ Add passenger to ride, and update stats.
 
+        Passengers of full rides are added to the waitlist instead, the
+        entry is left in waitlist_entry. The passenger is checked again
+        holding the ride lock, concurrent joins of a user validate before
+        any of them is saved. """
+        self.waitlist_entry = None
+        user = self.context['user']
+        with transaction.atomic(using=router.db_for_write(
+                Ride, instance=instance)):
+            ride = Ride.objects.select_for_update().get(pk=instance.pk)
+            self.check_not_joined(ride, user.pk)
+            if ride.available_seats < 1:
+                self.waitlist_entry, created = \
+                    WaitlistEntry.objects.get_or_create(ride=ride, user=user)
+                if not created:
+                    raise serializers.ValidationError(
+                        'Passenger is already in the waitlist.')
+            else:
+                add_passenger(ride, self.context['member'])
         return ride
-
@@ -0,0 +1,34 @@
+""" Rides row serializers. """
+
+# Models
+from cride.rides.models import Ride
+
+# Serializers
+from cride.users.serializers import UserRowSerializer
+
+# Utilities
+from cride.utils.serializers import (RowSerializer, RowField, FloatRowField,
+                                     DateTimeRowField, StringRowField,
+                                     NestedRowField, ManyRowField)
+
+
+class RideRowSerializer(RowSerializer):
+    """ Ride row serializer, stands for RideModelSerializer. """
+
+    model = Ride
+    fields = (
+        ('id', RowField()),
+        ('offered_by', NestedRowField(UserRowSerializer)),
+        ('offered_in', StringRowField('offered_in', 'name')),
+        ('passenger', ManyRowField(UserRowSerializer, 'passengers')),
+        ('created', DateTimeRowField()),
+        ('modified', DateTimeRowField()),
+        ('available_seats', RowField()),
+        ('comments', RowField()),
+        ('departure_location', RowField()),
+        ('departure_date', DateTimeRowField()),
+        ('arrival_location', RowField()),
+        ('arrival_date', DateTimeRowField()),
+        ('rating', FloatRowField()),
+        ('is_active', RowField()),
+    )
@@ -0,0 +1,28 @@
+""" Ride suggestions serializers. """
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Utilities
+from datetime import timedelta
+
+
+class RideSuggestionSerializer(serializers.Serializer):
+    """ Ride suggestions query serializer. """
+
+    origin = serializers.CharField(max_length=255)
+    destination = serializers.CharField(max_length=255)
+    departure_after = serializers.DateTimeField()
+    departure_before = serializers.DateTimeField()
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+    def validate(self, data):
+        """ Verify the time window. """
+        window = data['departure_before'] - data['departure_after']
+        if window < timedelta(0):
+            raise serializers.ValidationError(
+                'The window must end after it starts.')
+        if window > timedelta(days=7):
+            raise serializers.ValidationError(
+                'The window cannot be longer than a week.')
+        return data
@@ -0,0 +1,181 @@
+""" Ride suggestions.
+
+Candidate rides of every active circle of the passenger are fetched with
+a single query per shard, merged by departure date and scored in batches
+with NumPy on departure time, location similarity, free seats and driver
+reputation. """
+
+# Django
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Membership
+from cride.rides.models import Ride
+
+# Utilities
+from cride.utils.shards import shards
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice, repeat
+from typing import List, Tuple
+import heapq
+import re
+import time
+import unicodedata
+import numpy as np
+import zlib
+
+
+WEIGHTS = {
+    'time': 0.35,
+    'origin': 0.2,
+    'destination': 0.25,
+    'seats': 0.05,
+    'reputation': 0.15,
+}
+
+# Rides departing up to SLACK out of the window are still suggested, with
+# a lower time score.
+SLACK = timedelta(hours=1)
+MAX_CANDIDATES = 50000
+BATCH_SIZE = 5000
+# Scoring stops after BUDGET seconds, candidates are scored by departure
+# date so the earliest rides of the window are always considered.
+BUDGET = 0.25
+
+FEATURES = 256
+MAX_SEATS = 4
+MAX_REPUTATION = 5.0
+
+CANDIDATE_COLUMNS = ('pk', 'departure_date', 'available_seats',
+                     'offered_by__profile__reputation',
+                     'departure_location', 'arrival_location')
+
+
+def normalize(text):
+    """ Return text lowercased, without accents nor punctuation. """
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', text))
+
+
+@lru_cache(maxsize=20000)
+def location_vector(location):
+    """ Return the unit vector of the location character trigrams.
+
+    Trigrams are hashed into FEATURES buckets, the dot product of two
+    vectors is the cosine similarity of the locations. """
+    text = ' {} '.format(normalize(location))
+    vector = np.zeros(FEATURES, dtype=np.float32)
+    for i in range(len(text) - 2):
+        vector[zlib.crc32(text[i:i + 3].encode()) % FEATURES] += 1
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    vector.setflags(write=False)
+    return vector
+
+
+def location_similarity(locations, location):
+    """ Return the similarity of every location to location.
+
+    Locations repeat a lot, every distinct one is vectorized once. """
+    unique, inverse = np.unique(np.array(locations, dtype=object),
+                                return_inverse=True)
+    matrix = np.stack([location_vector(name) for name in unique])
+    return (matrix @ location_vector(location))[inverse]
+
+
+def candidates(user, departure_after, departure_before, using=None):
+    """ Return the rides the user could join around the time window, from
+    the using shard. """
+    circles = Membership.objects.using(using).filter(
+        user=user,
+        is_active=True
+    ).values('circle')
+    start = max(departure_after - SLACK,
+                timezone.now() + timedelta(minutes=10))
+    return Ride.objects.using(using).filter(
+        offered_in__in=circles,
+        is_active=True,
+        available_seats__gte=1,
+        departure_date__gte=start,
+        departure_date__lte=departure_before + SLACK
+    ).exclude(
+        offered_by=user
+    ).exclude(
+        passenger=user
+    ).order_by('departure_date').values_list(
+        *CANDIDATE_COLUMNS)[:MAX_CANDIDATES]
+
+
+def score(rows, origin, destination, departure_after, departure_before):
+    """ Return the pks and scores of a batch of candidate rows. """
+    count = len(rows)
+    columns = list(zip(*rows))
+    origins, destinations = columns[4], columns[5]
+    pks = np.fromiter(columns[0], dtype=np.int64, count=count)
+    departures = np.fromiter((d.timestamp() for d in columns[1]),
+                             dtype=np.float64, count=count)
+    seats = np.fromiter(columns[2], dtype=np.float64, count=count)
+    reputations = np.array(columns[3], dtype=np.float64)
+
+    distance = (np.maximum(departure_after.timestamp() - departures, 0) +
+                np.maximum(departures - departure_before.timestamp(), 0))
+    scores = (
+        WEIGHTS['time'] * np.clip(
+            1 - distance / SLACK.total_seconds(), 0, 1) +
+        WEIGHTS['origin'] * location_similarity(origins, origin) +
+        WEIGHTS['destination'] * location_similarity(destinations,
+                                                     destination) +
+        WEIGHTS['seats'] * np.minimum(seats, MAX_SEATS) / MAX_SEATS +
+        WEIGHTS['reputation'] * np.clip(
+            np.nan_to_num(reputations) / MAX_REPUTATION, 0, 1)
+    )
+    return pks, scores
+
+
+def departure_date(item):
+    """ Return the departure date of a (alias, row) candidate. """
+    return item[1][1]
+
+
+def candidate_batches(user, departure_after, departure_before):
+    """ Yield the candidate rows of every shard by departure date, in
+    (aliases, rows) batches of up to BATCH_SIZE rows, aliases holding the
+    shard of every row. Shards are read together, so the budget goes to
+    the earliest rides of all of them. """
+    rows = heapq.merge(*[
+        zip(repeat(alias), candidates(
+            user, departure_after, departure_before,
+            using=alias).iterator(chunk_size=BATCH_SIZE))
+        for alias in shards()
+    ], key=departure_date)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            return
+        aliases, batch_rows = zip(*batch)
+        yield list(aliases), list(batch_rows)
+
+
+def suggest_rides(user, origin, destination, departure_after,
+                  departure_before, limit=10, budget=BUDGET):
+    """ Return the (pk, score, shard) of the best rides for the user, best
+    first. shard is the alias of the database holding the ride. """
+    deadline = time.perf_counter() + budget
+    best: List[Tuple[float, int, str]] = []
+    for aliases, batch in candidate_batches(user, departure_after,
+                                            departure_before):
+        pks, scores = score(batch, origin, destination, departure_after,
+                            departure_before)
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit)[:limit]
+            pks, scores = pks[top], scores[top]
+            aliases = [aliases[index] for index in top]
+        best = heapq.nlargest(limit, best + list(
+            zip(scores.tolist(), pks.tolist(), aliases)
+        ), key=lambda item: item[:2])
+        if time.perf_counter() > deadline:
+            break
+    return [(pk, value, alias) for value, pk, alias in best]
@@ -0,0 +1,86 @@
+""" Rides archive tests. """
+
+# Django
+from django.test import TestCase
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import ArchivedRide, Ride
+
+# Utilities
+from cride.exports.datasets import DATASETS
+from cride.rides.archive import archive_rides
+from cride.rides.exports import ride_export_rows
+from cride.utils.fixtures import FixtureLoader
+from datetime import timedelta
+
+
+class ArchiveRidesTestCase(TestCase):
+    """ Rides archival test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=40, circles=2, rides=120, passenger_ratio=1,
+                      history_days=60, future_days=10).load()
+        self.now = timezone.now()
+        self.before = self.now - timedelta(days=20)
+
+    def export(self):
+        start = self.now - timedelta(days=90)
+        end = self.now + timedelta(days=30)
+        return list(ride_export_rows(Circle.objects.all(), start, end,
+                                     chunk_size=7))
+
+    def test_archive(self):
+        """ Finished rides are moved with their passengers. """
+        Passenger = Ride.passenger.through
+        finished = set(Ride.objects.filter(
+            arrival_date__lt=self.before).values_list('pk', flat=True))
+        passengers = set(Passenger.objects.filter(
+            ride__in=finished).values_list('ride', 'user'))
+        created = dict(Ride.objects.values_list('pk', 'created'))
+        self.assertTrue(finished)
+        self.assertTrue(passengers)
+
+        self.assertEqual(archive_rides(self.before, chunk_size=7),
+                         len(finished))
+
+        self.assertFalse(Ride.objects.filter(pk__in=finished).exists())
+        self.assertFalse(Passenger.objects.filter(ride__in=finished).exists())
+        self.assertEqual(set(ArchivedRide.objects.values_list('pk',
+                                                              flat=True)),
+                         finished)
+        self.assertEqual(set(ArchivedRide.passenger.through.objects.
+                             values_list('archivedride', 'user')),
+                         passengers)
+        for pk, date in ArchivedRide.objects.values_list('pk', 'created'):
+            self.assertEqual(date, created[pk])
+        self.assertEqual(archive_rides(self.before), 0)
+
+    def test_chunks(self):
+        """ Archival stops after the given number of chunks. """
+        self.assertEqual(archive_rides(self.before, chunk_size=5, chunks=2),
+                         10)
+        self.assertEqual(ArchivedRide.objects.count(), 10)
+
+    def test_exports(self):
+        """ Exports read rides and archived rides alike. """
+        rows = self.export()
+        dataset = DATASETS['rides']
+        dataset_rows = dataset.chunk({}, None, 1000)
+
+        archive_rides(self.before, chunk_size=7)
+
+        self.assertTrue(ArchivedRide.objects.exists())
+        self.assertEqual(self.export(), rows)
+        self.assertEqual(dataset.count({}), len(dataset_rows))
+        chunks = []
+        last_pk = None
+        while True:
+            chunk = dataset.chunk({}, last_pk, 9)
+            if not chunk:
+                break
+            chunks.extend(chunk)
+            last_pk = chunk[-1][0]
+        self.assertEqual(chunks, dataset_rows)
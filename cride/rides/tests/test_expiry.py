@@ -0,0 +1,82 @@
+""" Rides expiry tests. """
+
+# Django
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Circle
+from cride.events.models import OutboxEvent
+from cride.rides.models import Ride
+from cride.users.models import User
+
+# Tasks
+from cride.taskapp.tasks import disable_finished_rides
+
+# Utilities
+from datetime import timedelta
+
+
+def create_ride(departure, arrival):
+    user = User.objects.create_user(
+        email='nicolas@comparteride.com',
+        username='nicolas',
+        password='admin1234',
+        first_name='Nicolas',
+        last_name='Catalano'
+    )
+    circle = Circle.objects.create(
+        name='Facultad de Ciencias',
+        slug_name='fciencias',
+        about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+    )
+    return Ride.objects.create(
+        offered_by=user,
+        offered_in=circle,
+        departure_location='Ciudad Universitaria',
+        departure_date=departure,
+        arrival_location='Centro',
+        arrival_date=arrival,
+    )
+
+
+class DisableFinishedRidesTestCase(TestCase):
+    """ Rides expiry sweep test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        now = timezone.now()
+        self.ride = create_ride(now - timedelta(hours=2),
+                                now - timedelta(hours=1))
+
+    def test_idempotent(self):
+        """ Arrived rides are disabled once. """
+        self.assertEqual(disable_finished_rides(), 1)
+        self.assertEqual(disable_finished_rides(), 0)
+        self.ride.refresh_from_db()
+        self.assertFalse(self.ride.is_active)
+
+    def test_postponed(self):
+        """ Rides moved to a later arrival stay active. """
+        Ride.objects.filter(pk=self.ride.pk).update(
+            arrival_date=timezone.now() + timedelta(hours=1))
+        self.assertEqual(disable_finished_rides(), 0)
+        self.assertTrue(Ride.objects.get(pk=self.ride.pk).is_active)
+
+    @override_settings(RIDES_EXPIRY_CHUNK_SIZE=2)
+    def test_chunks(self):
+        """ Arrived rides are disabled in chunks, upcoming ones are left. """
+        now = timezone.now()
+        for hours in (-3, -2, 1):
+            Ride.objects.create(
+                offered_by=self.ride.offered_by,
+                offered_in=self.ride.offered_in,
+                departure_location='Centro',
+                departure_date=now + timedelta(hours=hours - 1),
+                arrival_location='Ciudad Universitaria',
+                arrival_date=now + timedelta(hours=hours),
+            )
+        self.assertEqual(disable_finished_rides(), 3)
+        self.assertEqual(Ride.objects.filter(is_active=True).count(), 1)
+        self.assertEqual(OutboxEvent.objects.filter(
+            name=OutboxEvent.RIDE_EXPIRED).count(), 3)
@@ -0,0 +1,244 @@
+""" Live ride feed tests. """
+
+# Django
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Tasks
+from cride.taskapp.tasks import disable_finished_rides
+
+# Utilities
+from asgiref.sync import async_to_sync, sync_to_async
+from cride.events.outbox import relay_events
+from cride.rides.live import live_routes
+from cride.utils.pubsub import LocalBroker, RedisBroker
+from datetime import timedelta
+from typing import List
+import asyncio
+import json
+
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+async def not_found(scope, receive, send):
+    raise AssertionError('Not a stream.')
+
+
+class LiveFeedTestCase(TransactionTestCase):
+    """ Live ride feed test case.
+
+    Streams query the database from the thread pool, so the data must be
+    committed for them to see it. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        self.tokens = {}
+        for name in ('driver', 'ana', 'outsider'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Profile.objects.create(user=user)
+            if name != 'outsider':
+                Membership.objects.create(user=user, profile=user.profile,
+                                          circle=self.circle)
+            self.tokens[name] = Token.objects.create(user=user).key
+        self.path = '/circles/fciencias/rides/stream/'
+        self.app = live_routes(not_found)
+
+    def open_stream(self, path, token=None, method='GET', query_string=b''):
+        """ Start the stream application, return its task and the
+        receive and send queues. """
+        headers = []
+        if token is not None:
+            headers.append((b'authorization',
+                            'Token {}'.format(token).encode()))
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query_string,
+            'headers': headers,
+        }
+        receive: asyncio.Queue = asyncio.Queue()
+        sent: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(self.app(scope, receive.get, sent.put))
+        return task, receive, sent
+
+    def request(self, path, token=None, method='GET', query_string=b''):
+        """ Return the status and body of a refused stream. """
+        async def run():
+            task, _, sent = self.open_stream(path, token, method,
+                                             query_string)
+            await asyncio.wait_for(task, 5)
+            start, body = await sent.get(), await sent.get()
+            return start['status'], json.loads(body['body'])
+        return async_to_sync(run)()
+
+    def api(self, name, method, url, data=None):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(
+            self.tokens[name]))
+        return getattr(client, method)(url, data, format='json')
+
+    def offer_ride(self):
+        departure = timezone.now() + timedelta(days=1)
+        self.api('driver', 'post', '/circles/fciencias/rides/', {
+            'available_seats': 2,
+            'departure_location': 'Ciudad Universitaria',
+            'departure_date': departure.isoformat(),
+            'arrival_location': 'Centro',
+            'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+        })
+        return Ride.objects.get()
+
+    def join_and_expire(self):
+        ride = self.offer_ride()
+        self.api('ana', 'post',
+                 '/circles/fciencias/rides/{}/join/'.format(ride.pk))
+        Ride.objects.update(arrival_date=timezone.now())
+        disable_finished_rides()
+        relay_events()
+        return ride
+
+    @override_settings(LIVE_FEED_KEEPALIVE=0.05)
+    def test_stream(self):
+        """ Members get the ride events of their circle. """
+        async def run():
+            task, receive, sent = self.open_stream(self.path,
+                                                   self.tokens['ana'])
+            start = await sent.get()
+            self.assertEqual(start['status'], 200)
+            self.assertIn((b'content-type', b'text/event-stream'),
+                          start['headers'])
+            self.assertEqual((await sent.get())['body'], b'retry: 5000\n\n')
+            self.assertEqual((await sent.get())['body'], KEEPALIVE)
+
+            ride = await sync_to_async(self.join_and_expire)()
+            frames: List[bytes] = []
+            while len(frames) < 3:
+                message = await asyncio.wait_for(sent.get(), 5)
+                frames.extend(frame for frame in message['body'].split(
+                    b'\n\n') if frame and frame + b'\n\n' != KEEPALIVE)
+
+            await receive.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 5)
+            return ride, frames
+
+        ride, frames = async_to_sync(run)()
+        events = [dict(line.split(': ', 1) for line in
+                       frame.decode().split('\n')) for frame in frames]
+        self.assertEqual([event['event'] for event in events],
+                         ['ride_created', 'ride_joined', 'ride_expired'])
+        self.assertEqual([json.loads(event['data']) for event in events], [
+            {'ride': ride.pk, 'available_seats': 2},
+            {'ride': ride.pk, 'available_seats': 1},
+            {'ride': ride.pk},
+        ])
+        self.assertLess(int(events[0]['id']), int(events[1]['id']))
+
+    def test_refused(self):
+        """ Streams require an active member. """
+        self.assertEqual(self.request(self.path)[0], 401)
+        self.assertEqual(self.request(self.path, 'invalid')[0], 401)
+        self.assertEqual(self.request(self.path, self.tokens['outsider'])[0],
+                         403)
+        self.assertEqual(self.request('/circles/fingenieria/rides/stream/',
+                                      self.tokens['ana'])[0], 404)
+        self.assertEqual(self.request(self.path, self.tokens['ana'],
+                                      'POST')[0], 405)
+
+    def test_stream_token(self):
+        """ Browsers open the stream with a stream token. """
+        response = self.api('ana', 'post',
+                            '/circles/fciencias/rides/stream-token/')
+        self.assertEqual(response.status_code, 200)
+        query_string = 'token={}'.format(response.data['token']).encode()
+
+        async def run():
+            task, receive, sent = self.open_stream(
+                self.path, query_string=query_string)
+            status = (await sent.get())['status']
+            await receive.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 5)
+            return status
+
+        self.assertEqual(async_to_sync(run)(), 200)
+        self.assertEqual(self.request(self.path,
+                                      query_string=b'token=invalid')[0], 401)
+        with override_settings(LIVE_FEED_TOKEN_MAX_AGE=-1):
+            self.assertEqual(self.request(self.path,
+                                          query_string=query_string)[0], 401)
+        # Tokens only open the stream of their circle.
+        circle = Circle.objects.create(name='Ingenieria',
+                                       slug_name='fingenieria')
+        ana = User.objects.get(username='ana')
+        Membership.objects.create(user=ana, profile=ana.profile,
+                                  circle=circle)
+        self.assertEqual(self.request('/circles/fingenieria/rides/stream/',
+                                      query_string=query_string)[0], 403)
+
+    def test_redis_channels(self):
+        """ The Redis listener only subscribes to the channels with
+        subscribers. """
+        class PubSub:
+            def __init__(self):
+                self.calls = []
+
+            def subscribe(self, *channels):
+                self.calls.append(('subscribe',) + channels)
+
+            def unsubscribe(self, *channels):
+                self.calls.append(('unsubscribe',) + channels)
+
+        broker, pubsub = RedisBroker('redis://localhost'), PubSub()
+
+        async def run():
+            with LocalBroker.subscribe(broker, 'rides:1'):
+                with LocalBroker.subscribe(broker, 'rides:2'):
+                    subscribed = broker.update_channels(pubsub, set())
+                subscribed = broker.update_channels(pubsub, subscribed)
+            return broker.update_channels(pubsub, subscribed)
+
+        self.assertEqual(async_to_sync(run)(), set())
+        self.assertEqual(pubsub.calls, [
+            ('subscribe', 'live:rides:1', 'live:rides:2'),
+            ('unsubscribe', 'live:rides:2'),
+            ('unsubscribe', 'live:rides:1'),
+        ])
+
+    def test_slow_subscriber(self):
+        """ Subscribers falling behind are closed. """
+        broker = LocalBroker()
+
+        async def run():
+            with broker.subscribe('rides:1', size=2) as subscription:
+                for message in (b'a', b'b'):
+                    broker.publish('rides:1', message)
+                await asyncio.sleep(0)
+                self.assertEqual(await subscription.read(1), [b'a', b'b'])
+                for message in (b'c', b'd', b'e'):
+                    broker.publish('rides:1', message)
+                await asyncio.sleep(0)
+                self.assertIsNone(await subscription.read(1))
+            self.assertEqual(broker.subscriptions, {})
+
+        async_to_sync(run)()
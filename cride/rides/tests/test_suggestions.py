@@ -0,0 +1,142 @@
+""" Ride suggestions tests. """
+
+# Django
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.rides.suggestions import location_similarity
+from datetime import timedelta
+
+
+class LocationSimilarityTestCase(SimpleTestCase):
+    """ Location similarity test case. """
+
+    def test_similarity(self):
+        """ Spelling variants score higher than other places. """
+        similarity = location_similarity(
+            ['Ciudad Universitaria', 'ciudad universitária.', 'Centro',
+             'Ciudad Universitaria'],
+            'Ciudad Universitaria'
+        )
+        self.assertAlmostEqual(similarity[0], 1, places=5)
+        self.assertAlmostEqual(similarity[1], 1, places=5)
+        self.assertAlmostEqual(similarity[3], 1, places=5)
+        self.assertLess(similarity[2], 0.3)
+
+
+class RideSuggestionsTestCase(TestCase):
+    """ Ride suggestions endpoint test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.user = self.create_user('nicolas')
+        self.driver = self.create_user('pablo')
+        self.circles = [self.create_circle(slug) for slug in
+                        ('fciencias', 'unam', 'otro')]
+        for circle in self.circles[:2]:
+            self.join(self.user, circle)
+        for circle in self.circles:
+            self.join(self.driver, circle)
+
+        self.now = timezone.now()
+        self.start = self.now + timedelta(hours=3)
+        self.rides = {}
+        for name, circle, hours, origin, seats in (
+            ('match', 0, 3.5, 'Ciudad Universitaria', 3),
+            ('other_circle', 1, 3.2, 'Ciudad Universitaria', 2),
+            ('late', 0, 4.3, 'Ciudad Universitaria', 3),
+            ('elsewhere', 1, 3.5, 'Aeropuerto', 3),
+            ('not_member', 2, 3.5, 'Ciudad Universitaria', 3),
+            ('too_late', 0, 8, 'Ciudad Universitaria', 3),
+            ('full', 0, 3.5, 'Ciudad Universitaria', 0),
+        ):
+            self.rides[name] = self.create_ride(self.driver, circle, hours,
+                                                origin, seats)
+        self.rides['own'] = self.create_ride(self.user, 0, 3.5,
+                                             'Ciudad Universitaria', 3)
+        self.rides['joined'] = self.create_ride(self.driver, 0, 3.5,
+                                                'Ciudad Universitaria', 3)
+        self.rides['joined'].passenger.add(self.user)
+
+        token = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+
+    def create_user(self, username):
+        user = User.objects.create(
+            first_name=username,
+            last_name='Catalano',
+            email='{}@comparteride.com'.format(username),
+            username=username,
+            password='nico1234'
+        )
+        Profile.objects.create(user=user)
+        return user
+
+    def create_circle(self, slug_name):
+        return Circle.objects.create(name=slug_name, slug_name=slug_name,
+                                     about=slug_name)
+
+    def join(self, user, circle):
+        Membership.objects.create(user=user, profile=user.profile,
+                                  circle=circle)
+
+    def create_ride(self, user, circle, hours, origin, seats):
+        departure = self.now + timedelta(hours=hours)
+        return Ride.objects.create(
+            offered_by=user,
+            offered_in=self.circles[circle],
+            available_seats=seats,
+            departure_location=origin,
+            departure_date=departure,
+            arrival_location='Centro',
+            arrival_date=departure + timedelta(hours=1),
+        )
+
+    def suggest(self, **params):
+        params.setdefault('origin', 'ciudad universitaria')
+        params.setdefault('destination', 'Centro')
+        params.setdefault('departure_after', self.start.isoformat())
+        params.setdefault('departure_before',
+                          (self.start + timedelta(hours=1)).isoformat())
+        return self.client.get('/rides/suggestions/', params)
+
+    def test_suggestions(self):
+        """ Rides of the user's circles are ranked by how well they fit. """
+        response = self.suggest()
+        self.assertEqual(response.status_code, 200)
+        ids = [ride['id'] for ride in response.data]
+        self.assertEqual(ids, [self.rides[name].pk for name in
+                               ('match', 'other_circle', 'late',
+                                'elsewhere')])
+        scores = [ride['score'] for ride in response.data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(response.data[0]['offered_in'], 'fciencias')
+        self.assertEqual(response.data[0]['offered_by']['username'], 'pablo')
+
+    def test_limit(self):
+        """ Only the best limit rides are returned. """
+        response = self.suggest(limit=2)
+        self.assertEqual([ride['id'] for ride in response.data],
+                         [self.rides['match'].pk,
+                          self.rides['other_circle'].pk])
+
+    def test_invalid_window(self):
+        """ Windows must end after they start. """
+        response = self.suggest(departure_before=self.now.isoformat())
+        self.assertEqual(response.status_code, 400)
+
+    def test_authentication(self):
+        """ Suggestions are only available to authenticated users. """
+        self.client.credentials()
+        self.assertEqual(self.suggest().status_code, 401)
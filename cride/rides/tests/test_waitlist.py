@@ -0,0 +1,177 @@
+""" Rides waitlist tests. """
+
+# Django
+from django.test import TestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride, WaitlistEntry
+from cride.users.models import User, Profile
+
+# Serializers
+from cride.rides.serializers import JoinRideSerializer, RideModelSerializer
+
+# Utilities
+from cride.events.outbox import relay_events
+from datetime import timedelta
+
+
+class WaitlistTestCase(TestCase):
+    """ Rides waitlist test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        self.users = {}
+        for name in ('driver', 'ana', 'juan', 'lucia'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Membership.objects.create(
+                user=user,
+                profile=Profile.objects.create(user=user),
+                circle=self.circle
+            )
+            self.users[name] = user
+        departure = timezone.now() + timedelta(days=1)
+        self.ride = Ride.objects.create(
+            offered_by=self.users['driver'],
+            offered_in=self.circle,
+            available_seats=1,
+            departure_location='Ciudad Universitaria',
+            departure_date=departure,
+            arrival_location='Centro',
+            arrival_date=departure + timedelta(hours=1),
+        )
+        self.url = '/circles/fciencias/rides/{}/'.format(self.ride.pk)
+
+    def client_for(self, name):
+        token, _ = Token.objects.get_or_create(user=self.users[name])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token.key))
+        return client
+
+    def post(self, name, action):
+        return self.client_for(name).post(self.url + action + '/')
+
+    def passengers(self):
+        return sorted(self.ride.passenger.values_list('username', flat=True))
+
+    def rides_taken(self, name):
+        return Membership.objects.get(user=self.users[name]).rides_taken
+
+    def test_join_full_ride(self):
+        """ Joining a full ride queues the member. """
+        self.assertEqual(self.post('ana', 'join').status_code, 200)
+
+        response = self.post('juan', 'join')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data, {'position': 1, 'size': 1})
+        response = self.post('lucia', 'join')
+        self.assertEqual(response.data, {'position': 2, 'size': 2})
+
+        response = self.client_for('lucia').get(self.url + 'waitlist/')
+        self.assertEqual(response.data, {'position': 2, 'size': 2})
+        self.assertEqual(self.post('lucia', 'join').status_code, 400)
+        self.assertEqual(self.passengers(), ['ana'])
+
+    def test_leave_promotes_head(self):
+        """ A freed seat goes to the head of the waitlist. """
+        for name in ('ana', 'juan', 'lucia'):
+            self.post(name, 'join')
+
+        response = self.post('ana', 'leave')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['available_seats'], 0)
+        self.assertEqual(self.passengers(), ['juan'])
+        self.assertEqual(self.rides_taken('ana'), 0)
+        self.assertEqual(self.rides_taken('juan'), 1)
+        relay_events()
+        self.assertEqual(Circle.objects.get().rides_taken, 1)
+
+        response = self.client_for('lucia').get(self.url + 'waitlist/')
+        self.assertEqual(response.data, {'position': 1, 'size': 1})
+        self.assertEqual(self.post('ana', 'leave').status_code, 400)
+        response = self.client_for('juan').get(self.url + 'waitlist/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_more_seats_promote(self):
+        """ Seats added by the driver go to the waitlist. """
+        for name in ('ana', 'juan', 'lucia'):
+            self.post(name, 'join')
+
+        response = self.client_for('driver').patch(
+            self.url, {'available_seats': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.passengers(), ['ana', 'juan', 'lucia'])
+        self.assertEqual(Ride.objects.get().available_seats, 1)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_leave_waitlist(self):
+        """ Members can leave the waitlist. """
+        for name in ('ana', 'juan', 'lucia'):
+            self.post(name, 'join')
+
+        client = self.client_for('juan')
+        self.assertEqual(client.delete(self.url + 'waitlist/').status_code,
+                         204)
+        self.assertEqual(client.delete(self.url + 'waitlist/').status_code,
+                         404)
+        self.post('ana', 'leave')
+        self.assertEqual(self.passengers(), ['lucia'])
+
+    def join_serializer(self, name):
+        serializer = JoinRideSerializer(
+            self.ride,
+            data={'passenger': self.users[name].pk},
+            context={'ride': self.ride, 'circle': self.circle},
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def test_concurrent_joins(self):
+        """ Joins validated together only add the passenger once. """
+        for name in ('ana', 'juan'):
+            first, second = self.join_serializer(name), \
+                self.join_serializer(name)
+            first.save()
+            with self.assertRaises(ValidationError):
+                second.save()
+        self.assertEqual(self.passengers(), ['ana'])
+        self.assertEqual(self.rides_taken('ana'), 1)
+        self.assertEqual(WaitlistEntry.objects.filter(ride=self.ride).count(),
+                         1)
+
+    def test_update_after_join(self):
+        """ A driver update loaded before a join keeps the joined seat, and
+        added seats go to the waitlist instead of the join. """
+        ride = Ride.objects.get(pk=self.ride.pk)
+        self.join_serializer('ana').save()
+        self.join_serializer('juan').save()
+
+        serializer = RideModelSerializer(
+            ride, data={'comments': 'Salimos puntual'}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save().available_seats, 0)
+
+        serializer = RideModelSerializer(
+            ride, data={'available_seats': 1}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save().available_seats, 0)
+        self.assertEqual(self.passengers(), ['ana', 'juan'])
+        self.assertFalse(WaitlistEntry.objects.exists())
@@ -1,13 +1,16 @@
 """ Rides URLs. """
 
 # Django
-from django.urls import path, include
+from django.conf import settings
+from django.urls import path, re_path, include
 
 # Django REST Framework
 from rest_framework.routers import DefaultRouter
 
 # Views
 from .views import ride as ride_view
+from .views import feed as feed_views
+from .views import suggestions as suggestion_views
 
 router = DefaultRouter()
 router.register(
@@ -15,7 +18,21 @@ router.register(
     ride_view.RideViewSet,
     basename='ride'
 )
+router.register(
+    r'rides/suggestions',
+    suggestion_views.RideSuggestionViewSet,
+    basename='ride-suggestion'
+)
+
+urlpatterns = []
+
+if settings.ASYNC_VIEWS:
+    urlpatterns += [
+        re_path(r'^circles/(?P<slug_name>[-a-zA-Z0-9_]+)/rides/$',
+                feed_views.ride_feed,
+                name='ride-list'),
+    ]
 
-urlpatterns = [
+urlpatterns += [
     path('', include(router.urls)),
 ]
@@ -0,0 +1,32 @@
+""" Rides async views. """
+
+# Django REST Framework
+from rest_framework.generics import get_object_or_404
+
+# Views
+from cride.rides.views.ride import RideViewSet
+
+# Models
+from cride.circles.models import Circle
+
+# Utilities
+from cride.utils.asyncviews import (async_safe_methods, authenticate,
+                                    database_sync_to_async, render,
+                                    viewset_action)
+from cride.utils.shards import use_shard
+
+
+def list_rides(request, user, slug_name):
+    """ Return the circle's available rides page. """
+    circle = get_object_or_404(Circle, slug_name=slug_name)
+    with use_shard(circle.shard):
+        return viewset_action(RideViewSet, 'list', request, user,
+                              {'slug_name': slug_name}, circle=circle)
+
+
+@async_safe_methods(RideViewSet.as_view({'get': 'list', 'post': 'create'}))
+async def ride_feed(request, slug_name):
+    """ List the circle's available rides. """
+    user = await authenticate(request)
+    data = await database_sync_to_async(list_rides)(request, user, slug_name)
+    return render(data)
@@ -1,12 +1,13 @@
 """ Rides views. """
 
 # Utilities
+from django.conf import settings
+from django.http import Http404
 from django.utils import timezone
 from datetime import timedelta
 
 # Django REST Framework
 from rest_framework import mixins, viewsets, status
-from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
@@ -17,6 +18,7 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from cride.rides.serializers.ride import (CreateRideSerializer,
                                           RideModelSerializer,
                                           JoinRideSerializer)
+from cride.rides.serializers.rows import RideRowSerializer
 
 # Permissions
 from rest_framework.permissions import IsAuthenticated
@@ -24,11 +26,23 @@ from cride.circles.permissions.memberships import (IsActiveCircleMember)
 from cride.rides.permissions.ride import (IsRideOwner)
 
 # Models
-from cride.circles.models import Circle
+from cride.circles.models import Membership
+from cride.rides.models import WaitlistEntry
 
-
-class RideViewSet(mixins.CreateModelMixin,
-                  mixins.ListModelMixin,
+# Utilities
+from cride.circles.views.mixins import CircleShardMixin
+from cride.rides.live import stream_token
+from cride.rides.waitlist import remove_passenger, waitlist_position
+from cride.utils.db import ReplicaReadMixin
+from cride.utils.idempotency import IdempotencyMixin
+from cride.utils.views import RowListModelMixin
+
+
+class RideViewSet(IdempotencyMixin,
+                  CircleShardMixin,
+                  ReplicaReadMixin,
+                  mixins.CreateModelMixin,
+                  RowListModelMixin,
                   mixins.UpdateModelMixin,
                   viewsets.GenericViewSet):
 
@@ -36,6 +50,9 @@ class RideViewSet(mixins.CreateModelMixin,
     ordering = ('departure_date', 'arrival_date', 'available_seats')
     ordering_fields = ('departure_date', 'arrival_date', 'available_seats')
     search_fields = ('departure_location', 'arrival_location')
+    lookup_value_regex = '[0-9]+'
+    row_serializer_class = RideRowSerializer
+    idempotent_actions = ('create', 'join')
 
     def get_permissions(self):
         """ Assign permission based on action. """
@@ -44,14 +61,6 @@ class RideViewSet(mixins.CreateModelMixin,
             permissions.append(IsRideOwner)
         return [p() for p in permissions]
 
-    def dispatch(self, request, *args, **kwargs):
-        """ Verify that the circle exists. """
-        slug_name = kwargs['slug_name']
-        self.circle = get_object_or_404(Circle, slug_name=slug_name)
-        return super(RideViewSet, self).dispatch(request,
-                                                 *args,
-                                                 **kwargs)
-
     def get_serializer_context(self):
         """ Add circle to serializer context. """
         context = super(RideViewSet, self).get_serializer_context()
@@ -67,13 +76,27 @@ class RideViewSet(mixins.CreateModelMixin,
         return RideModelSerializer
 
     def get_queryset(self):
-        """ Return active circle's rides. """
+        """ Return active circle's rides.
+
+        Full rides are only hidden from the list, they can still be joined
+        (through their waitlist) and left. """
         offset = timezone.now() + timedelta(minutes=10)
-        return self.circle.ride_set.filter(
+        queryset = self.circle.ride_set.filter(
             departure_date__gte=offset,
-            is_active=True,
-            available_seats__gte=1
+            is_active=True
         )
+        if self.action == 'list':
+            queryset = queryset.filter(available_seats__gte=1)
+        return queryset
+
+    @action(detail=False, methods=['post'], url_path='stream-token')
+    def stream_token(self, request, *args, **kwargs):
+        """ Return a short-lived token opening the live ride feed of the
+        circle, for clients that can't send an Authorization header. """
+        return Response({
+            'token': stream_token(request.user, self.circle),
+            'expires_in': settings.LIVE_FEED_TOKEN_MAX_AGE,
+        }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
     def join(self, request, *args, **kwargs):
@@ -87,6 +110,40 @@ class RideViewSet(mixins.CreateModelMixin,
         )
         serializer.is_valid(raise_exception=True)
         ride = serializer.save()
+        if serializer.waitlist_entry is not None:
+            data = waitlist_position(ride.pk, request.user)
+            return Response(data, status=status.HTTP_202_ACCEPTED)
         data = RideModelSerializer(ride).data
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['post'])
+    def leave(self, request, *args, **kwargs):
+        """ Remove requesting user from ride, the seat goes to the head of
+        the waitlist. """
+        ride = self.get_object()
+        if not ride.passenger.filter(pk=request.user.pk).exists():
+            return Response({'detail': 'You are not in this trip.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        member = Membership.objects.get(user=request.user,
+                                        circle=self.circle)
+        ride = remove_passenger(ride, member)
+        data = RideModelSerializer(ride).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get', 'delete'])
+    def waitlist(self, request, *args, **kwargs):
+        """ Return the requesting user position in the ride waitlist, or
+        leave the waitlist. """
+        entries = WaitlistEntry.objects.filter(ride__offered_in=self.circle,
+                                               ride=kwargs['pk'],
+                                               user=request.user)
+        if request.method == 'DELETE':
+            if not entries.delete()[0]:
+                raise Http404
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        data = waitlist_position(kwargs['pk'], request.user)
+        if data is None:
+            raise Http404
+        return Response(data, status=status.HTTP_200_OK)
+
@@ -0,0 +1,58 @@
+""" Ride suggestions views. """
+
+# Django REST Framework
+from rest_framework import viewsets
+from rest_framework.response import Response
+
+# Serializers
+from cride.rides.serializers import (RideRowSerializer,
+                                     RideSuggestionSerializer)
+
+# Permissions
+from rest_framework.permissions import IsAuthenticated
+
+# Models
+from cride.rides.models import Ride
+
+# Utilities
+from cride.rides.suggestions import suggest_rides
+from cride.utils.db import ReplicaReadMixin
+from cride.utils.shards import use_shard
+from cride.utils.views import RowSerializerMixin
+from typing import Dict, List
+
+
+class RideSuggestionViewSet(ReplicaReadMixin,
+                            RowSerializerMixin,
+                            viewsets.GenericViewSet):
+    """ Ride suggestions view set.
+
+    Suggest the rides of every circle of the requesting user that best
+    match a trip, scored from 0 to 1. """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = RideSuggestionSerializer
+    row_serializer_class = RideRowSerializer
+
+    def list(self, request, *args, **kwargs):
+        """ List the best rides for the trip in the query parameters. """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        suggestions = suggest_rides(request.user, **serializer.validated_data)
+
+        shards: Dict[str, List[int]] = {}
+        for pk, _, alias in suggestions:
+            shards.setdefault(alias, []).append(pk)
+        rows = self.get_row_serializer()
+        rides = {}
+        for alias, pks in shards.items():
+            with use_shard(alias):
+                queryset = Ride.objects.filter(pk__in=pks)
+                values = list(rows.values(queryset))
+                data = rows.serialize(values, using=queryset.db)
+            rides.update({(alias, row['pk']): ride
+                          for row, ride in zip(values, data)})
+        return Response([
+            dict(rides[alias, pk], score=round(score, 4))
+            for pk, score, alias in suggestions if (alias, pk) in rides
+        ])
@@ -0,0 +1,98 @@
+""" Rides waitlist.
+
+Joining a full ride queues the member in the ride waitlist. Whenever seats
+are freed (a passenger leaves or the driver offers more seats) they are
+given to the head of the waitlist in the same transaction, holding the ride
+row lock so joins, leaves and promotions of a ride never interleave.
+
+The membership stats are updated right away, the profile and circle stats
+and the promotion emails follow the ride_joined and ride_left events. """
+
+# Django
+from django.db import router, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Membership
+from cride.events.models import OutboxEvent
+from cride.rides.models import Ride, WaitlistEntry
+
+# Utilities
+from cride.events.outbox import record
+from datetime import timedelta
+
+
+def count_ride_taken(member, delta):
+    """ Add delta to the rides taken by the member. """
+    Membership.objects.filter(pk=member.pk).update(
+        rides_taken=F('rides_taken') + delta)
+
+
+def add_passenger(ride, member, promoted=False):
+    """ Add the member to the passengers of a locked ride. """
+    ride.passenger.add(member.user_id)
+    ride.available_seats -= 1
+    ride.save()
+    count_ride_taken(member, 1)
+    record(OutboxEvent.RIDE_JOINED, ride.offered_in_id, ride=ride.pk,
+           user=member.user_id, available_seats=ride.available_seats,
+           promoted=promoted)
+
+
+def remove_passenger(ride, member):
+    """ Remove the member from the passengers of a ride and give the seat
+    to the waitlist. Does nothing if they already left. """
+    with transaction.atomic(using=router.db_for_write(Ride, instance=ride)):
+        ride = Ride.objects.select_for_update().get(pk=ride.pk)
+        if not ride.passenger.filter(pk=member.user_id).exists():
+            return ride
+        ride.passenger.remove(member.user_id)
+        ride.available_seats += 1
+        ride.save()
+        count_ride_taken(member, -1)
+        record(OutboxEvent.RIDE_LEFT, ride.offered_in_id, ride=ride.pk,
+               user=member.user_id, available_seats=ride.available_seats)
+        promote(ride)
+        ride.refresh_from_db()
+    return ride
+
+
+def promote(ride):
+    """ Give the free seats of a ride to the head of its waitlist and
+    return the promoted members.
+
+    Entries of users that left the circle are dropped. Nobody is promoted
+    once the ride can't be joined anymore. """
+    with transaction.atomic(using=router.db_for_write(Ride, instance=ride)):
+        ride = Ride.objects.select_for_update().get(pk=ride.pk)
+        if not ride.is_active or \
+                ride.departure_date <= timezone.now() + timedelta(minutes=10):
+            return []
+        promoted = []
+        while ride.available_seats > 0:
+            entry = ride.waitlist.first()
+            if entry is None:
+                break
+            entry.delete()
+            member = Membership.objects.filter(
+                user=entry.user_id,
+                circle=ride.offered_in_id,
+                is_active=True
+            ).first()
+            if member is None:
+                continue
+            add_passenger(ride, member, promoted=True)
+            promoted.append(member)
+        return promoted
+
+
+def waitlist_position(ride_pk, user):
+    """ Return the position of the user in the ride waitlist and its size,
+    None if they are not waiting. """
+    entries = WaitlistEntry.objects.filter(ride=ride_pk)
+    entry = entries.filter(user=user).values_list('pk', flat=True).first()
+    if entry is None:
+        return None
+    return entries.aggregate(position=Count('pk', filter=Q(pk__lte=entry)),
+                             size=Count('pk'))
@@ -0,0 +1,14 @@
+""" Celery app config. """
+
+# Django
+from django.apps import AppConfig
+
+
+class CeleryAppConfig(AppConfig):
+    """ Celery app config.
+
+    Doesn't import Celery: web processes only load it when they dispatch
+    their first task (see cride.taskapp.dispatch). """
+
+    name = 'cride.taskapp'
+    verbose_name = 'Celery Config'
@@ -1,8 +1,7 @@
 """Celery app config."""
 
 import os
-from celery import Celery
-from django.apps import apps, AppConfig
+from celery import Celery, signals
 from django.conf import settings
 
 
@@ -19,13 +18,35 @@ app = Celery('cride')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 
-class CeleryAppConfig(AppConfig):
-    name = 'cride.taskapp'
-    verbose_name = 'Celery Config'
+# Tasks modules are imported when the worker starts.
+app.autodiscover_tasks()
 
-    def ready(self):
-        installed_apps = [app_config.name for app_config in apps.get_app_configs()]
-        app.autodiscover_tasks(lambda: installed_apps, force=True)
+
+# Tasks run on the circle shard they were queued from. Eager tasks run in
+# the context of the caller, already routed to it.
+@signals.before_task_publish.connect
+def add_shard_header(headers=None, **kwargs):
+    from cride.utils.shards import current_shard
+
+    shard = current_shard()
+    if shard is not None and headers is not None:
+        headers.setdefault('shard', shard)
+
+
+@signals.task_prerun.connect
+def use_task_shard(task=None, **kwargs):
+    from cride.utils.shards import pin_shard
+
+    if not task.request.is_eager:
+        pin_shard(task.request.get('shard'))
+
+
+@signals.task_postrun.connect
+def reset_task_shard(task=None, **kwargs):
+    from cride.utils.shards import pin_shard
+
+    if not task.request.is_eager:
+        pin_shard(None)
 
 
 @app.task(bind=True)
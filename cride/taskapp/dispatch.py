@@ -0,0 +1,15 @@
+""" Task dispatching. """
+
+
+def send_task(name, *args, **kwargs):
+    """ Queue the task registered as name.
+
+    Tasks are sent by name so the caller doesn't import the tasks modules,
+    and Celery itself is only imported on the first call. Tasks run in
+    process when CELERY_TASK_ALWAYS_EAGER is set. """
+    from cride.taskapp.celery import app
+
+    if app.conf.task_always_eager:
+        app.loader.import_default_modules()
+        return app.tasks[name].apply(args=args, kwargs=kwargs)
+    return app.send_task(name, args=args, kwargs=kwargs)
@@ -1,23 +1,51 @@
 """ Celery task. """
 
 # Utilities
-import jwt
 from datetime import timedelta
-import time
 
 # Django
+from django.apps import apps
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import DatabaseError
 from django.utils import timezone
 
 # Models
 from cride.users.models import User
+from cride.circles.models import Invitation
 from cride.rides.models import Ride
+from cride.notifications.models import PendingNotification
+from cride.exports.models import ExportJob
+
+# Exports
+from cride.exports.runner import ExportConflict, run_export
+
+# Rides
+from cride.rides.archive import archive_rides
+from cride.rides.expiry import expire_rides
+
+# Circles
+from cride.circles.stats import rollup_daily_stats
+
+# Pictures
+from cride.utils.pictures import create_variants
+
+# Shards
+from cride.utils.shards import (CircleMoveInProgress, each_shard,
+                                use_circle_shard)
+
+# Events
+from cride.events.consumers import handle_events as consume_events
+from cride.events.outbox import purge_events
+
+# Notifications
+from cride.notifications.delivery import (notify_members, notify_promotion,
+                                          ride_recipients, send_digests)
 
 # Celery
+from celery import group
 from cride.taskapp.celery import app
-from celery.decorators import periodic_task
 
 
 @app.task(name='send_confirmation_email', max_retries=3)
@@ -44,6 +72,8 @@ def send_confirmation_email(user_pk):
 
 def gen_verification_token(user):
     """ Create JWT token that the user can use to verify its account """
+    import jwt
+
     exp_date = timezone.now() + timedelta(days=3)
     paylod = {
         'user': user.username,
@@ -58,16 +88,167 @@ def gen_verification_token(user):
     return token.decode()
 
 
-@periodic_task(name='disable_finished_rides', run_every=timedelta(minutes=20))
+@app.task(name='disable_finished_rides')
 def disable_finished_rides():
-    """ Disable finish rides. """
-    now = timezone.now()
-    offset = now + timedelta(minutes=20)
-    
-    # Update rides that have already finished
-    rides = Ride.objects.filter(
-        arrival_date__gte=now, 
-        arrival_date__lte=offset,
-        is_active=True
-    )
-    rides.update(is_active=False)
+    """ Disable the rides that arrived since the last sweep. """
+    return sum(expire_rides() for _ in each_shard())
+
+
+def chunks(pks):
+    """ Split pks in NOTIFICATIONS_CHUNK_SIZE lists. """
+    size = settings.NOTIFICATIONS_CHUNK_SIZE
+    return [pks[i:i + size] for i in range(0, len(pks), size)]
+
+
+def on_circle_shard(task, circle_pk, function, *args):
+    """ Run function on the current shard of a circle.
+
+    The task is retried later while the circle is moved to another shard,
+    so it doesn't write to the shard being emptied. """
+    try:
+        with use_circle_shard(circle_pk):
+            return function(*args)
+    except CircleMoveInProgress as exc:
+        raise task.retry(exc=exc,
+                         countdown=settings.DATABASE_SHARD_MOVE_RETRY_DELAY)
+
+
+def queue_ride_notifications(ride_pk, circle_pk):
+    ride = Ride.objects.filter(pk=ride_pk).first()
+    if ride is None:
+        return
+    group(
+        notify_ride_members.s(ride_pk, circle_pk, user_pks)
+        for user_pks in chunks(ride_recipients(ride))
+    ).apply_async()
+
+
+@app.task(name='notify_new_ride', bind=True, max_retries=None)
+def notify_new_ride(self, ride_pk, circle_pk):
+    """ Notify the circle members of a new ride.
+
+    Members are notified by a group of tasks, one per chunk of members,
+    instead of a task per member. """
+    on_circle_shard(self, circle_pk, queue_ride_notifications, ride_pk,
+                    circle_pk)
+
+
+@app.task(name='notify_ride_members', bind=True, max_retries=None)
+def notify_ride_members(self, ride_pk, circle_pk, user_pks):
+    """ Notify a chunk of members of a new ride. """
+    return on_circle_shard(self, circle_pk, notify_members, ride_pk,
+                           user_pks)
+
+
+@app.task(name='notify_waitlist_promotion', bind=True, max_retries=None)
+def notify_waitlist_promotion(self, ride_pk, user_pk, circle_pk):
+    """ Tell a member they got a seat from the waitlist. """
+    on_circle_shard(self, circle_pk, notify_promotion, ride_pk, user_pk)
+
+
+@app.task(name='send_ride_digests')
+def send_ride_digests():
+    """ Send the pending new rides digests, a task per chunk of users. """
+    user_pks = sorted({
+        pk for _ in each_shard()
+        for pk in PendingNotification.objects.order_by(
+            'user').values_list('user', flat=True).distinct()
+    })
+    group(send_ride_digest.s(chunk) for chunk in chunks(user_pks)
+          ).apply_async()
+
+
+@app.task(name='send_ride_digest')
+def send_ride_digest(user_pks):
+    """ Send their new rides digest to a chunk of users. """
+    return send_digests(user_pks)
+
+
+@app.task(name='archive_finished_rides')
+def archive_finished_rides():
+    """ Move rides finished RIDES_ARCHIVE_AFTER ago to the archive.
+
+    Runs a bounded number of chunks on every shard and queues itself again
+    while there are rides left, so a large backlog doesn't hold a worker
+    for hours. """
+    chunk_size = settings.RIDES_ARCHIVE_CHUNK_SIZE
+    chunks = settings.RIDES_ARCHIVE_CHUNKS
+    before = timezone.now() - settings.RIDES_ARCHIVE_AFTER
+    archived = [archive_rides(before, chunk_size=chunk_size, chunks=chunks)
+                for _ in each_shard()]
+    if chunk_size * chunks in archived:
+        archive_finished_rides.delay()
+    return sum(archived)
+
+
+@app.task(name='delete_expired_invitations')
+def delete_expired_invitations():
+    """ Delete the unused invitations that expired.
+
+    Like archive_finished_rides, queues itself again while there are
+    invitations left. """
+    chunk_size = settings.INVITATIONS_CLEANUP_CHUNK_SIZE
+    chunks = settings.INVITATIONS_CLEANUP_CHUNKS
+    deleted = [Invitation.objects.delete_expired(chunk_size=chunk_size,
+                                                 chunks=chunks)
+               for _ in each_shard()]
+    if chunk_size * chunks in deleted:
+        delete_expired_invitations.delay()
+    return sum(deleted)
+
+
+@app.task(name='rollup_daily_stats')
+def rollup_stats():
+    """ Roll up the circles and members stats of the closed days. """
+    return rollup_daily_stats()
+
+
+@app.task(name='export_dataset', acks_late=True, reject_on_worker_lost=True)
+def export_dataset(job_pk):
+    """ Run an export job.
+
+    The message is only acknowledged once the export is done, so it's
+    delivered again (and the export resumed) if the worker dies. """
+    try:
+        run_export(job_pk)
+    except ExportConflict:
+        pass
+
+
+@app.task(name='resume_exports')
+def resume_exports():
+    """ Queue again the exports that stopped making progress. """
+    stale = timezone.now() - settings.EXPORTS_STALE_AFTER
+    jobs = ExportJob.objects.filter(
+        status__in=[ExportJob.PENDING, ExportJob.RUNNING],
+        modified__lte=stale
+    ).values_list('pk', flat=True)
+    for job_pk in jobs:
+        export_dataset.delay(job_pk)
+
+
+@app.task(name='create_picture_variants', max_retries=3)
+def create_picture_variants(label, pk, field='picture'):
+    """ Create the resized variants of an uploaded picture. """
+    model = apps.get_model(label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is not None:
+        create_variants(instance, field)
+
+
+@app.task(name='handle_events', acks_late=True, reject_on_worker_lost=True,
+          autoretry_for=(DatabaseError,), retry_backoff=True,
+          max_retries=None)
+def handle_events(events):
+    """ Run the consumers of a batch of outbox events.
+
+    Consumers skip the events they already handled, so the message is
+    only acknowledged once they are done and retried on database errors.
+    """
+    return consume_events(events)
+
+
+@app.task(name='purge_outbox')
+def purge_outbox():
+    """ Delete the outbox events published OUTBOX_RETENTION ago. """
+    return purge_events()
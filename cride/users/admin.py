@@ -7,23 +7,27 @@ from django.contrib.auth.admin import UserAdmin
 # Models
 from cride.users.models import User, Profile
 
+# Utilities
+from cride.utils.admin import LargeTableAdminMixin
+from cride.utils.pictures import queue_variants
 
-class CustomUserAdmin(UserAdmin):
+
+class CustomUserAdmin(LargeTableAdminMixin, UserAdmin):
     """ User model admin. """
     list_display = ('email', 'username', 'first_name', 'last_name',
                     'is_staff', 'is_client')
     list_filter = ('is_client', 'is_staff', 'created', 'modified')
+    search_fields = ('username', 'email')
 
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     """ Profile model admin. """
     list_display = ('user', 'reputation', 'rides_taken', 'rides_offered')
-    search_filter = ('user__username', 'user__email', 'user__first_name',
-                     'user__last_name')
+    list_select_related = ('user',)
     list_filter = ('reputation',)
-    search_fields = ('user__username', 'user__email',
-                     'user__first_name', 'user__last_name')
+    search_fields = ('user__username', 'user__email')
+    raw_id_fields = ('user',)
     fieldsets = (
         ('Profile', {
             'fields': (
@@ -44,4 +48,10 @@ class ProfileAdmin(admin.ModelAdmin):
 
     readonly_fields = ('created', 'modified')
 
+    def save_model(self, request, obj, form, change):
+        """ Create the variants of new pictures. """
+        super(ProfileAdmin, self).save_model(request, obj, form, change)
+        if 'picture' in form.changed_data:
+            queue_variants(obj)
+
 admin.site.register(User, CustomUserAdmin)
@@ -19,6 +19,7 @@ class Profile(CrideModel):
         blank=True,
         null=True
     )
+    picture_variants = models.JSONField(default=dict, editable=False)
     biography = models.TextField(max_length=500, blank=True)
 
     # Stats
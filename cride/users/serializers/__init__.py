@@ -1 +1,2 @@
 from .users import *
+from .rows import *
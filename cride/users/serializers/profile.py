@@ -1,13 +1,13 @@
 """ Profile serializer. """
 
-# Django REST Framework
-from rest_framework import serializers
-
 # Models
 from cride.users.models import Profile
 
+# Utilities
+from cride.utils.pictures import PictureModelSerializer
+
 
-class ProfileModelSerializer(serializers.ModelSerializer):
+class ProfileModelSerializer(PictureModelSerializer):
     """ Profile model serializer. """
 
     class Meta:
@@ -0,0 +1,35 @@
+""" Users row serializers. """
+
+# Models
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.utils.serializers import (RowSerializer, RowField, FloatRowField,
+                                     PictureRowField, NestedRowField)
+
+
+class ProfileRowSerializer(RowSerializer):
+    """ Profile row serializer, stands for ProfileModelSerializer. """
+
+    model = Profile
+    fields = (
+        ('picture', PictureRowField()),
+        ('biography', RowField()),
+        ('rides_taken', RowField()),
+        ('rides_offered', RowField()),
+        ('reputation', FloatRowField()),
+    )
+
+
+class UserRowSerializer(RowSerializer):
+    """ User row serializer, stands for UserModelSerializer. """
+
+    model = User
+    key = 'username'
+    fields = (
+        ('username', RowField()),
+        ('first_name', RowField()),
+        ('last_name', RowField()),
+        ('phone_number', RowField()),
+        ('profile', NestedRowField(ProfileRowSerializer, skip_missing=True)),
+    )
@@ -1,10 +1,7 @@
 """ Users serializers. """
 
-# Utilities
-import jwt
-
-# Taskas
-from cride.taskapp.tasks import send_confirmation_email
+# Tasks
+from cride.taskapp.dispatch import send_task
 
 # Django
 from django.contrib.auth import authenticate, password_validation
@@ -87,7 +84,7 @@ class UserSignUpSerializer(serializers.Serializer):
                                         is_verified=False,
                                         is_client=True)
         Profile.objects.create(user=user)
-        send_confirmation_email.delay(user_pk=user.pk)
+        send_task('send_confirmation_email', user_pk=user.pk)
         return user
 
 
@@ -121,6 +118,8 @@ class AccountVerificationSerializer(serializers.Serializer):
 
     def validate_token(self, data):
         """ Verify token is valid. """
+        import jwt
+
         try:
             payload = jwt.decode(data,
                                  settings.SECRET_KEY,
@@ -10,9 +10,14 @@ from rest_framework.permissions import (AllowAny,
                                         IsAuthenticated)
 from cride.users.permissions import IsAccountOwner
 
+# Django
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+
 # Models
 from cride.users.models import User
-from cride.circles.models import Circle
+from cride.circles.models import Circle, Membership
+from cride.notifications.models import NotificationPreference
 
 # Serializers
 from cride.users.serializers import (
@@ -20,12 +25,23 @@ from cride.users.serializers import (
     UserModelSerializer,
     UserSignUpSerializer,
     AccountVerificationSerializer,
-    ProfileModelSerializer
+    ProfileModelSerializer,
+    UserRowSerializer
 )
 from cride.circles.serializers import CircleModelSerializer
+from cride.notifications.serializers import (
+    NotificationPreferenceModelSerializer
+)
 
+# Utilities
+from cride.utils.db import ReplicaReadMixin
+from cride.utils.shards import each_shard
+from cride.utils.views import BatchRetrieveMixin
 
-class UserViewSet(mixins.RetrieveModelMixin,
+
+class UserViewSet(ReplicaReadMixin,
+                  BatchRetrieveMixin,
+                  mixins.RetrieveModelMixin,
                   mixins.UpdateModelMixin,
                   viewsets.GenericViewSet):
     """ User view set.
@@ -35,18 +51,48 @@ class UserViewSet(mixins.RetrieveModelMixin,
 
     queryset = User.objects.filter(is_active=True, is_client=True)
     serializer_class = UserModelSerializer
+    row_serializer_class = UserRowSerializer
     lookup_field = 'username'
+    batch_param = 'usernames'
 
     def get_permissions(self):
         """ Assign permissions based on action. """
         if self.action in ['login', 'signup', 'verify']:
             permissions = [AllowAny]
-        elif self.action in ['retrieve', 'update', 'partial_update']:
+        elif self.action in ['retrieve', 'update', 'partial_update',
+                             'notifications']:
             permissions = [IsAuthenticated, IsAccountOwner]
         else:
             permissions = [IsAuthenticated]
         return [permission() for permission in permissions]
 
+    def get_batch_queryset(self):
+        """ Restrict batches to the user and its circles members.
+
+        Memberships of sharded circles can't be joined to users, their
+        members are listed shard by shard instead. """
+        user = self.request.user
+        circles = Membership.objects.filter(
+            user=user,
+            is_active=True
+        ).values('circle')
+        if settings.DATABASE_SHARDS:
+            members = {pk for _ in each_shard()
+                       for pk in Membership.objects.filter(
+                           circle__in=circles,
+                           is_active=True
+                       ).values_list('user', flat=True)}
+            return self.get_queryset().filter(Q(pk__in=members) |
+                                              Q(pk=user.pk))
+        shared = Membership.objects.filter(
+            user=OuterRef('pk'),
+            circle__in=circles,
+            is_active=True
+        )
+        return self.get_queryset().annotate(
+            shares_circle=Exists(shared)
+        ).filter(Q(shares_circle=True) | Q(pk=user.pk))
+
     @action(detail=False, methods=['post'])
     def login(self, request):
         """ User sign in. """
@@ -97,13 +143,34 @@ class UserViewSet(mixins.RetrieveModelMixin,
         data = UserModelSerializer(user).data
         return Response(data)
 
+    @action(detail=True, methods=['get', 'put', 'patch'])
+    def notifications(self, request, *args, **kwargs):
+        """ Retrieve or update notification preferences. """
+        user = self.get_object()
+        preference, _ = NotificationPreference.objects.get_or_create(
+            user=user)
+        if request.method == 'GET':
+            serializer = NotificationPreferenceModelSerializer(preference)
+            return Response(serializer.data)
+        serializer = NotificationPreferenceModelSerializer(
+            preference,
+            data=request.data,
+            partial=request.method == 'PATCH'
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     def retrieve(self, request, *args, **kwargs):
         """ Add extra data to the responde. """
         response = super(UserViewSet, self).retrieve(request, *args, **kwargs)
-        circles = Circle.objects.filter(
-            members=request.user,
-            members__is_active=True
-        )
+        circles = Circle.objects.filter(pk__in=[
+            pk for _ in each_shard()
+            for pk in Membership.objects.filter(
+                user=request.user,
+                is_active=True
+            ).values_list('circle', flat=True)
+        ])
         data = {
             'user': response.data,
             'circle': CircleModelSerializer(circles, many=True).data
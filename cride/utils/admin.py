@@ -0,0 +1,197 @@
+""" Admin utilities for large tables.
+
+The default changelist runs an exact COUNT(*) twice per page, searches
+with ILIKE '%term%' on every search field and pages with OFFSET, all of
+them full scans on tables with millions of rows. These mixins replace
+them with planner estimates, indexed prefix searches and keyset pages. """
+
+# Django
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Utilities
+from functools import reduce
+from typing import TYPE_CHECKING
+import json
+import operator
+
+
+KEYSET_VAR = 'after'
+
+if TYPE_CHECKING:
+    # Model admin mixins are checked as the model admins they're used in.
+    from django.contrib.admin import ModelAdmin as ModelAdminMixin
+else:
+    ModelAdminMixin = object
+
+
+def display(description):
+    """ Set the description of an admin action or column method, like
+    admin.display does since Django 3.2. """
+    def decorator(method):
+        method.short_description = description
+        return method
+    return decorator
+
+
+def estimate_count(queryset):
+    """ Return the planner estimate of the queryset rows.
+
+    Unfiltered querysets use the table statistics, filtered ones the
+    EXPLAIN row estimate. Return None on databases other than PostgreSQL.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            rows = cursor.fetchone()[0]
+        else:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            rows = plan[0]['Plan']['Plan Rows']
+    # Tables never analyzed have no statistics.
+    return int(rows) if rows >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """ Paginator trusting the planner estimate of big querysets.
+
+    Querysets estimated above ADMIN_ESTIMATED_COUNT_THRESHOLD rows aren't
+    counted. As the estimate may be short, pages past it are still read
+    instead of raising EmptyPage. """
+
+    estimated = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and \
+                estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            self.estimated = True
+            return estimate
+        return super(EstimatedCountPaginator, self).count
+
+    def page(self, number):
+        self.count  # Sets estimated.
+        if not self.estimated:
+            return super(EstimatedCountPaginator, self).page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class EstimatedCountMixin:
+    """ Model admin mixin showing estimated counts of big tables. """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class PrefixSearchMixin(ModelAdminMixin):
+    """ Model admin mixin searching by column prefixes.
+
+    Every search term must be the start of one of the search_fields, a
+    case sensitive match served by the pattern ops indexes PostgreSQL gets
+    for unique and indexed text columns. Only list indexed columns, and no
+    to-many relations: results aren't made distinct. """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        for term in search_term.split():
+            queryset = queryset.filter(reduce(operator.or_, [
+                Q(**{field + '__startswith': term}) for field in search_fields
+            ]))
+        return queryset, False
+
+
+class KeysetChangeList(ChangeList):
+    """ Changelist paging by primary key instead of OFFSET.
+
+    While sorted by the default descending primary key ordering, the next
+    page starts after the last row shown (?after=<pk>), so deep pages cost
+    as much as the first one. Changelists sorted by a column use page
+    numbers. """
+
+    def __init__(self, request, *args, **kwargs):
+        self.after = request.GET.get(KEYSET_VAR)
+        self.keyset = False
+        self.first_url = self.next_url = None
+        super(KeysetChangeList, self).__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super(KeysetChangeList, self).get_filters_params(
+            params)
+        lookup_params.pop(KEYSET_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        # Filter, search and sort links start over from the first page.
+        self.params.pop(KEYSET_VAR, None)
+        if ORDER_VAR in self.params or self.show_all:
+            return super(KeysetChangeList, self).get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset,
+                                                   self.list_per_page)
+        queryset = self.queryset
+        if self.after is not None:
+            try:
+                queryset = queryset.filter(pk__lt=int(self.after))
+            except ValueError:
+                raise IncorrectLookupParameters
+        result_list = list(queryset[:self.list_per_page + 1])
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[:self.list_per_page]
+            self.next_url = self.get_query_string(
+                {KEYSET_VAR: result_list[-1].pk})
+
+        if self.after is not None:
+            self.first_url = self.get_query_string()
+        self.keyset = True
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = self.after is not None or self.next_url is not None
+        self.paginator = paginator
+
+
+class KeysetPaginationMixin:
+    """ Model admin mixin paging its changelist by primary key. """
+
+    ordering = ('-pk',)
+    change_list_template = 'admin/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class LargeTableAdminMixin(EstimatedCountMixin, PrefixSearchMixin,
+                           KeysetPaginationMixin):
+    """ Model admin mixin for tables with millions of rows.
+
+    Subclasses should also set list_select_related for the relations shown
+    in list_display and raw_id_fields for their foreign keys, and avoid
+    list_filter on foreign keys, which lists every related object. """
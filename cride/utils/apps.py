@@ -0,0 +1,24 @@
+""" Utils app. """
+
+# Django
+from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+class UtilsAppConfig(AppConfig):
+    """ Utils app config.
+
+    Hold project wide management commands and connect the circle sharding
+    receivers and checks. """
+    name = 'cride.utils'
+    verbose_name = 'Utils'
+
+    def ready(self):
+        from cride.utils import shards
+
+        for label in shards.REFERENCE_MODELS:
+            post_save.connect(shards.replicate_saved, sender=label)
+            post_delete.connect(shards.replicate_deleted, sender=label)
+        post_migrate.connect(shards.reserve_ids_after_migrate, sender=self)
+        checks.register(shards.check_id_ranges, checks.Tags.database)
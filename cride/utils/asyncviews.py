@@ -0,0 +1,154 @@
+""" Async views utilities.
+
+Read-heavy endpoints are also served by async views when the project runs
+under ASGI. Django's ORM is still synchronous, so every database access is
+run in the thread pool through database_sync_to_async, which lets many
+requests wait on the database concurrently instead of being serialized on
+the single thread Django uses for sync code under ASGI. """
+
+# Django
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import close_old_connections, connections, transaction
+from django.http import Http404, HttpResponse
+
+# Django REST Framework
+from rest_framework import exceptions
+from rest_framework.authentication import (TokenAuthentication,
+                                           get_authorization_header)
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+# Utilities
+from asgiref.sync import sync_to_async
+from typing import Set
+import functools
+from cride.utils.db import read_only
+from cride.utils.metrics import track_queries
+
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def database_sync_to_async(func):
+    """ Run func in the thread pool with a usable database connection. """
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            with track_queries():
+                return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(inner, thread_sensitive=False)
+
+
+async def authenticate(request):
+    """ Return the user authenticated by the request's token.
+
+    Mirror TokenAuthentication, raising NotAuthenticated when no
+    credentials were provided. """
+    auth = get_authorization_header(request).split()
+    authentication = TokenAuthentication()
+    if not auth or auth[0].lower() != authentication.keyword.lower().encode():
+        raise exceptions.NotAuthenticated()
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed('Invalid token header.')
+    user, _ = await database_sync_to_async(
+        authentication.authenticate_credentials)(key)
+    return user
+
+
+def api_request(request, user):
+    """ Wrap request in an already authenticated DRF request. """
+    drf_request = Request(request, authenticators=())
+    drf_request.user = user
+    return drf_request
+
+
+def viewset_action(viewset_class, action, request, user, kwargs, **attrs):
+    """ Return the response data of a list or retrieve viewset action.
+
+    The viewset checks the permissions and runs the action so the output is
+    the same one served by the sync view. Must be called from the thread
+    pool. """
+    drf_request = api_request(request, user)
+    view = viewset_class(
+        action=action,
+        request=drf_request,
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+        **attrs
+    )
+    view.check_permissions(drf_request)
+    return getattr(view, action)(drf_request, **kwargs).data
+
+
+def render(data, status=200):
+    """ Return data rendered with the default API renderer. """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(
+        renderer.render(data),
+        status=status,
+        content_type='{}; charset=utf-8'.format(renderer.media_type)
+    )
+
+
+def render_exception(exc):
+    """ Return an APIException as DRF's exception handler would. """
+    response = render({'detail': exc.detail}, status=exc.status_code)
+    if response.status_code == 401:
+        response['WWW-Authenticate'] = TokenAuthentication.keyword
+    return response
+
+
+def _make_atomic(view):
+    """ Wrap view in a transaction like ATOMIC_REQUESTS would. """
+    non_atomic_requests: Set[str] = getattr(view, '_non_atomic_requests',
+                                            set())
+    for db in connections.all():
+        if db.settings_dict['ATOMIC_REQUESTS'] and \
+                db.alias not in non_atomic_requests:
+            view = transaction.atomic(using=db.alias)(view)
+
+    @functools.wraps(view)
+    def inner(*args, **kwargs):
+        with track_queries():
+            return view(*args, **kwargs)
+    return inner
+
+
+def async_safe_methods(fallback):
+    """ Serve safe methods with the decorated coroutine.
+
+    Every other method is handled by the fallback sync view, inside a
+    transaction since async views can't use ATOMIC_REQUESTS. """
+    fallback = sync_to_async(_make_atomic(fallback), thread_sensitive=True)
+
+    def decorator(coroutine):
+        @functools.wraps(coroutine)
+        async def view(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await fallback(request, *args, **kwargs)
+            try:
+                with read_only():
+                    response = await coroutine(request, *args, **kwargs)
+            except Http404:
+                response = render_exception(exceptions.NotFound())
+            except PermissionDenied:
+                response = render_exception(exceptions.PermissionDenied())
+            except exceptions.APIException as exc:
+                response = render_exception(exc)
+            response['Vary'] = 'Accept'
+            return response
+
+        view.csrf_exempt = True  # type: ignore[attr-defined]
+        view._non_atomic_requests = set(  # type: ignore[attr-defined]
+            settings.DATABASES)
+        return view
+    return decorator
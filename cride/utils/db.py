@@ -0,0 +1,89 @@
+""" Database routing utilities.
+
+Reads of non-mutating requests are sent to the replicas listed in
+DATABASE_REPLICAS. Everything else, including any read made after the
+request wrote something, goes to the primary. """
+
+# Django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Utilities
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+import functools
+import random
+
+if TYPE_CHECKING:
+    # Only for type checking, the routers don't load the views.
+    from cride.utils.views import ViewSetMixin
+else:
+    ViewSetMixin = object
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_only = ContextVar('read_only', default=False)
+_pinned = ContextVar('pinned', default=False)
+
+
+@contextmanager
+def read_only():
+    """ Allow the reads made inside the block to use a replica. """
+    read_only_token = _read_only.set(True)
+    pinned_token = _pinned.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned_token)
+        _read_only.reset(read_only_token)
+
+
+def replica_routed(view):
+    """ Route the view's safe requests to the replicas.
+
+    Safe requests skip ATOMIC_REQUESTS, the rest are wrapped in a
+    transaction on the primary. """
+    @functools.wraps(view)
+    def inner(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            with read_only():
+                return view(request, *args, **kwargs)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            return view(request, *args, **kwargs)
+
+    inner._non_atomic_requests = {DEFAULT_DB_ALIAS}  # type: ignore[attr-defined]
+    return inner
+
+
+class ReplicaReadMixin(ViewSetMixin):
+    """ Viewset mixin routing safe requests to the replicas. """
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        return replica_routed(super().as_view(*args, **kwargs))
+
+
+class ReplicaRouter:
+    """ Primary/replica database router. """
+
+    def db_for_read(self, model, **hints):
+        """ Use a random replica unless the primary is required. """
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _read_only.get() and not _pinned.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        """ Write to the primary and stick to it for the following reads. """
+        if _read_only.get():
+            _pinned.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """ Replicas hold the same data as the primary. """
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,34 @@
+""" Export utilities. """
+
+# Django
+from django.http import StreamingHttpResponse
+
+# Utilities
+import csv
+
+
+class Echo:
+    """ File-like object returning what is written to it. """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """ Yield the CSV encoded header and rows one line at a time. """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def streaming_csv_response(header, rows, filename):
+    """ Return a response streaming rows as a CSV attachment.
+
+    rows may be any iterable, it is consumed while the response is sent so
+    the export uses constant memory. """
+    response = StreamingHttpResponse(csv_lines(header, rows),
+                                     content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="{}"'.format(
+        filename)
+    return response
@@ -0,0 +1,420 @@
+""" Bulk fixture loading.
+
+Generate production-sized datasets straight into the database. Rows are
+inserted in batches with bulk_create (or COPY on PostgreSQL), skipping
+model save() overrides and managers, while every stats counter is computed
+on the fly so the data is consistent with what the API would produce. """
+
+# Django
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+# Utilities
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+from typing import List
+import io
+import random
+
+# Models
+from cride.circles.models import Circle, Membership, Invitation
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+
+FIRST_NAMES = ('Ana', 'Juan', 'Lucia', 'Martin', 'Sofia', 'Diego', 'Valeria',
+               'Pablo', 'Camila', 'Nicolas', 'Julieta', 'Tomas', 'Florencia',
+               'Mateo', 'Agustina', 'Santiago', 'Carla', 'Federico')
+LAST_NAMES = ('Garcia', 'Rodriguez', 'Gonzalez', 'Fernandez', 'Lopez',
+              'Martinez', 'Perez', 'Gomez', 'Sanchez', 'Romero', 'Sosa',
+              'Torres', 'Alvarez', 'Ruiz', 'Catalano', 'Trinidad')
+PLACES = ('Ciudad Universitaria', 'Metro Copilco', 'Centro', 'Terminal',
+          'Aeropuerto', 'Parque General San Martin', 'Plaza Independencia',
+          'Hospital Central', 'Facultad de Ingenieria', 'Estadio',
+          'Barrio Civico', 'Shopping', 'Godoy Cruz', 'Lujan de Cuyo',
+          'Las Heras', 'Guaymallen', 'Maipu', 'Chacras de Coria')
+CIRCLE_WORDS = ('Facultad', 'Club', 'Empresa', 'Colegio', 'Barrio',
+                'Universidad', 'Comunidad', 'Oficina', 'Hospital')
+
+MIN_MEMBERS = 2
+LARGEST_CIRCLE_SHARE = 0.2
+MAX_PASSENGERS = 3
+ADMIN_INVITATIONS = 10
+
+
+def chunked(iterable, size):
+    """ Yield lists of at most size items. """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def membership_sizes(circles, users, alpha):
+    """ Return the number of members of every circle.
+
+    The size of the circle ranked n is proportional to 1 / n^alpha, the
+    biggest circle holds LARGEST_CIRCLE_SHARE of the users. """
+    largest = users * LARGEST_CIRCLE_SHARE
+    return [
+        max(MIN_MEMBERS, min(users, int(largest / rank ** alpha)))
+        for rank in range(1, circles + 1)
+    ]
+
+
+def next_id(model, using=DEFAULT_DB_ALIAS):
+    """ Return the next free primary key of model. """
+    last = model.objects.using(using).order_by('-pk').values_list(
+        'pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """ Sync primary key sequences with explicitly assigned ids. """
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class FixtureLoader:
+    """ Fixture loader.
+
+    Memory is bounded by the number of memberships: members and counters are
+    kept in compact arrays while rides and passengers are generated and
+    written one batch at a time. Profiles, memberships and circles are
+    written after the rides so their counters are inserted already final. """
+
+    RIDE_COLUMNS = ('id', 'created', 'modified', 'offered_by_id',
+                    'offered_in_id', 'available_seats', 'comments',
+                    'departure_location', 'departure_date',
+                    'arrival_location', 'arrival_date', 'rating', 'is_active')
+    PASSENGER_COLUMNS = ('ride_id', 'user_id')
+
+    def __init__(self, users, circles, rides, alpha=1.1, passenger_ratio=0.3,
+                 history_days=365, future_days=30, seed=42, password=None,
+                 batch_size=10000, using=DEFAULT_DB_ALIAS, log=None):
+        self.users = users
+        self.circles = circles
+        self.rides = rides
+        self.password = password
+        self.alpha = alpha
+        self.passenger_ratio = passenger_ratio
+        self.history = timedelta(days=history_days)
+        self.future = timedelta(days=future_days)
+        self.batch_size = batch_size
+        self.using = using
+        self.connection = connections[using]
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+
+    def load(self):
+        """ Generate the whole dataset and return a summary. """
+        self.first_user = next_id(User, self.using)
+        self.first_profile = next_id(Profile, self.using)
+        self.first_circle = next_id(Circle, self.using)
+        self.sizes = membership_sizes(self.circles, self.users, self.alpha)
+
+        self.log('Creating {} users'.format(self.users))
+        self.create_users()
+        self.log('Creating {} circles'.format(self.circles))
+        self.create_circles()
+        self.log('Planning {} memberships'.format(sum(self.sizes)))
+        self.plan_memberships()
+        self.log('Creating {} rides'.format(self.rides))
+        passengers = self.create_rides()
+        self.log('Creating profiles, memberships and invitations')
+        self.create_profiles()
+        invitations = self.create_memberships()
+        self.update_circles()
+
+        reset_sequences([User, Profile, Circle, Membership, Invitation, Ride,
+                         Ride.passenger.through], self.using)
+        return {
+            'users': self.users,
+            'circles': self.circles,
+            'memberships': sum(self.sizes),
+            'invitations': invitations,
+            'rides': self.rides,
+            'passengers': passengers,
+            'largest_circle': max(self.sizes),
+        }
+
+    def create_users(self):
+        """ Create verified client users sharing the same password. """
+        password = make_password(self.password or
+                                 User.objects.make_random_password())
+        rng = self.rng
+
+        def users():
+            for user_id in range(self.first_user,
+                                 self.first_user + self.users):
+                yield User(
+                    id=user_id,
+                    username='user{}'.format(user_id),
+                    email='user{}@example.com'.format(user_id),
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    phone_number='+54{:010d}'.format(user_id),
+                    password=password,
+                    is_verified=True,
+                    is_client=True
+                )
+
+        for batch in chunked(users(), self.batch_size):
+            User.objects.using(self.using).bulk_create(batch)
+        # Profiles are created once rides counters are known.
+        self.profile_taken = array('l', [0] * self.users)
+        self.profile_offered = array('l', [0] * self.users)
+
+    def create_circles(self):
+        """ Create public circles, counters are filled in later. """
+        rng = self.rng
+
+        def circles():
+            for circle_id in range(self.first_circle,
+                                   self.first_circle + self.circles):
+                yield Circle(
+                    id=circle_id,
+                    name='{} {}'.format(rng.choice(CIRCLE_WORDS),
+                                        rng.choice(PLACES)),
+                    slug_name='circle-{}'.format(circle_id),
+                    about='Synthetic circle #{}'.format(circle_id),
+                    verified=rng.random() < 0.1,
+                    is_public=True,
+                    is_limited=False
+                )
+
+        for batch in chunked(circles(), self.batch_size):
+            Circle.objects.using(self.using).bulk_create(batch)
+
+    def plan_memberships(self):
+        """ Pick the members of every circle.
+
+        The first member is the circle admin, every other member was
+        invited by someone who joined before. """
+        user_ids = range(self.first_user, self.first_user + self.users)
+        self.members = []
+        self.inviters = []
+        self.offered = []
+        self.taken = []
+        for size in self.sizes:
+            members = array('l', self.rng.sample(user_ids, size))
+            inviters = array('l', [-1] + [self.rng.randrange(position)
+                                          for position in range(1, size)])
+            self.members.append(members)
+            self.inviters.append(inviters)
+            self.offered.append(array('l', [0] * size))
+            self.taken.append(array('l', [0] * size))
+        self.circle_offered = array('l', [0] * self.circles)
+        self.circle_taken = array('l', [0] * self.circles)
+
+    def ride_rows(self, passengers):
+        """ Yield ride rows, appending their passengers to passengers. """
+        rng = self.rng
+        now = self.now
+        span = (self.history + self.future).total_seconds()
+        start = now - self.history
+        first_ride = next_id(Ride, self.using)
+        weights = list(accumulate(self.sizes))
+        circle_indexes = range(self.circles)
+
+        for ride_id in range(first_ride, first_ride + self.rides):
+            circle = rng.choices(circle_indexes, cum_weights=weights)[0]
+            members = self.members[circle]
+            driver = rng.randrange(len(members))
+            departure = start + timedelta(seconds=rng.random() * span)
+            arrival = departure + timedelta(minutes=rng.randint(15, 120))
+            seats = rng.randint(1, 6)
+
+            self.offered[circle][driver] += 1
+            self.circle_offered[circle] += 1
+            self.profile_offered[members[driver] - self.first_user] += 1
+
+            if rng.random() < self.passenger_ratio:
+                count = min(rng.randint(1, MAX_PASSENGERS), seats,
+                            len(members) - 1)
+                for passenger in rng.sample(range(len(members)), count + 1):
+                    if passenger == driver or count == 0:
+                        continue
+                    count -= 1
+                    seats -= 1
+                    passengers.append((ride_id, members[passenger]))
+                    self.taken[circle][passenger] += 1
+                    self.circle_taken[circle] += 1
+                    self.profile_taken[members[passenger] -
+                                       self.first_user] += 1
+
+            yield (
+                ride_id, now, now, members[driver],
+                self.first_circle + circle, seats, '',
+                rng.choice(PLACES), departure, rng.choice(PLACES), arrival,
+                round(rng.uniform(3, 5), 1) if arrival < now else None,
+                arrival > now
+            )
+
+    def create_rides(self):
+        """ Stream rides and passengers to the database in batches. """
+        Passenger = Ride.passenger.through
+        passengers: List[tuple] = []
+        total = 0
+        written = 0
+        for batch in chunked(self.ride_rows(passengers), self.batch_size):
+            self.write(Ride, self.RIDE_COLUMNS, batch)
+            self.write(Passenger, self.PASSENGER_COLUMNS, passengers)
+            total += len(passengers)
+            written += len(batch)
+            passengers.clear()
+            if written % (self.batch_size * 10) == 0:
+                self.log('  {} rides'.format(written))
+        return total
+
+    def create_profiles(self):
+        """ Create profiles with their final rides counters. """
+        rng = self.rng
+
+        def profiles():
+            for offset in range(self.users):
+                yield Profile(
+                    id=self.first_profile + offset,
+                    user_id=self.first_user + offset,
+                    rides_taken=self.profile_taken[offset],
+                    rides_offered=self.profile_offered[offset],
+                    reputation=round(rng.uniform(3, 5), 2)
+                )
+
+        for batch in chunked(profiles(), self.batch_size):
+            Profile.objects.using(self.using).bulk_create(batch)
+
+    def create_memberships(self):
+        """ Create memberships and the invitations they were created with.
+
+        Admins also get their unused invitation codes. """
+        invitations: List[Invitation] = []
+        created = 0
+        first_invitation = next_id(Invitation, self.using)
+
+        def invitation(issuer, circle_id, used_by=None):
+            invitation_id = first_invitation + len(invitations) + created
+            invitations.append(Invitation(
+                id=invitation_id,
+                code='FX{:08X}'.format(invitation_id),
+                issue_by_id=issuer,
+                used_by_id=used_by,
+                circle_id=circle_id,
+                used=used_by is not None,
+                used_at=self.now if used_by is not None else None
+            ))
+
+        def memberships():
+            for circle, members in enumerate(self.members):
+                circle_id = self.first_circle + circle
+                inviters = self.inviters[circle]
+                used = array('l', [0] * len(members))
+                for position in range(1, len(members)):
+                    used[inviters[position]] += 1
+                for position, user_id in enumerate(members):
+                    inviter = inviters[position]
+                    is_admin = position == 0
+                    remaining = max(ADMIN_INVITATIONS - used[position], 0) \
+                        if is_admin else 0
+                    if inviter >= 0:
+                        invitation(members[inviter], circle_id, user_id)
+                    for _ in range(remaining):
+                        invitation(user_id, circle_id)
+                    yield Membership(
+                        user_id=user_id,
+                        profile_id=self.profile_id(user_id),
+                        circle_id=circle_id,
+                        is_admin=is_admin,
+                        used_invitations=used[position],
+                        remaining_invitations=remaining,
+                        invited_by_id=members[inviter] if inviter >= 0
+                        else None,
+                        rides_taken=self.taken[circle][position],
+                        rides_offered=self.offered[circle][position]
+                    )
+
+        for batch in chunked(memberships(), self.batch_size):
+            Membership.objects.using(self.using).bulk_create(batch)
+            Invitation.objects.using(self.using).bulk_create(invitations)
+            created += len(invitations)
+            invitations.clear()
+        return created
+
+    def update_circles(self):
+        """ Store final circles counters. """
+        circles = [
+            Circle(id=self.first_circle + index,
+                   rides_offered=self.circle_offered[index],
+                   rides_taken=self.circle_taken[index])
+            for index in range(self.circles)
+        ]
+        Circle.objects.using(self.using).bulk_update(
+            circles,
+            ['rides_offered', 'rides_taken'],
+            batch_size=1000
+        )
+
+    def profile_id(self, user_id):
+        """ Return the id of the profile created for user_id. """
+        return user_id - self.first_user + self.first_profile
+
+    def write(self, model, columns, rows):
+        """ Insert raw rows, using COPY when the database supports it.
+
+        Building model instances costs more than generating the data, so
+        rows are written as plain tuples. """
+        if not rows:
+            return
+        quote = self.connection.ops.quote_name
+        attnames = {field.attname: field.column
+                    for field in model._meta.concrete_fields}
+        table = quote(model._meta.db_table)
+        db_columns = ', '.join(quote(attnames[column]) for column in columns)
+
+        with transaction.atomic(using=self.using), \
+                self.connection.cursor() as cursor:
+            if self.connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(_copy_value(v) for v in row))
+                    buffer.write('\n')
+                buffer.seek(0)
+                cursor.cursor.copy_expert(
+                    'COPY {} ({}) FROM STDIN'.format(table, db_columns),
+                    buffer
+                )
+                return
+
+            adapt = self.connection.ops.adapt_datetimefield_value
+            cursor.executemany(
+                'INSERT INTO {} ({}) VALUES ({})'.format(
+                    table,
+                    db_columns,
+                    ', '.join(['%s'] * len(columns))
+                ),
+                [
+                    [adapt(v) if isinstance(v, datetime) else v for v in row]
+                    for row in rows
+                ]
+            )
+
+
+def _copy_value(value):
+    """ Return value encoded for COPY's text format. """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace(
+        '\n', '\\n')
@@ -0,0 +1,145 @@
+""" Idempotency keys.
+
+Clients retrying a POST send the same Idempotency-Key header with every
+attempt. The first response of a key is stored in the shared cache for
+IDEMPOTENCY_TTL and replayed to the retries without authenticating or
+querying the database again, with an Idempotent-Replayed header. Keys are
+scoped by the Authorization header and the URL, and reusing a key with a
+different body answers 422.
+
+The first attempt holds a lock for IDEMPOTENCY_LOCK_TTL seconds, longer
+than any request runs, so it only expires if its process died. A retry
+arriving while it's held waits up to IDEMPOTENCY_LOCK_WAIT seconds for the
+response, so concurrent duplicates run once, and answers 409 if it isn't
+ready by then. Server errors aren't stored, the request can be retried with
+the same key. """
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+# Django REST Framework
+from rest_framework import status
+
+# Utilities
+from cride.utils.asyncviews import render
+from cride.utils.views import ViewSetMixin
+from typing import Tuple
+import functools
+import hashlib
+import time
+import uuid
+
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+
+def cache_key(request, key):
+    """ Return the cache key of an idempotency key, scoped by the
+    credentials and URL of the request. """
+    scope = '\n'.join([request.META.get('HTTP_AUTHORIZATION', ''),
+                       request.method, request.get_full_path(), key])
+    return 'idempotency:' + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def stored_response(response, fingerprint):
+    """ Return the cached form of a rendered response. """
+    return {
+        'fingerprint': fingerprint,
+        'status': response.status_code,
+        'headers': list(response.items()),
+        'content': response.content,
+    }
+
+
+def replay(stored, fingerprint):
+    """ Return the stored response, or 422 if the body changed. """
+    if stored['fingerprint'] != fingerprint:
+        return render({'detail': 'Idempotency-Key already used with a '
+                                 'different request.'},
+                      status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = HttpResponse(stored['content'], status=stored['status'])
+    for name, value in stored['headers']:
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def release(cache, lock, token):
+    """ Delete a lock unless it expired and was taken by another request
+    since, telling them apart by the token it was taken with. """
+    if cache.get(lock) == token:
+        cache.delete(lock)
+
+
+def idempotent(view):
+    """ Honor the Idempotency-Key header of the view's POST requests. """
+    @functools.wraps(view)
+    def inner(request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if request.method != 'POST' or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return render({'detail': 'Idempotency-Key is too long.'},
+                          status=status.HTTP_400_BAD_REQUEST)
+
+        cache = caches[settings.IDEMPOTENCY_CACHE]
+        name = cache_key(request, key)
+        fingerprint = hashlib.sha256(request.body).hexdigest()
+        stored = cache.get(name)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        lock, token = name + ':lock', uuid.uuid4().hex
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_WAIT
+        # add() returns None when the cache is down and its errors are
+        # ignored, the request then runs without idempotency.
+        while cache.add(lock, token,
+                        timeout=settings.IDEMPOTENCY_LOCK_TTL) is False:
+            # Another attempt is running, wait for its response. If it
+            # fails without one, the lock is released and taken here.
+            if time.monotonic() >= deadline:
+                return render({'detail': 'A request with this '
+                                         'Idempotency-Key is in progress.'},
+                              status=status.HTTP_409_CONFLICT)
+            time.sleep(POLL_INTERVAL)
+            stored = cache.get(name)
+            if stored is not None:
+                return replay(stored, fingerprint)
+
+        try:
+            # The previous attempt may have finished since the first get.
+            stored = cache.get(name)
+            if stored is not None:
+                return replay(stored, fingerprint)
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and \
+                    not getattr(response, 'is_rendered', True):
+                response.render()
+            if response.status_code < 500 and not response.streaming:
+                cache.set(name, stored_response(response, fingerprint),
+                          timeout=settings.IDEMPOTENCY_TTL)
+        finally:
+            release(cache, lock, token)
+        return response
+    return inner
+
+
+class IdempotencyMixin(ViewSetMixin):
+    """ Viewset mixin honoring the Idempotency-Key header of the POST
+    actions listed in idempotent_actions.
+
+    Must come first, so replays skip the routing and transactions of the
+    other mixins. """
+
+    idempotent_actions: Tuple[str, ...] = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if (actions or {}).get('post') in cls.idempotent_actions:
+            return idempotent(view)
+        return view
@@ -0,0 +1,63 @@
+""" Load fixtures command. """
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+# Utilities
+import time
+
+# Fixtures
+from cride.utils.fixtures import FixtureLoader
+
+
+class Command(BaseCommand):
+    """ Bulk generate a realistic dataset.
+
+    Users, profiles, circles, memberships, invitations, rides and passengers
+    are inserted in batches, bypassing the API, signals and save()
+    overrides, with consistent stats counters. """
+
+    help = 'Bulk generate users, circles, memberships, invitations and rides.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--circles', type=int, default=500)
+        parser.add_argument('--rides', type=int, default=100000)
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Power law exponent of circle sizes.')
+        parser.add_argument('--passenger-ratio', type=float, default=0.3,
+                            help='Share of rides that have passengers.')
+        parser.add_argument('--history-days', type=int, default=365)
+        parser.add_argument('--future-days', type=int, default=30)
+        parser.add_argument('--password',
+                            help='Password shared by every generated user.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        loader = FixtureLoader(
+            users=options['users'],
+            circles=options['circles'],
+            rides=options['rides'],
+            alpha=options['alpha'],
+            passenger_ratio=options['passenger_ratio'],
+            history_days=options['history_days'],
+            future_days=options['future_days'],
+            password=options['password'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            using=options['database'],
+            log=self.stdout.write
+        )
+        start = time.perf_counter()
+        summary = loader.load()
+        elapsed = time.perf_counter() - start
+
+        for key, value in summary.items():
+            self.stdout.write('{:>16}: {}'.format(key, value))
+        self.stdout.write(self.style.SUCCESS(
+            'Loaded in {:.1f}s ({:.0f} rides/s)'.format(
+                elapsed, summary['rides'] / elapsed if elapsed else 0)
+        ))
@@ -0,0 +1,67 @@
+""" Move circle command. """
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Models
+from cride.circles.models import Circle
+
+# Utilities
+from cride.utils.shards import CircleChanged, move_circle
+import time
+
+
+class Command(BaseCommand):
+    """ Move a circle's memberships, invitations and rides to another shard.
+
+    The circle is marked as moving first, so its API refuses writes with a
+    503 response and the tasks about it wait, and the command waits
+    --grace seconds for the requests and tasks already writing to it to
+    finish. Reads are served from the previous shard until the data is
+    copied. """
+
+    help = 'Move the data of a circle to another shard.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug_name')
+        parser.add_argument('shard', help='Target database alias.')
+        parser.add_argument('--grace', type=float, default=5,
+                            help='Seconds to wait for in flight writes.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        target = options['shard']
+        if target not in settings.DATABASE_SHARDS:
+            raise CommandError('{} is not one of the DATABASE_SHARDS.'.format(
+                target))
+        try:
+            circle = Circle.objects.get(slug_name=options['slug_name'])
+        except Circle.DoesNotExist:
+            raise CommandError('Circle {} does not exist.'.format(
+                options['slug_name']))
+        if circle.shard == target:
+            self.stdout.write('{} is already on {}.'.format(
+                circle.slug_name, target))
+            return
+
+        source = circle.shard
+        circle.moving = True
+        circle.save(update_fields=['moving', 'modified'])
+        try:
+            time.sleep(options['grace'])
+            start = time.perf_counter()
+            moved = move_circle(circle, target,
+                                chunk_size=options['chunk_size'])
+        except Exception as exc:
+            circle.moving = False
+            circle.save(update_fields=['moving', 'modified'])
+            if isinstance(exc, CircleChanged):
+                raise CommandError('{} Nothing was moved, try again.'.format(
+                    exc))
+            raise
+        self.stdout.write(self.style.SUCCESS(
+            'Moved {} rows of {} from {} to {} in {:.1f}s'.format(
+                moved, circle.slug_name, source, target,
+                time.perf_counter() - start)
+        ))
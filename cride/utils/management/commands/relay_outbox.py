@@ -0,0 +1,39 @@
+""" Relay outbox command. """
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Utilities
+from cride.events.outbox import relay_events
+import time
+
+
+class Command(BaseCommand):
+    """ Publish the outbox events to Celery.
+
+    Runs until stopped, waiting --interval seconds whenever a pass finds
+    no full batch left. Several relays can run at once, each of them
+    skips the events locked by the others. """
+
+    help = 'Publish the ride and membership events of the outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            default=settings.OUTBOX_RELAY_INTERVAL,
+                            help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.OUTBOX_RELAY_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true',
+                            help='Publish the pending events and exit.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            published = relay_events(batch_size)
+            if published:
+                self.stdout.write('{} events published'.format(published))
+            if published < batch_size:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,114 @@
+""" Startup report command. """
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Utilities
+from collections import defaultdict
+from typing import Dict
+import os
+import subprocess
+import sys
+import time
+
+
+TARGETS = {
+    'web': (
+        'import config.wsgi\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+    'asgi': (
+        'import config.asgi\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    ),
+    'worker': (
+        'import django\n'
+        'django.setup()\n'
+        'from cride.taskapp.celery import app\n'
+        'app.loader.import_default_modules()\n'
+    ),
+}
+
+
+def parse_importtime(output):
+    """ Return (module, self us, cumulative us) from -X importtime output.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    """ Report what a cold process spends its startup time importing.
+
+    Every target is started in a fresh interpreter with -X importtime, the
+    same way gunicorn and Celery workers boot, and its import time is
+    broken down by module and by top level package. """
+
+    help = 'Import time breakdown of web and worker process startup.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*',
+                            help='Processes to report ({}), all by '
+                                 'default.'.format(', '.join(TARGETS)))
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Number of modules and packages to list.')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per target, the fastest is reported.')
+
+    def handle(self, *args, **options):
+        for target in options['targets']:
+            if target not in TARGETS:
+                raise CommandError('Unknown target {}'.format(target))
+
+        for target in options['targets'] or TARGETS:
+            wall, modules = min(
+                (self.measure(target) for _ in range(options['repeat'])),
+                key=lambda run: run[0]
+            )
+            self.report(target, wall, modules, options['limit'])
+
+    def measure(self, target):
+        """ Return the wall time and imported modules of a cold start. """
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+            env=env,
+            cwd=str(settings.ROOT_DIR),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True
+        )
+        return time.perf_counter() - start, parse_importtime(process.stderr)
+
+    def report(self, target, wall, modules, limit):
+        """ Write the breakdown of a target. """
+        packages: Dict[str, int] = defaultdict(int)
+        for name, own, _ in modules:
+            packages[name.split('.')[0]] += own
+        total = sum(packages.values())
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            '{}: {:.0f} ms wall, {:.0f} ms importing {} modules'.format(
+                target, wall * 1000, total / 1000, len(modules))))
+
+        self.stdout.write('  Packages (self time):')
+        for name, own in sorted(packages.items(), key=lambda p: -p[1])[:limit]:
+            self.stdout.write('    {:>8.1f} ms {:>5.1f}%  {}'.format(
+                own / 1000, own * 100 / total, name))
+
+        self.stdout.write('  Modules (cumulative time):')
+        for name, _, cumulative in sorted(modules,
+                                          key=lambda m: -m[2])[:limit]:
+            self.stdout.write('    {:>8.1f} ms  {}'.format(
+                cumulative / 1000, name))
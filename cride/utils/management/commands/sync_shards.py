@@ -0,0 +1,31 @@
+""" Sync shards command. """
+
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Utilities
+from cride.utils.shards import replica_shards, sync_shard
+
+
+class Command(BaseCommand):
+    """ Copy the users, profiles and circles to the shards.
+
+    They are kept in sync on save, this fills a new shard or catches up
+    with rows inserted in bulk. """
+
+    help = 'Copy the reference tables of the default database to shards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('shards', nargs='*',
+                            help='Database aliases, every shard by default.')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for alias in options['shards']:
+            if alias not in settings.DATABASE_SHARDS:
+                raise CommandError('{} is not one of the DATABASE_SHARDS.'
+                                   .format(alias))
+        for alias in options['shards'] or replica_shards():
+            copied = sync_shard(alias, chunk_size=options['chunk_size'])
+            self.stdout.write('{}: {} rows copied'.format(alias, copied))
@@ -0,0 +1,193 @@
+""" Request metrics utilities.
+
+In-process histograms used to keep track of how expensive every endpoint
+is. Values are exported using the Prometheus text exposition format so any
+scraper (or a plain curl) can read them without external services. """
+
+# Django
+from django.db import connections
+
+# Utilities
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Tuple
+import threading
+import time
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """ Histogram metric.
+
+    Keep cumulative bucket counters, sum and count for every set of label
+    values observed. """
+
+    def __init__(self, name, documentation, labels=('view',),
+                 buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = defaultdict(
+            self._new_series)
+
+    def _new_series(self):
+        """ Return an empty series: one counter per bucket plus +Inf. """
+        return {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0,
+                'count': 0}
+
+    def observe(self, value, **labels):
+        """ Record a new value for the given label values. """
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series[key]
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        """ Return a copy of the current series. """
+        with self._lock:
+            return {
+                key: {
+                    'buckets': list(series['buckets']),
+                    'sum': series['sum'],
+                    'count': series['count'],
+                }
+                for key, series in self._series.items()
+            }
+
+    def reset(self):
+        """ Drop every observed value. """
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """ Return the histogram in text exposition format. """
+        lines = [
+            '# HELP {} {}'.format(self.name, self.documentation),
+            '# TYPE {} histogram'.format(self.name),
+        ]
+        for key, series in sorted(self.snapshot().items()):
+            labels = ','.join('{}="{}"'.format(label, _escape(value))
+                              for label, value in zip(self.labels, key))
+            cumulative = 0
+            bounds = [_format_bound(b) for b in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, series['buckets']):
+                cumulative += count
+                lines.append('{}_bucket{{{}}} {}'.format(
+                    self.name,
+                    ','.join(filter(None, [labels, 'le="{}"'.format(bound)])),
+                    cumulative
+                ))
+            suffix = '{{{}}}'.format(labels) if labels else ''
+            lines.append('{}_sum{} {}'.format(self.name, suffix,
+                                              repr(float(series['sum']))))
+            lines.append('{}_count{} {}'.format(self.name, suffix,
+                                                series['count']))
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """ Metrics registry.
+
+    Hold every histogram exported by the process. """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name, documentation, **kwargs):
+        """ Return the histogram registered under name, creating it. """
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, **kwargs)
+        return self._metrics[name]
+
+    def reset(self):
+        """ Reset every registered metric. """
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self):
+        """ Return every metric in text exposition format. """
+        return '\n'.join(metric.render()
+                         for metric in self._metrics.values()) + '\n'
+
+
+class QueryCollector:
+    """ Query collector.
+
+    Database execute wrapper that counts the queries executed and the time
+    spent waiting for them. """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+current_collector = ContextVar('current_collector', default=None)
+
+
+@contextmanager
+def track_queries():
+    """ Install the collector of the current request.
+
+    Connections are per thread, so code running queries outside of the
+    request thread (async views) must enter this context to have its
+    queries accounted. """
+    collector = current_collector.get()
+    with ExitStack() as stack:
+        if collector is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+        yield
+
+
+def _format_bound(bound):
+    """ Return a bucket upper bound as text. """
+    return repr(float(bound))
+
+
+def _escape(value):
+    """ Escape a label value. """
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+registry = MetricsRegistry()
+
+request_latency = registry.histogram(
+    'cride_request_latency_seconds',
+    'Total time spent handling the request.',
+    labels=('view', 'method')
+)
+request_queries = registry.histogram(
+    'cride_request_db_queries',
+    'Number of database queries executed by the request.',
+    labels=('view', 'method'),
+    buckets=QUERY_BUCKETS
+)
+request_db_time = registry.histogram(
+    'cride_request_db_seconds',
+    'Time spent waiting for the database.',
+    labels=('view', 'method')
+)
+request_serialization_time = registry.histogram(
+    'cride_request_serialization_seconds',
+    'Time spent rendering the response body.',
+    labels=('view', 'method')
+)
@@ -0,0 +1,151 @@
+""" Middlewares. """
+
+# Django
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Utilities
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import time
+
+# Metrics
+from cride.utils import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class RenderTimer:
+    """ Measure the time spent rendering a template response. """
+
+    def __init__(self):
+        self.started = None
+        self.duration = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def finish(self, response):
+        """ Post render callback. """
+        if self.started is not None:
+            self.duration = time.perf_counter() - self.started
+
+
+class RequestMetricsMiddleware:
+    """ Request metrics middleware.
+
+    Record query count, database time, serialization time and total latency
+    of every request, labeled by the resolved view name (ride-list,
+    membership-invitations, ...). Sampled requests are also profiled and
+    their stats dumped to METRICS_PROFILE_DIR when they exceed
+    METRICS_PROFILE_THRESHOLD seconds.
+
+    Works in both WSGI and ASGI handlers without forcing async requests
+    through a thread. """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function for Django.
+            self._is_coroutine = (
+                asyncio.coroutines._is_coroutine)  # type: ignore[attr-defined]
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        queries, profiler, start = self.start_request(request)
+        token = metrics.current_collector.set(queries)
+        try:
+            with metrics.track_queries():
+                response = self.get_response(request)
+        finally:
+            metrics.current_collector.reset(token)
+        self.finish_request(request, queries, profiler, start)
+        return response
+
+    async def __acall__(self, request):
+        queries, profiler, start = self.start_request(request)
+        token = metrics.current_collector.set(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_collector.reset(token)
+        self.finish_request(request, queries, profiler, start)
+        return response
+
+    def start_request(self, request):
+        """ Return the query collector, profiler and start time. """
+        request._metrics_render = RenderTimer()
+        return metrics.QueryCollector(), self.start_profiler(), \
+            time.perf_counter()
+
+    def finish_request(self, request, queries, profiler, start):
+        """ Record the request measurements. """
+        elapsed = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+
+        view = self.get_view_name(request)
+        labels = {'view': view, 'method': request.method}
+        metrics.request_latency.observe(elapsed, **labels)
+        metrics.request_queries.observe(queries.count, **labels)
+        metrics.request_db_time.observe(queries.duration, **labels)
+        metrics.request_serialization_time.observe(
+            request._metrics_render.duration, **labels)
+
+        if profiler is not None and \
+                elapsed >= settings.METRICS_PROFILE_THRESHOLD:
+            self.dump_profile(profiler, view, elapsed)
+
+    def process_template_response(self, request, response):
+        """ Start timing the response rendering. """
+        render = getattr(request, '_metrics_render', None)
+        if render is not None:
+            render.start()
+            response.add_post_render_callback(render.finish)
+        return response
+
+    def get_view_name(self, request):
+        """ Return the URL name of the view that handled the request. """
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.url_name or match.view_name
+
+    def start_profiler(self):
+        """ Return an enabled profiler if the request was sampled. """
+        rate = settings.METRICS_PROFILE_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread.
+            return None
+        return profiler
+
+    def dump_profile(self, profiler, view, elapsed):
+        """ Write the profiler stats to the profiles directory. """
+        directory = settings.METRICS_PROFILE_DIR
+        filename = '{}-{}-{}ms.prof'.format(
+            view,
+            time.strftime('%Y%m%d%H%M%S'),
+            int(elapsed * 1000)
+        )
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, filename))
+        except OSError:
+            logger.exception('Unable to dump profile for %s', view)
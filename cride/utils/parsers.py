@@ -0,0 +1,34 @@
+""" API parsers. """
+
+# Django REST Framework
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+# Utilities
+from types import ModuleType
+from typing import Optional
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """ JSON parser backed by orjson.
+
+    Falls back to JSONParser when orjson isn't installed or the request
+    body isn't UTF-8 encoded. """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """ Parse the incoming bytestream as JSON. """
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8').lower()
+        if orjson is None or encoding.replace('-', '') != 'utf8':
+            return super(ORJSONParser, self).parse(stream, media_type,
+                                                   parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,159 @@
+""" Picture variants.
+
+Uploaded pictures are kept as they are, a Celery task then creates a
+resized JPEG of every PICTURE_VARIANTS size and stores their paths in the
+<field>_variants JSON column of the model. Variant paths contain a hash
+of the original file, so their URLs never change and can be cached
+forever. Responses link the variant sized for their context and fall back
+to the original until the variants are ready. """
+
+# Django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.db.models import Q
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Tasks
+from cride.taskapp.dispatch import send_task
+
+# Utilities
+from cride.utils.shards import replicate
+from PIL import Image, ImageOps
+import hashlib
+import io
+import posixpath
+
+
+DEFAULT_VARIANT = 'medium'
+# Resampling filters moved to Image.Resampling in Pillow 9.1.
+LANCZOS = getattr(Image, 'Resampling', Image).LANCZOS
+
+
+def variants_field(field):
+    """ Return the name of the variants column of a picture field. """
+    return field + '_variants'
+
+
+def picture_url(storage, name, variants, variant, request=None):
+    """ Return the URL of a picture variant, the original if missing. """
+    if not name:
+        return None
+    url = storage.url((variants or {}).get(variant) or name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def resize(image, size):
+    """ Return the image fit in a size x size box as JPEG bytes. """
+    image = image.copy()
+    image.thumbnail((size, size), LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=settings.PICTURE_QUALITY,
+               optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def open_image(data):
+    """ Return the decoded image, upright and without transparency. """
+    image: Image.Image = Image.open(io.BytesIO(data))
+    # JPEG pictures are decoded at a reduced scale when big enough.
+    largest = max(settings.PICTURE_VARIANTS.values())
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def create_variants(instance, field='picture'):
+    """ Create the variants of the instance picture and save their paths.
+
+    Does nothing if they already exist, and doesn't save them if the
+    picture changed meanwhile. Return the variants. """
+    picture = getattr(instance, field)
+    column = variants_field(field)
+    if not picture:
+        variants, current = {}, Q(**{field: ''}) | Q(**{field: None})
+    elif getattr(instance, column).get('source') == picture.name:
+        return getattr(instance, column)
+    else:
+        with picture.open('rb'):
+            data = picture.read()
+        image = open_image(data)
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        directory = posixpath.join(posixpath.dirname(picture.name),
+                                   'variants', digest)
+        variants = {'source': picture.name}
+        for name, size in settings.PICTURE_VARIANTS.items():
+            path = posixpath.join(directory, name + '.jpg')
+            if not picture.storage.exists(path):
+                path = picture.storage.save(path,
+                                            ContentFile(resize(image, size)))
+            variants[name] = path
+        current = Q(**{field: picture.name})
+
+    type(instance).objects.filter(current, pk=instance.pk).update(
+        **{column: variants})
+    replicate(type(instance), [instance.pk])
+    setattr(instance, column, variants)
+    return variants
+
+
+def queue_variants(instance, field='picture'):
+    """ Queue the creation of the picture variants once the current
+    transaction commits. """
+    label, pk = instance._meta.label, instance.pk
+    transaction.on_commit(lambda: send_task(
+        'create_picture_variants', label, pk, field))
+
+
+class PictureField(serializers.ImageField):
+    """ Picture upload, represented by the URL of a variant.
+
+    The variant is the picture_variant of the serializer context,
+    DEFAULT_VARIANT if missing. """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        variants = getattr(value.instance, variants_field(value.field.name))
+        return picture_url(
+            value.storage, value.name, variants,
+            self.context.get('picture_variant', DEFAULT_VARIANT),
+            self.context.get('request')
+        )
+
+
+class PictureModelSerializer(serializers.ModelSerializer):
+    """ Model serializer representing pictures by their variants.
+
+    New pictures get their variants created in background. """
+
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: PictureField,
+    }
+
+    def queue_variants(self, instance, validated_data):
+        for field in self.fields.values():
+            if isinstance(field, PictureField) and \
+                    field.source in validated_data:
+                queue_variants(instance, field.source)
+
+    def create(self, validated_data):
+        instance = super(PictureModelSerializer, self).create(validated_data)
+        self.queue_variants(instance, validated_data)
+        return instance
+
+    def update(self, instance, validated_data):
+        instance = super(PictureModelSerializer, self).update(
+            instance, validated_data)
+        self.queue_variants(instance, validated_data)
+        return instance
@@ -0,0 +1,219 @@
+""" Publish/subscribe brokers.
+
+Messages are published from any process (web or Celery worker) to a
+channel and delivered to the subscribers of that channel in every web
+process. Subscribers are asyncio coroutines of the ASGI process, each one
+holding a bounded queue of messages; a subscriber falling further behind
+is closed rather than buffering without limit.
+
+LocalBroker only delivers the messages published by its own process, used
+by tests and single process setups. RedisBroker publishes to Redis and
+listens with a single Redis connection per process, whatever its number of
+subscribers, subscribed to the channels the process has subscribers of. """
+
+# Django
+from django.conf import settings
+
+# Utilities
+from collections import deque
+from typing import Deque, Dict, List, Set
+import asyncio
+import functools
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """ The messages of a channel waiting to be read by a subscriber.
+
+    Must be created from the event loop of the subscriber. """
+
+    def __init__(self, broker, channel, size):
+        self.broker = broker
+        self.channel = channel
+        self.size = size
+        self.loop = asyncio.get_event_loop()
+        self.messages: Deque[bytes] = deque()
+        self.waiter = None
+        self.closed = False
+
+    def push(self, message):
+        """ Queue a message, from the event loop thread. """
+        if len(self.messages) >= self.size:
+            self.close()
+            return
+        self.messages.append(message)
+        self.wake()
+
+    def close(self):
+        """ Stop the subscription, its next read returns None. """
+        self.closed = True
+        self.wake()
+
+    def wake(self):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def read(self, timeout):
+        """ Return the queued messages, waiting up to timeout seconds for
+        one. Return an empty list on timeout and None once closed. """
+        if not self.messages and not self.closed:
+            # A bare future and timer, cheaper than wait_for() with
+            # thousands of subscribers.
+            self.waiter = self.loop.create_future()
+            timer = self.loop.call_later(timeout, self.wake)
+            try:
+                await self.waiter
+            finally:
+                timer.cancel()
+                self.waiter = None
+        if self.closed:
+            return None
+        messages = list(self.messages)
+        self.messages.clear()
+        return messages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """ In process broker. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, channel, size=None):
+        """ Return a subscription to channel, to be used as a context
+        manager. """
+        subscription = Subscription(self, channel,
+                                    size or settings.LIVE_FEED_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def publish(self, channel, message):
+        """ Publish a message (bytes) to channel. Thread safe. """
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        """ Hand a message to the subscribers of channel, waking each event
+        loop once whatever its number of subscribers. """
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        loops: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscriptions:
+            loops.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in loops.items():
+            try:
+                loop.call_soon_threadsafe(push_all, subscriptions, message)
+            except RuntimeError:
+                # The loop was closed with subscriptions left.
+                pass
+
+
+def push_all(subscriptions, message):
+    for subscription in subscriptions:
+        subscription.push(message)
+
+
+class RedisBroker(LocalBroker):
+    """ Redis pub/sub broker.
+
+    Channels are stored under the prefix key space. The listener thread is
+    started with the first subscription and reconnects on errors. It owns
+    the Redis connection: subscriptions only flag their channel changes,
+    and the listener subscribes the connection to the channels opened and
+    unsubscribes it from the ones closed within poll_interval seconds. """
+
+    prefix = 'live:'
+    poll_interval = 0.1
+
+    def __init__(self, url):
+        import redis
+
+        super(RedisBroker, self).__init__()
+        self.client = redis.Redis.from_url(url)
+        self.listener = None
+        self.changed = threading.Event()
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, message)
+
+    def subscribe(self, channel, size=None):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen,
+                                                 name='pubsub', daemon=True)
+                self.listener.start()
+        subscription = super(RedisBroker, self).subscribe(channel, size)
+        self.changed.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        super(RedisBroker, self).unsubscribe(subscription)
+        self.changed.set()
+
+    def listen(self):
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                self.relay(pubsub)
+            except Exception:
+                logger.exception('Redis pub/sub listener failed.')
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+    def relay(self, pubsub):
+        """ Deliver the messages of a new pub/sub connection, following
+        the channels of the subscriptions. """
+        start = len(self.prefix)
+        subscribed: Set[str] = set()
+        self.changed.set()
+        while True:
+            if self.changed.is_set():
+                self.changed.clear()
+                subscribed = self.update_channels(pubsub, subscribed)
+            if not subscribed:
+                self.changed.wait(self.poll_interval)
+                continue
+            item = pubsub.get_message(timeout=self.poll_interval)
+            if item is not None and item['type'] == 'message':
+                self.deliver(item['channel'][start:].decode(), item['data'])
+
+    def update_channels(self, pubsub, subscribed):
+        """ Subscribe pubsub to the channels with subscribers only, given
+        the ones it's subscribed to. Return the channels subscribed. """
+        with self.lock:
+            channels = {self.prefix + channel
+                        for channel in self.subscriptions}
+        if channels - subscribed:
+            pubsub.subscribe(*sorted(channels - subscribed))
+        if subscribed - channels:
+            pubsub.unsubscribe(*sorted(subscribed - channels))
+        return channels
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    """ Return the LIVE_FEED_BROKER of the process. """
+    if settings.LIVE_FEED_BROKER == 'redis':
+        return RedisBroker(settings.LIVE_FEED_REDIS_URL)
+    return LocalBroker()
@@ -0,0 +1,44 @@
+""" API renderers. """
+
+# Django REST Framework
+from rest_framework.renderers import JSONRenderer
+
+# Utilities
+from types import ModuleType
+from typing import Optional
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """ JSON renderer backed by orjson.
+
+    Output is the same one of DRF's JSONRenderer: values orjson doesn't
+    encode the same way (datetimes, decimals, lazy strings, ...) are handed
+    to DRF's encoder. Falls back to JSONRenderer when orjson isn't installed
+    or an indented response is requested. """
+
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """ Render data into JSON, returning a bytestring. """
+        if orjson is None or self.get_indent(accepted_media_type or '',
+                                             renderer_context or {}):
+            return super(ORJSONRenderer, self).render(
+                data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        ret = orjson.dumps(data, default=self.encoder_class().default,
+                           option=self.options)
+        # Escape the line separators like JSONRenderer does, as they are
+        # not valid inside JavaScript strings.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,317 @@
+""" Row serializers.
+
+Read-only serializers for hot list endpoints. Instead of instantiating
+models and walking DRF fields for every object, they fetch the needed
+columns with a single .values() query (plus one query per to-many field)
+and build the representations straight from the rows. Every row serializer
+must produce the same output as the model serializer it stands for.
+
+Clients may ask for a subset of the fields and choose which relations
+are expanded into nested objects, see RowSerializer.select. Columns and
+joins of the fields left out aren't queried. """
+
+# Django
+from django.db.models import Model
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Utilities
+from cride.utils.pictures import DEFAULT_VARIANT, picture_url, variants_field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+
+SKIP = object()
+# Selection of a relation represented by its key instead of expanded.
+COLLAPSED = object()
+
+
+class RowField:
+    """ Column of a row serializer.
+
+    source is the model field lookup, defaults to the field name. """
+
+    def __init__(self, source=None):
+        self.source = source
+
+    def bind(self, name, model):
+        """ Attach the field to its serializer. """
+        self.source = self.source or name
+        self.model = model
+
+    def lookups(self, prefix, selection=None):
+        """ Return the .values() lookups needed by the field. """
+        return [prefix + self.source]
+
+    def build(self, row, prefix, context, selection=None):
+        """ Return the field representation from the row. """
+        value = row[prefix + self.source]
+        if value is None:
+            return None
+        return self.to_representation(value, context)
+
+    def to_representation(self, value, context):
+        return value
+
+
+class FloatRowField(RowField):
+    """ Float column. """
+
+    def to_representation(self, value, context):
+        return float(value)
+
+
+class DateTimeRowField(RowField):
+    """ Date time column, formatted like DRF's DateTimeField. """
+
+    field = serializers.DateTimeField()
+
+    def to_representation(self, value, context):
+        return self.field.to_representation(value)
+
+
+class ImageRowField(RowField):
+    """ Image column, represented by its absolute URL like DRF's ImageField.
+    """
+
+    def to_representation(self, value, context):
+        if not value:
+            return None
+        url = self.model._meta.get_field(self.source).storage.url(value)
+        request = context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class PictureRowField(ImageRowField):
+    """ Picture column, represented like PictureField by the URL of the
+    variant asked by the context. """
+
+    def lookups(self, prefix, selection=None):
+        return [prefix + self.source, prefix + variants_field(self.source)]
+
+    def build(self, row, prefix, context, selection=None):
+        return picture_url(
+            self.model._meta.get_field(self.source).storage,
+            row[prefix + self.source],
+            row[prefix + variants_field(self.source)],
+            context.get('picture_variant', DEFAULT_VARIANT),
+            context.get('request')
+        )
+
+
+class StringRowField(RowField):
+    """ Related object represented by one of its columns.
+
+    Stands for a StringRelatedField when the related model's __str__
+    returns that column. """
+
+    def __init__(self, source, column):
+        super(StringRowField, self).__init__(source)
+        self.column = column
+
+    def lookups(self, prefix, selection=None):
+        return [prefix + self.source + '__' + self.column]
+
+    def build(self, row, prefix, context, selection=None):
+        return row[prefix + self.source + '__' + self.column]
+
+
+class NestedRowField(RowField):
+    """ Related object represented by a nested row serializer.
+
+    The related object is None when it doesn't exist, or missing from the
+    output if skip_missing is set (what DRF does for reverse one to one
+    relations). Collapsed, it is represented by its key. """
+
+    def __init__(self, serializer_class, source=None, skip_missing=False):
+        super(NestedRowField, self).__init__(source)
+        self.serializer_class = serializer_class
+        self.skip_missing = skip_missing
+
+    def lookups(self, prefix, selection=None):
+        prefix = prefix + self.source + '__'
+        if selection is COLLAPSED:
+            return [prefix + self.serializer_class.key]
+        return [prefix + 'pk'] + self.serializer_class.lookups(prefix,
+                                                               selection)
+
+    def build(self, row, prefix, context, selection=None):
+        prefix = prefix + self.source + '__'
+        if selection is COLLAPSED:
+            value = row[prefix + self.serializer_class.key]
+        elif row[prefix + 'pk'] is not None:
+            return self.serializer_class.build(row, prefix, context,
+                                               selection)
+        else:
+            value = None
+        if value is None and self.skip_missing:
+            return SKIP
+        return value
+
+
+class ManyRowField(RowField):
+    """ To-many relation represented by a list of nested rows.
+
+    Related rows of every object are fetched with a single query, in the
+    default ordering of the related model. related_query_name is the name
+    used to filter the related model by the serialized objects. """
+
+    def __init__(self, serializer_class, related_query_name):
+        super(ManyRowField, self).__init__()
+        self.serializer_class = serializer_class
+        self.related_query_name = related_query_name
+
+    def lookups(self, prefix, selection=None):
+        return []
+
+    def build(self, row, prefix, context, selection=None):
+        return []
+
+    def fetch(self, pks, context, selection=None, using=None):
+        """ Return the representations of the related rows by object pk,
+        read from the using database. """
+        serializer_class = self.serializer_class
+        queryset = serializer_class.model._default_manager.using(
+            using).filter(**{self.related_query_name + '__in': pks})
+        related: Dict[Any, List[Any]] = {}
+        if selection is COLLAPSED:
+            rows = queryset.values_list(self.related_query_name,
+                                        serializer_class.key)
+            for pk, key in rows:
+                related.setdefault(pk, []).append(key)
+            return related
+
+        rows = queryset.values(self.related_query_name,
+                               *serializer_class.lookups('', selection))
+        for row in rows:
+            related.setdefault(row[self.related_query_name], []).append(
+                serializer_class.build(row, '', context, selection))
+        return related
+
+
+class RowSerializer:
+    """ Read-only row serializer.
+
+    Subclasses set the model and its fields as (name, RowField) pairs in
+    output order. Nested many fields are only supported at the top level.
+    key is the field representing a collapsed relation to the model,
+    relations to models without key are left out when collapsed.
+
+    fields and expand select the output, see select.
+
+    Usage:
+        serializer = RideRowSerializer(context={'request': request},
+                                       fields=['id', 'offered_by.username'])
+        data = serializer.serialize(serializer.values(queryset),
+                                    using=queryset.db)
+    """
+
+    model: Optional[Type[Model]] = None
+    fields: Tuple[Tuple[str, RowField], ...] = ()
+    key: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, field in cls.fields:
+            field.bind(name, cls.model)
+
+    def __init__(self, context=None, fields=None, expand=None):
+        self.context = context or {}
+        self.selection = None
+        if fields is not None or expand is not None:
+            self.selection = self.select(fields, expand)
+
+    @classmethod
+    def paths(cls, prefix=''):
+        """ Return the dotted path of every field, nested ones included. """
+        paths = []
+        for name, field in cls.fields:
+            paths.append(prefix + name)
+            if isinstance(field, (NestedRowField, ManyRowField)):
+                paths.extend(field.serializer_class.paths(
+                    prefix + name + '.'))
+        return paths
+
+    @classmethod
+    def select(cls, fields=None, expand=None):
+        """ Return the selection tree of the fields to output.
+
+        fields are the dotted paths of the fields to output, a relation
+        path selects all its fields, every field by default. expand are
+        the paths of the relations to expand, the rest are collapsed,
+        every relation is expanded by default. """
+        selection: Dict[str, Any] = {}
+        for name, field in cls.fields:
+            nested = None
+            if fields is not None and name not in fields:
+                nested = [path[len(name) + 1:] for path in fields
+                          if path.startswith(name + '.')]
+                if not nested:
+                    continue
+            if not isinstance(field, (NestedRowField, ManyRowField)):
+                selection[name] = None
+            elif expand is None or name in expand:
+                selection[name] = field.serializer_class.select(
+                    nested,
+                    None if expand is None else
+                    [path[len(name) + 1:] for path in expand
+                     if path.startswith(name + '.')]
+                )
+            elif field.serializer_class.key is not None:
+                selection[name] = COLLAPSED
+        return selection
+
+    @classmethod
+    def lookups(cls, prefix, selection=None):
+        """ Return every .values() lookup needed by the serializer. """
+        lookups: List[str] = []
+        for name, field in cls.fields:
+            if selection is None:
+                lookups.extend(field.lookups(prefix))
+            elif name in selection:
+                lookups.extend(field.lookups(prefix, selection[name]))
+        return lookups
+
+    @classmethod
+    def build(cls, row, prefix, context, selection=None):
+        """ Return the representation of a row. """
+        data: Dict[str, Any] = {}
+        for name, field in cls.fields:
+            if selection is None:
+                value = field.build(row, prefix, context)
+            elif name in selection:
+                value = field.build(row, prefix, context, selection[name])
+            else:
+                continue
+            if value is not SKIP:
+                data[name] = value
+        return data
+
+    def values(self, queryset, *lookups):
+        """ Return queryset rows with the columns the serializer needs,
+        plus the extra lookups. """
+        return queryset.values('pk', *lookups,
+                               *self.lookups('', self.selection))
+
+    def serialize(self, rows, using=None):
+        """ Return the representations of rows.
+
+        using is the database the rows were read from, their to-many
+        relations are read from it as well (the shard of the rows). """
+        rows = list(rows)
+        selection = self.selection
+        data = [self.build(row, '', self.context, selection) for row in rows]
+        many = [(name, field) for name, field in self.fields
+                if isinstance(field, ManyRowField) and
+                (selection is None or name in selection)]
+        if many and rows:
+            pks = [row['pk'] for row in rows]
+            for name, field in many:
+                related = field.fetch(
+                    pks, self.context,
+                    None if selection is None else selection[name], using)
+                for row, item in zip(rows, data):
+                    item[name] = related.get(row['pk'], [])
+        return data
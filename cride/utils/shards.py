@@ -0,0 +1,425 @@
+""" Circle sharding.
+
+Circle-scoped data (memberships, invitations, rides, their passengers and
+waitlists, outbox events) can be split by circle between the databases
+listed in DATABASE_SHARDS. The shard of a circle is stored in its shard
+column, the shard map, and queries are routed to it by ShardRouter:
+
+* Fetched rows are saved and followed to the database they came from.
+* Relations of a circle (circle.ride_set, circle.members...) go to its
+  shard.
+* Anything else goes to the shard of the current context, set for the
+  request by the circle routed views and for the tasks they queue by the
+  Celery message headers. Tasks about a circle look its shard up again
+  with use_circle_shard, in case it was moved since they were queued.
+
+Users, profiles and circles are reference tables: written to the default
+database and copied to every shard once committed there, so circle-scoped
+queries can still join them. Primary keys of circle-scoped tables are
+64-bit and come from disjoint ranges on every shard, so circles can be
+moved between shards keeping their keys; check_id_ranges reports the
+ranges running out.
+
+Nothing changes while DATABASE_SHARDS is empty. """
+
+# Django
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+
+# Utilities
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+import copy
+import functools
+
+
+# Circle-scoped models and their lookup of the circle, in insert order.
+SHARDED_MODELS = {
+    'circles.Membership': 'circle',
+    'circles.Invitation': 'circle',
+    'rides.Ride': 'offered_in',
+    'rides.ArchivedRide': 'offered_in',
+    'rides.WaitlistEntry': 'ride__offered_in',
+    'notifications.PendingNotification': 'ride__offered_in',
+    'events.OutboxEvent': 'circle',
+}
+
+# Models copied to every shard.
+REFERENCE_MODELS = ('users.User', 'users.Profile', 'circles.Circle')
+
+SHARD_KEY_MODEL = 'circles.Circle'
+
+_shard = ContextVar('shard', default=None)
+
+
+def shards():
+    """ Return the shard aliases, [None] (the router's choice) when the
+    data isn't sharded. """
+    return settings.DATABASE_SHARDS or [None]
+
+
+def current_shard():
+    """ Return the shard of the current context, if any. """
+    return _shard.get()
+
+
+@contextmanager
+def use_shard(alias):
+    """ Route the circle-scoped queries made inside the block to alias. """
+    token = _shard.set(alias)
+    try:
+        yield
+    finally:
+        _shard.reset(token)
+
+
+class CircleMoveInProgress(Exception):
+    """ The circle is being moved to another shard. """
+
+
+@contextmanager
+def use_circle_shard(circle_pk):
+    """ Route the circle-scoped queries made inside the block to the
+    current shard of a circle, rather than the shard of the context (the
+    one a task was queued from, before the circle was moved).
+
+    Raise CircleMoveInProgress while the circle is moved, its data must
+    not be written until then. """
+    Circle = apps.get_model(SHARD_KEY_MODEL)
+    circle = Circle.objects.using(DEFAULT_DB_ALIAS).filter(
+        pk=circle_pk).values('shard', 'moving').first()
+    if circle is not None and circle['moving']:
+        raise CircleMoveInProgress(circle_pk)
+    with use_shard(circle and circle['shard']):
+        yield
+
+
+def pin_shard(alias):
+    """ Route the rest of the current use_shard block to alias. """
+    _shard.set(alias)
+
+
+def shard_routed(view):
+    """ Scope the shard pinned by the view to the request.
+
+    on_commit callbacks of the request run inside the scope, so the tasks
+    they queue are routed to the same shard. """
+    @functools.wraps(view)
+    def inner(request, *args, **kwargs):
+        with use_shard(None):
+            return view(request, *args, **kwargs)
+    return inner
+
+
+def each_shard():
+    """ Yield every shard alias, routing the circle-scoped queries to it
+    until the next one. """
+    for alias in shards():
+        with use_shard(alias):
+            yield alias
+
+
+def pick_shard():
+    """ Return the shard holding the fewest circles. """
+    if not settings.DATABASE_SHARDS:
+        return DEFAULT_DB_ALIAS
+    Circle = apps.get_model(SHARD_KEY_MODEL)
+    circles = dict(Circle.objects.values_list('shard').annotate(
+        count=Count('pk')).order_by())
+    return min(settings.DATABASE_SHARDS,
+               key=lambda alias: circles.get(alias, 0))
+
+
+@functools.lru_cache(maxsize=None)
+def sharded_models():
+    """ Return the circle-scoped models, with the tables of their many to
+    many fields, and their lookup of the circle. """
+    sharded = {}
+    for label, lookup in SHARDED_MODELS.items():
+        model = apps.get_model(label)
+        sharded[model] = lookup
+        for field in model._meta.local_many_to_many:
+            sharded[field.remote_field.through] = \
+                field.m2m_field_name() + '__' + lookup
+    return sharded
+
+
+def is_sharded(model):
+    return model in sharded_models()
+
+
+class ShardRouter:
+    """ Circle sharding database router.
+
+    Leaves the models that aren't circle-scoped to the next routers. """
+
+    def db_for_shard(self, model, instance=None, **hints):
+        if not settings.DATABASE_SHARDS or not is_sharded(model):
+            return None
+        if instance is not None:
+            if is_sharded(type(instance)) and not instance._state.adding \
+                    and instance._state.db:
+                return instance._state.db
+            if instance._meta.label == SHARD_KEY_MODEL:
+                return instance.shard
+        return _shard.get() or DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, instance=None, **hints):
+        """ Also follow the relations of circle-scoped rows to reference
+        tables (ride.passenger, ride.offered_by...) on their shard. """
+        if settings.DATABASE_SHARDS and instance is not None and \
+                is_sharded(type(instance)) and not instance._state.adding:
+            return instance._state.db
+        return self.db_for_shard(model, instance, **hints)
+
+    db_for_write = db_for_shard
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """ Reference rows exist on every database: replicas mirror the
+        primary and shards hold copies. Shards are migrated before they're
+        listed in DATABASE_SHARDS, so every database is accepted. """
+        if obj1._state.db in settings.DATABASES and \
+                obj2._state.db in settings.DATABASES:
+            return True
+        return None
+
+
+def replica_shards():
+    """ Return the shards holding a copy of the reference tables. """
+    return [alias for alias in settings.DATABASE_SHARDS
+            if alias != DEFAULT_DB_ALIAS]
+
+
+def copy_to_shards(instance):
+    """ Save a reference row of the default database to every shard.
+
+    The whole row is saved, inserted if the shard doesn't have it yet. """
+    for alias in replica_shards():
+        clone = copy.copy(instance)
+        clone._state = copy.copy(instance._state)
+        clone._state.adding = False
+        clone.save_base(using=alias, raw=True)
+
+
+def copy_rows(model, pks):
+    """ Copy reference rows of the default database to every shard. """
+    for instance in model._base_manager.using(DEFAULT_DB_ALIAS).filter(
+            pk__in=pks):
+        copy_to_shards(instance)
+
+
+def delete_from_shards(model, pk):
+    """ Delete a reference row from every shard. """
+    for alias in replica_shards():
+        model._base_manager.using(alias).filter(pk=pk).delete()
+
+
+def replicate(model, pks):
+    """ Copy reference rows updated in bulk (queryset.update()) to every
+    shard, once the transaction of the default database commits. """
+    if not replica_shards():
+        return
+    transaction.on_commit(functools.partial(copy_rows, model, list(pks)),
+                          using=DEFAULT_DB_ALIAS)
+
+
+def replicate_saved(sender, instance, raw=False, using=None, **kwargs):
+    """ post_save receiver copying reference rows to the shards on commit.
+
+    The row is copied as saved, later changes to the instance are left for
+    its next save. """
+    if raw or using != DEFAULT_DB_ALIAS or not replica_shards():
+        return
+    transaction.on_commit(functools.partial(copy_to_shards,
+                                            copy.copy(instance)),
+                          using=DEFAULT_DB_ALIAS)
+
+
+def replicate_deleted(sender, instance, using=None, **kwargs):
+    """ post_delete receiver deleting reference rows from the shards on
+    commit. """
+    if using != DEFAULT_DB_ALIAS or not replica_shards():
+        return
+    transaction.on_commit(functools.partial(delete_from_shards, sender,
+                                            instance.pk),
+                          using=DEFAULT_DB_ALIAS)
+
+
+def id_range(alias):
+    """ Return the (start, end) range of the primary keys of the
+    circle-scoped tables of a shard. """
+    spacing = settings.DATABASE_SHARD_ID_SPACING
+    start = settings.DATABASE_SHARDS.index(alias) * spacing
+    return start, start + spacing
+
+
+def last_ids(alias):
+    """ Yield the circle-scoped models of a shard and their largest primary
+    key, skipping the tables not created yet. """
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for model in sharded_models():
+            table, pk = model._meta.db_table, model._meta.pk.column
+            if table not in tables:
+                continue
+            cursor.execute('SELECT MAX({}) FROM {}'.format(
+                quote(pk), quote(table)))
+            yield model, cursor.fetchone()[0] or 0
+
+
+def check_id_ranges(app_configs=None, databases=None, **kwargs):
+    """ Database system check of the primary keys of every shard, which
+    must stay in its range: keys of the next shard's range would collide
+    with its rows once circles are moved. """
+    errors = []
+    for alias in settings.DATABASE_SHARDS:
+        if not databases or alias not in databases:
+            continue
+        start, end = id_range(alias)
+        for model, last in last_ids(alias):
+            if last >= end:
+                errors.append(checks.Error(
+                    'Primary keys of {} on {} reached {}, the range of the '
+                    'next shard.'.format(model._meta.label, alias, end),
+                    hint='Raise DATABASE_SHARD_ID_SPACING.',
+                    obj=model,
+                    id='shards.E001'
+                ))
+            elif last >= start + (end - start) * 0.9:
+                errors.append(checks.Warning(
+                    'Primary keys of {} on {} used 90% of their range.'
+                    .format(model._meta.label, alias),
+                    hint='Raise DATABASE_SHARD_ID_SPACING.',
+                    obj=model,
+                    id='shards.W001'
+                ))
+    return errors
+
+
+def reserve_ids(using):
+    """ Start the primary keys of the circle-scoped tables of a shard after
+    the ones of the previous shards.
+
+    Raise ImproperlyConfigured if a table already holds keys of the range
+    of the next shard. """
+    if using not in settings.DATABASE_SHARDS:
+        return
+    start, end = id_range(using)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    for model, last in list(last_ids(using)):
+        if last >= end:
+            raise ImproperlyConfigured(
+                'Primary keys of {} on {} reached {}, the range of the next '
+                'shard.'.format(model._meta.label, using, end))
+        if not start or last >= start:
+            continue
+        table, pk = model._meta.db_table, model._meta.pk.column
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT setval(pg_get_serial_sequence(%s, %s), %s)',
+                    [quote(table), pk, start])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s',
+                               [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) '
+                               'VALUES (%s, %s)', [table, start])
+
+
+def reserve_ids_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """ post_migrate receiver reserving the primary keys of a shard. """
+    reserve_ids(using)
+
+
+def batches(queryset, size):
+    """ Yield the rows of queryset in lists of at most size rows. """
+    rows = queryset.iterator(chunk_size=size)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CircleChanged(Exception):
+    """ Rows of the circle were written while it was moved. """
+
+
+def move_circle(circle, target, chunk_size=1000):
+    """ Move the data of a circle to the target shard and return the
+    number of rows moved.
+
+    Rows are locked on the previous shard and copied keeping their primary
+    keys in a single transaction on the target. They're deleted from the
+    previous shard before committing, and if rows were written to the
+    circle in the meantime (more rows are deleted than copied) the move is
+    rolled back raising CircleChanged. Otherwise the circle is pointed to
+    the target.
+
+    The circle should be marked as moving beforehand: the API refuses its
+    writes, and the tasks leave it alone (see use_circle_shard). """
+    source = circle.shard
+    if source == target:
+        return 0
+    models = sharded_models()
+    copied = {}
+    with transaction.atomic(using=source):
+        with transaction.atomic(using=target):
+            for model, lookup in models.items():
+                queryset = model._base_manager.using(source).filter(
+                    **{lookup: circle.pk}).order_by('pk').select_for_update(
+                    of=('self',))
+                copied[model] = 0
+                for batch in batches(queryset, chunk_size):
+                    model._base_manager.using(target).bulk_create(batch)
+                    copied[model] += len(batch)
+
+            # Dependent rows are deleted first, nothing is left to cascade
+            # to.
+            for model, lookup in reversed(list(models.items())):
+                deleted = model._base_manager.using(source).filter(
+                    **{lookup: circle.pk})._raw_delete(source)
+                if deleted != copied[model]:
+                    raise CircleChanged(
+                        '{} rows of {} were written while moving {}.'.format(
+                            deleted - copied[model], model._meta.label,
+                            circle))
+
+        circle.shard = target
+        circle.moving = False
+        circle.save(update_fields=['shard', 'moving', 'modified'])
+    return sum(copied.values())
+
+
+def sync_shard(alias, chunk_size=1000):
+    """ Copy the reference tables of the default database to a shard and
+    return the number of rows copied.
+
+    Used to fill a new shard, or after rows were written without their
+    signals (load_fixtures). Rows deleted from the default database are
+    left on the shard. """
+    copied = 0
+    for label in REFERENCE_MODELS:
+        model = apps.get_model(label)
+        fields = [field.name for field in model._meta.concrete_fields
+                  if not field.primary_key]
+        queryset = model._base_manager.using(DEFAULT_DB_ALIAS).order_by('pk')
+        target = model._base_manager.using(alias)
+        for batch in batches(queryset, chunk_size):
+            existing = set(target.filter(
+                pk__in=[row.pk for row in batch]).values_list('pk', flat=True))
+            with transaction.atomic(using=alias):
+                target.bulk_create([row for row in batch
+                                    if row.pk not in existing])
+                target.bulk_update([row for row in batch
+                                    if row.pk in existing], fields)
+            copied += len(batch)
+    return copied
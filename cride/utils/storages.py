@@ -0,0 +1,31 @@
+""" Media storages. """
+
+# Utilities
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class MediaStorage(S3Boto3Storage):
+    """ S3 media storage.
+
+    Picture variants never change once written (their path holds a hash of
+    the original picture), so they are cached for a year without
+    revalidation. """
+
+    def get_object_parameters(self, name):
+        params = super(MediaStorage, self).get_object_parameters(name)
+        if '/variants/' in name:
+            params['CacheControl'] = 'public, max-age=31536000, immutable'
+        return params
+
+
+class PrivateStorage(S3Boto3Storage):
+    """ Private S3 storage.
+
+    Files are private to the bucket owner, their URLs are signed and expire
+    after five minutes. """
+
+    location = 'private'
+    default_acl = 'private'
+    file_overwrite = False
+    querystring_auth = True
+    querystring_expire = 300
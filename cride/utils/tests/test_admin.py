@@ -0,0 +1,83 @@
+""" Large table admin tests. """
+
+# Django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+# Models
+from cride.users.models import User
+
+# Utilities
+from cride.utils.fixtures import FixtureLoader
+from typing import List
+from unittest import mock
+
+
+class LargeTableAdminTestCase(TestCase):
+    """ Large table admin mixins test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=250, circles=3, rides=300).load()
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='secret',
+            first_name='Ad', last_name='Min')
+        self.client.force_login(self.admin)
+
+    def test_keyset_pages(self):
+        """ Pages follow each other by primary key, without duplicates. """
+        url = '/admin/users/user/'
+        seen: List[int] = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            cl = response.context['cl']
+            self.assertTrue(cl.keyset)
+            seen.extend(user.pk for user in cl.result_list)
+            url = cl.next_url and '/admin/users/user/' + cl.next_url
+        self.assertEqual(seen, list(User.objects.order_by(
+            '-pk').values_list('pk', flat=True)))
+
+        response = self.client.get('/admin/users/user/', {'o': '2'})
+        self.assertFalse(response.context['cl'].keyset)
+
+    def test_prefix_search(self):
+        """ Search terms match the start of the search fields. """
+        user = User.objects.exclude(pk=self.admin.pk).first()
+        response = self.client.get('/admin/users/profile/',
+                                   {'q': user.username})
+        profiles = response.context['cl'].result_list
+        self.assertIn(user.profile, profiles)
+        for profile in profiles:
+            self.assertTrue(profile.user.username.startswith(user.username) or
+                            profile.user.email.startswith(user.username))
+
+        response = self.client.get('/admin/users/profile/',
+                                   {'q': user.username[1:]})
+        self.assertNotIn(user.profile, response.context['cl'].result_list)
+
+    def test_profile_queries(self):
+        """ Profile pages query the users along with the profiles. """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/users/profile/')
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+        self.assertLess(len(queries), 10)
+
+    def test_estimated_count(self):
+        """ Big tables show the estimate instead of counting rows. """
+        with mock.patch('cride.utils.admin.estimate_count',
+                        return_value=10 ** 7), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/rides/ride/')
+        self.assertEqual(response.context['cl'].result_count, 10 ** 7)
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries))
+        self.assertContains(response, '~10000000 rides')
+
+        with mock.patch('cride.utils.admin.estimate_count',
+                        return_value=10 ** 7):
+            response = self.client.get('/admin/circles/circle/',
+                                       {'o': '1', 'p': '3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [])
@@ -0,0 +1,72 @@
+""" Async views tests. """
+
+# Django
+from django.test import RequestFactory, TransactionTestCase
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User
+
+# Views
+from cride.circles.views.feed import circle_detail, member_list
+from cride.rides.views.feed import ride_feed
+
+# Utilities
+from asgiref.sync import async_to_sync
+from cride.utils.fixtures import FixtureLoader
+import json
+
+
+class AsyncViewsTestCase(TransactionTestCase):
+    """ Async views test case.
+
+    Async views run their queries from the thread pool, so the data must be
+    committed for them to see it. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=30, circles=3, rides=90, future_days=10).load()
+        self.circle = Circle.objects.order_by('pk').first()
+        member = Membership.objects.filter(circle=self.circle).first()
+        self.token = Token.objects.create(user_id=member.user_id).key
+        self.outsider = User.objects.exclude(
+            membership__circle=self.circle).first()
+        self.client = APIClient()
+        self.factory = RequestFactory()
+
+    def assertSameResponse(self, view, url, token):
+        """ Async view must return the same output than the sync view. """
+        authorization = 'Token {}'.format(token) if token else ''
+        self.client.credentials(HTTP_AUTHORIZATION=authorization)
+        expected = self.client.get(url)
+
+        request = self.factory.get(url, HTTP_AUTHORIZATION=authorization)
+        response = async_to_sync(view)(request,
+                                       slug_name=self.circle.slug_name)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), expected.json())
+        return response
+
+    def test_same_output(self):
+        """ Ride feed, circle detail and member list. """
+        slug_name = self.circle.slug_name
+        self.assertSameResponse(
+            ride_feed, '/circles/{}/rides/'.format(slug_name), self.token)
+        self.assertSameResponse(
+            circle_detail, '/circles/{}/'.format(slug_name), self.token)
+        self.assertSameResponse(
+            member_list, '/circles/{}/members/'.format(slug_name), self.token)
+
+    def test_same_errors(self):
+        """ Authentication and permission errors are preserved. """
+        url = '/circles/{}/rides/'.format(self.circle.slug_name)
+        response = self.assertSameResponse(ride_feed, url, None)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+        self.assertSameResponse(ride_feed, url, 'invalid')
+
+        token = Token.objects.create(user=self.outsider).key
+        self.assertSameResponse(ride_feed, url, token)
@@ -0,0 +1,78 @@
+""" Batch lookup endpoints tests. """
+
+# Django
+from django.test import TestCase
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User
+
+# Utilities
+from cride.utils.fixtures import FixtureLoader
+
+
+class BatchRetrieveTestCase(TestCase):
+    """ Users and circles batch endpoints test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=80, circles=4, rides=0).load()
+        self.membership = Membership.objects.filter(is_active=True).first()
+        self.user = self.membership.user
+        token = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+
+    def test_users(self):
+        """ Only the user and its circles members are returned. """
+        circles = Membership.objects.filter(
+            user=self.user, is_active=True).values('circle')
+        visible = set(User.objects.filter(
+            membership__circle__in=circles,
+            membership__is_active=True
+        ).values_list('username', flat=True))
+        usernames = list(User.objects.order_by('?').values_list(
+            'username', flat=True)[:50]) + ['nobody']
+
+        response = self.client.get('/users/batch/',
+                                   {'usernames': usernames[:1]})
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(2):
+            response = self.client.get('/users/batch/',
+                                       {'usernames': ','.join(usernames)})
+        self.assertEqual(response.status_code, 200)
+
+        expected = [name for name in usernames if name in visible]
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            expected)
+        self.assertEqual(response.data['missing'], [
+            name for name in usernames if name not in visible])
+        self.assertIn('profile', response.data['results'][0])
+
+    def test_circles(self):
+        """ Circles are returned in the requested order. """
+        slugs = list(Circle.objects.order_by('?').values_list(
+            'slug_name', flat=True))
+        with self.assertNumQueries(2):
+            response = self.client.get('/circles/batch/', {
+                'slugs': ','.join(['missing'] + slugs + slugs)})
+        self.assertEqual(
+            [circle['slug_name'] for circle in response.data['results']],
+            slugs)
+        self.assertEqual(response.data['missing'], ['missing'])
+
+    def test_empty(self):
+        """ Batches must have at least one value. """
+        response = self.client.get('/users/batch/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_too_many(self):
+        """ Batches can't have more than batch_max_size values. """
+        response = self.client.get('/circles/batch/', {
+            'slugs': ','.join(str(i) for i in range(101))})
+        self.assertEqual(response.status_code, 400)
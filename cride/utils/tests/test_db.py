@@ -0,0 +1,119 @@
+""" Database routing tests. """
+
+# Django
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.utils.db import ReplicaRouter, read_only
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTestCase(SimpleTestCase):
+    """ Replica router test case. """
+
+    def test_routing(self):
+        """ Only reads inside read only blocks use the replica. """
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Ride), 'default')
+        with read_only():
+            self.assertEqual(router.db_for_read(Ride), 'replica')
+            self.assertEqual(router.db_for_write(Ride), 'default')
+            self.assertEqual(router.db_for_read(Ride), 'default')
+        with read_only():
+            self.assertEqual(router.db_for_read(Ride), 'replica')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaReadMixinTestCase(TransactionTestCase):
+    """ Replica read mixin test case.
+
+    The replica is a mirror of the primary using its own connection. """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        """ Test case setup. """
+        self.user = User.objects.create(
+            first_name='Nicolas',
+            last_name='Catalano',
+            email='nec.catalano@gmail.com',
+            username='nicolasCatalano',
+            password='nico1234'
+        )
+        profile = Profile.objects.create(user=self.user)
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        Membership.objects.create(
+            user=self.user,
+            profile=profile,
+            circle=self.circle,
+            remaining_invitations=2
+        )
+        token = Token.objects.create(user=self.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+        self.url = '/circles/{}/rides/'.format(self.circle.slug_name)
+
+    def request(self, method, url, data=None):
+        """ Return the response and the queries run on each database. """
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, len(primary), len(replica)
+
+    def test_safe_requests_read_from_replica(self):
+        """ List and retrieve actions only query the replica. """
+        response, primary, replica = self.request('get', self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        url = '/circles/{}/'.format(self.circle.slug_name)
+        response, primary, replica = self.request('get', url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+
+    def test_reads_after_write_use_primary(self):
+        """ Invitations read sticks to the primary once it has written. """
+        url = '/circles/{}/members/{}/invitations/'.format(
+            self.circle.slug_name,
+            self.user.username
+        )
+        with CaptureQueriesContext(connections['default']) as primary:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['invitations']), 2)
+
+        queries = [query['sql'] for query in primary.captured_queries]
+        first_write = next(i for i, sql in enumerate(queries)
+                           if sql.startswith('INSERT'))
+        self.assertTrue(any(sql.startswith('SELECT')
+                            for sql in queries[first_write:]))
+
+    def test_unsafe_requests_use_primary(self):
+        """ Writes never touch the replica. """
+        data = {
+            'available_seats': 3,
+            'departure_location': 'Ciudad Universitaria',
+            'departure_date': '2100-01-01T10:00:00Z',
+            'arrival_location': 'Centro',
+            'arrival_date': '2100-01-01T11:00:00Z',
+        }
+        response, primary, replica = self.request('post', self.url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
@@ -0,0 +1,118 @@
+""" Sparse fieldsets tests. """
+
+# Django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Membership
+
+# Utilities
+from cride.utils.fixtures import FixtureLoader
+
+
+class SparseFieldsTestCase(TestCase):
+    """ ?fields= and ?expand= test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=40, circles=1, rides=60, passenger_ratio=0.8,
+                      history_days=0, future_days=30).load()
+        membership = Membership.objects.filter(is_active=True).first()
+        self.circle = membership.circle
+        token = Token.objects.create(user=membership.user).key
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+
+    def get(self, url, **params):
+        """ Return the response data and the row queries of a request. """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [query['sql'] for query in queries]
+
+    def test_rides(self):
+        """ Ride fields and relations are only queried when requested. """
+        url = '/circles/{}/rides/'.format(self.circle.slug_name)
+        cases = [
+            # (params, queries, users joined, profiles joined)
+            ({}, 6, True, True),
+            ({'fields': 'id,departure_date,available_seats'}, 5, False,
+             False),
+            ({'fields': 'id,offered_by.username'}, 5, True, False),
+            ({'fields': 'id,passenger'}, 6, True, True),
+            ({'expand': ''}, 6, True, False),
+            ({'expand': 'offered_by'}, 6, True, False),
+            ({'expand': 'offered_by,offered_by.profile'}, 6, True, True),
+        ]
+        for params, count, users, profiles in cases:
+            data, queries = self.get(url, **params)
+            self.assertEqual(len(queries), count, params)
+            sql = ' '.join(queries[-count + 4:])
+            self.assertEqual('"users_user"' in sql, users, params)
+            self.assertEqual('"users_profile"' in sql, profiles, params)
+
+        data, _ = self.get(url, fields='id,departure_date,available_seats')
+        self.assertEqual(set(data['results'][0]),
+                         {'id', 'departure_date', 'available_seats'})
+
+        data, _ = self.get(url, expand='')
+        ride = data['results'][0]
+        self.assertIsInstance(ride['offered_by'], str)
+        self.assertTrue(all(isinstance(passenger, str)
+                            for passenger in ride['passenger']))
+
+        data, _ = self.get(url, fields='offered_by.profile.reputation')
+        ride = data['results'][0]
+        self.assertEqual(list(ride), ['offered_by'])
+        self.assertEqual(list(ride['offered_by']), ['profile'])
+        self.assertEqual(list(ride['offered_by']['profile']), ['reputation'])
+
+    def test_members(self):
+        """ Member fields and relations are only queried when requested. """
+        url = '/circles/{}/members/'.format(self.circle.slug_name)
+        cases = [
+            ({}, True),
+            ({'fields': 'user.username,rides_taken'}, False),
+            ({'expand': ''}, False),
+        ]
+        for params, profiles in cases:
+            data, queries = self.get(url, **params)
+            self.assertEqual(len(queries), 5, params)
+            self.assertEqual('"users_profile"' in queries[-1], profiles,
+                             params)
+        self.assertIsInstance(data['results'][0]['user'], str)
+
+    def test_circles(self):
+        """ Circles list and batch outputs are restricted too. """
+        data, _ = self.get('/circles/', fields='slug_name,name')
+        self.assertEqual(data['results'][0],
+                         {'slug_name': self.circle.slug_name,
+                          'name': self.circle.name})
+        data, _ = self.get('/circles/batch/', slugs=self.circle.slug_name,
+                           fields='name')
+        self.assertEqual(data['results'], [{'name': self.circle.name}])
+
+    def test_users(self):
+        """ Users batch output is restricted too. """
+        usernames = Membership.objects.filter(
+            circle=self.circle, is_active=True
+        ).values_list('user__username', flat=True)[:5]
+        data, queries = self.get('/users/batch/',
+                                 usernames=','.join(usernames),
+                                 fields='first_name')
+        self.assertNotIn('"users_profile"', queries[-1])
+        self.assertEqual(len(data['results']), 5)
+        self.assertEqual(set(data['results'][0]), {'first_name'})
+
+    def test_unknown_field(self):
+        """ Unknown fields are rejected. """
+        response = self.client.get(
+            '/circles/{}/rides/'.format(self.circle.slug_name),
+            {'fields': 'id,offered_by.password'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,69 @@
+""" Fixture loader tests. """
+
+# Django
+from django.db.models import Count, Sum
+from django.test import TestCase
+
+# Models
+from cride.circles.models import Circle, Membership, Invitation
+from cride.rides.models import Ride
+from cride.users.models import Profile
+
+# Fixtures
+from cride.utils.fixtures import FixtureLoader
+
+
+class FixtureLoaderTestCase(TestCase):
+    """ Fixture loader test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.summary = FixtureLoader(users=60, circles=5, rides=300,
+                                     passenger_ratio=0.8, batch_size=50).load()
+
+    def test_counts(self):
+        """ Every requested object is created. """
+        self.assertEqual(Profile.objects.count(), 60)
+        self.assertEqual(Circle.objects.count(), 5)
+        self.assertEqual(Ride.objects.count(), 300)
+        self.assertEqual(Membership.objects.count(),
+                         self.summary['memberships'])
+        self.assertEqual(Ride.passenger.through.objects.count(),
+                         self.summary['passengers'])
+
+    def test_counters_are_consistent(self):
+        """ Stats counters match the generated rides and invitations. """
+        for circle in Circle.objects.annotate(offered=Count('ride')):
+            self.assertEqual(circle.rides_offered, circle.offered)
+            taken = Ride.passenger.through.objects.filter(
+                ride__offered_in=circle).count()
+            self.assertEqual(circle.rides_taken, taken)
+
+        for profile in Profile.objects.all():
+            self.assertEqual(profile.rides_offered,
+                             Ride.objects.filter(
+                                 offered_by=profile.user_id).count())
+            self.assertEqual(profile.rides_taken,
+                             Ride.objects.filter(
+                                 passenger=profile.user_id).count())
+
+        for member in Membership.objects.all():
+            self.assertEqual(member.rides_taken, Ride.objects.filter(
+                offered_in=member.circle_id,
+                passenger=member.user_id
+            ).count())
+            self.assertEqual(member.used_invitations, Invitation.objects.filter(
+                circle=member.circle_id,
+                issue_by=member.user_id,
+                used=True
+            ).count())
+
+        totals = Membership.objects.aggregate(offered=Sum('rides_offered'))
+        self.assertEqual(totals['offered'], 300)
+
+    def test_new_objects_after_load(self):
+        """ Primary key sequences are synced after the load. """
+        ride = Ride.objects.order_by('pk').last()
+        ride.pk = None
+        ride.save()
+        self.assertEqual(Ride.objects.count(), 301)
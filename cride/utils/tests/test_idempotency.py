@@ -0,0 +1,116 @@
+""" Idempotency keys tests. """
+
+# Django
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.utils.idempotency import cache_key, release
+from datetime import timedelta
+
+
+class IdempotencyTestCase(TestCase):
+    """ Idempotency keys test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        cache.clear()
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        self.clients, self.tokens = {}, {}
+        for name in ('driver', 'ana'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Membership.objects.create(
+                user=user,
+                profile=Profile.objects.create(user=user),
+                circle=self.circle
+            )
+            self.tokens[name] = 'Token {}'.format(
+                Token.objects.create(user=user).key)
+            self.clients[name] = APIClient()
+            self.clients[name].credentials(
+                HTTP_AUTHORIZATION=self.tokens[name])
+        self.url = '/circles/fciencias/rides/'
+        departure = timezone.now() + timedelta(days=1)
+        self.ride = {
+            'available_seats': 3,
+            'departure_location': 'Ciudad Universitaria',
+            'departure_date': departure.isoformat(),
+            'arrival_location': 'Centro',
+            'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+        }
+
+    def offer_ride(self, key, **data):
+        return self.clients['driver'].post(
+            self.url, dict(self.ride, **data), format='json',
+            HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_create_replayed(self):
+        """ Retries of a ride creation get the first response. """
+        response = self.offer_ride('a1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        with self.assertNumQueries(0):
+            retry = self.offer_ride('a1')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, response.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Ride.objects.count(), 1)
+
+        self.assertEqual(self.offer_ride('a2').status_code, 201)
+        self.assertEqual(Ride.objects.count(), 2)
+        self.assertEqual(self.offer_ride('a1', available_seats=2).status_code,
+                         422)
+
+    def test_join_replayed(self):
+        """ Retries of a join don't join twice. """
+        self.offer_ride('a1')
+        url = '{}{}/join/'.format(self.url, Ride.objects.get().pk)
+        for _ in range(2):
+            response = self.clients['ana'].post(url,
+                                                HTTP_IDEMPOTENCY_KEY='j1')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(Membership.objects.get(
+            user__username='ana').rides_taken, 1)
+        self.assertEqual(self.clients['ana'].post(url).status_code, 400)
+
+    @override_settings(IDEMPOTENCY_LOCK_WAIT=0.1)
+    def test_in_progress(self):
+        """ Duplicates of a running request wait for it. """
+        request = RequestFactory().post(
+            self.url, HTTP_AUTHORIZATION=self.tokens['driver'])
+        lock = cache_key(request, 'a1') + ':lock'
+        cache.add(lock, 'running')
+        self.assertEqual(self.offer_ride('a1').status_code, 409)
+
+        cache.delete(lock)
+        self.assertEqual(self.offer_ride('a1').status_code, 201)
+        self.assertIsNone(cache.get(lock))
+
+    def test_release_own_lock(self):
+        """ Locks are only released by the request holding them. """
+        cache.add('lock', 'other')
+        release(cache, 'lock', 'mine')
+        self.assertEqual(cache.get('lock'), 'other')
+        release(cache, 'lock', 'other')
+        self.assertIsNone(cache.get('lock'))
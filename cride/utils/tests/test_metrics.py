@@ -0,0 +1,107 @@
+""" Request metrics tests. """
+
+# Django
+from django.test import TestCase
+from django.test.utils import override_settings
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User, Profile
+
+# Metrics
+from cride.utils import metrics
+from cride.utils.metrics import Histogram
+
+
+class HistogramTestCase(TestCase):
+    """ Histogram test case. """
+
+    def test_render(self):
+        """ Buckets must be cumulative and include sum and count. """
+        histogram = Histogram('test_seconds', 'Test.', buckets=(0.1, 1.0))
+        histogram.observe(0.05, view='ride-list')
+        histogram.observe(0.5, view='ride-list')
+        histogram.observe(3, view='ride-list')
+
+        text = histogram.render()
+        self.assertIn('test_seconds_bucket{view="ride-list",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{view="ride-list",le="1.0"} 2', text)
+        self.assertIn('test_seconds_bucket{view="ride-list",le="+Inf"} 3',
+                      text)
+        self.assertIn('test_seconds_sum{view="ride-list"} 3.55', text)
+        self.assertIn('test_seconds_count{view="ride-list"} 3', text)
+
+
+class RequestMetricsMiddlewareTestCase(APITestCase):
+    """ Request metrics middleware test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        metrics.registry.reset()
+        self.user = User.objects.create(
+            first_name='Nicolas',
+            last_name='Catalano',
+            email='nec.catalano@gmail.com',
+            username='nicolasCatalano',
+            password='nico1234'
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la Facultad de Ciencias de la UNAM',
+        )
+        Membership.objects.create(
+            user=self.user,
+            profile=self.profile,
+            circle=self.circle,
+            remaining_invitations=2
+        )
+        self.token = Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+
+    def test_request_is_recorded_by_view_name(self):
+        """ Requests are labeled using the resolved view name. """
+        url = '/circles/{}/members/{}/invitations/'.format(
+            self.circle.slug_name,
+            self.user.username
+        )
+        self.client.get(url)
+
+        key = ('membership-invitations', 'GET')
+        queries = metrics.request_queries.snapshot()[key]
+        self.assertEqual(queries['count'], 1)
+        self.assertGreater(queries['sum'], 0)
+        self.assertEqual(
+            metrics.request_latency.snapshot()[key]['count'], 1)
+        self.assertGreater(
+            metrics.request_serialization_time.snapshot()[key]['sum'], 0)
+
+    @override_settings(METRICS_TOKEN='s3cr3t')
+    def test_export(self):
+        """ Metrics are exported in text format. """
+        self.client.get('/circles/{}/rides/'.format(self.circle.slug_name))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer s3cr3t')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'cride_request_db_queries_count{view="ride-list",method="GET"} 1',
+            response.content.decode()
+        )
+
+    def test_export_requires_token(self):
+        """ Metrics are only exported to requests with the metrics token. """
+        for token, authorization in (('', 'Bearer '),
+                                     ('s3cr3t', 'Bearer wrong'),
+                                     ('s3cr3t', 'Token s3cr3t')):
+            self.client.credentials(HTTP_AUTHORIZATION=authorization)
+            with self.settings(METRICS_TOKEN=token):
+                response = self.client.get('/metrics/')
+            self.assertEqual(response.status_code, 403)
+        self.client.credentials()
+        with self.settings(METRICS_TOKEN='s3cr3t'):
+            self.assertEqual(self.client.get('/metrics/').status_code, 403)
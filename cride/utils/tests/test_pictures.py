@@ -0,0 +1,108 @@
+""" Picture variants tests. """
+
+# Django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle
+from cride.users.models import Profile, User
+
+# Serializers
+from cride.circles.serializers import CircleModelSerializer
+from cride.users.serializers import (ProfileModelSerializer,
+                                     UserRowSerializer)
+
+# Utilities
+from cride.utils.pictures import create_variants
+from PIL import Image
+import io
+import os
+import shutil
+import tempfile
+
+
+def image_file(name, size, mode='RGB', fmt='PNG'):
+    """ Return an uploaded image file. """
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128)[:len(mode)]).save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/' + fmt.lower())
+
+
+class PictureVariantsTestCase(TransactionTestCase):
+    """ Picture variants test case. """
+
+    def setUp(self):
+        """ Test case setup. """
+        self.media_root = tempfile.mkdtemp()
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        self.user = User.objects.create_user(
+            email='ana@example.com', username='ana', password='secret1234',
+            first_name='Ana', last_name='Diaz', phone_number='+5491123456789')
+        self.profile = Profile.objects.create(user=self.user)
+
+    def test_profile_upload(self):
+        """ Uploaded pictures get every variant, linked by the
+        serializers. """
+        token = Token.objects.create(user=self.user).key
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token))
+        response = client.patch('/users/ana/profile/', {
+            'picture': image_file('ana.png', (1600, 1200), 'RGBA')
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+        self.profile.refresh_from_db()
+        variants = self.profile.picture_variants
+        self.assertEqual(variants['source'], self.profile.picture.name)
+        for name, size in (('small', 96), ('medium', 320), ('large', 1080)):
+            with Image.open(os.path.join(self.media_root,
+                                         variants[name])) as image:
+                self.assertEqual(image.format, 'JPEG')
+                self.assertEqual(max(image.size), size)
+
+        data = ProfileModelSerializer(self.profile).data
+        self.assertEqual(data['picture'], '/media/' + variants['medium'])
+        serializer = UserRowSerializer(context={'picture_variant': 'small'})
+        row = serializer.serialize(serializer.values(
+            User.objects.filter(pk=self.user.pk)))[0]
+        self.assertEqual(row['profile']['picture'],
+                         '/media/' + variants['small'])
+
+    def test_circle_create(self):
+        """ Circle pictures get variants too, small ones aren't enlarged.
+        """
+        serializer = CircleModelSerializer(data={
+            'name': 'Work', 'slug_name': 'work', 'about': 'Work rides',
+            'picture': image_file('work.jpg', (200, 100), fmt='JPEG')
+        })
+        serializer.is_valid(raise_exception=True)
+        circle = Circle.objects.get(pk=serializer.save().pk)
+        with Image.open(os.path.join(
+                self.media_root, circle.picture_variants['large'])) as image:
+            self.assertEqual(image.size, (200, 100))
+
+    def test_idempotent(self):
+        """ Variants are created once per picture, and not saved if the
+        picture changed meanwhile. """
+        self.profile.picture = image_file('a.png', (400, 400))
+        self.profile.save()
+        variants = create_variants(self.profile)
+        self.assertEqual(create_variants(self.profile), variants)
+
+        stale = Profile.objects.get(pk=self.profile.pk)
+        stale.picture_variants = {}
+        Profile.objects.filter(pk=self.profile.pk).update(
+            picture='users/pictures/other.png')
+        create_variants(stale)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.picture_variants, variants)
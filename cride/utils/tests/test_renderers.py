@@ -0,0 +1,46 @@
+""" Renderers and parsers tests. """
+
+# Django
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+# Django REST Framework
+from rest_framework.renderers import JSONRenderer
+
+# Renderers
+from cride.utils.parsers import ORJSONParser
+from cride.utils.renderers import ORJSONRenderer
+
+# Utilities
+from decimal import Decimal
+import io
+import json
+import uuid
+
+
+class ORJSONRendererTestCase(SimpleTestCase):
+    """ orjson renderer test case. """
+
+    def test_same_output_as_json_renderer(self):
+        """ Values are encoded like DRF's JSONRenderer does. """
+        data = {
+            'departure_date': timezone.now(),
+            'date': timezone.now().date(),
+            'rating': Decimal('4.50'),
+            'detail': gettext_lazy('Not found.'),
+            'id': uuid.uuid4(),
+            'comments': 'Salimos temprano ñ',
+            1: [None, True, 1.5],
+        }
+        expected = JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), expected)
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(expected)),
+                         json.loads(expected))
+
+    def test_indent(self):
+        """ Indented responses fall back to JSONRenderer. """
+        data = {'rides': [1, 2]}
+        accepted = 'application/json; indent=4'
+        self.assertEqual(ORJSONRenderer().render(data, accepted),
+                         JSONRenderer().render(data, accepted))
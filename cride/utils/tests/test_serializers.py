@@ -0,0 +1,81 @@
+""" Row serializers tests. """
+
+# Django
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Serializers
+from cride.circles.serializers import (CircleModelSerializer,
+                                       CircleRowSerializer,
+                                       MembershipModelSerializer,
+                                       MembershipRowSerializer)
+from cride.rides.serializers import RideModelSerializer, RideRowSerializer
+
+# Utilities
+from cride.utils.fixtures import FixtureLoader
+from datetime import timedelta
+
+
+class RowSerializersTestCase(TestCase):
+    """ Row serializers conformance test case.
+
+    Row serializers must render the same JSON as the model serializers
+    they stand for. """
+
+    def setUp(self):
+        """ Test case setup. """
+        FixtureLoader(users=40, circles=3, rides=120,
+                      passenger_ratio=0.8).load()
+        # Give related rows a deterministic default ordering.
+        now = timezone.now()
+        for model in (User, Membership):
+            for i, pk in enumerate(model.objects.values_list('pk', flat=True)):
+                model.objects.filter(pk=pk).update(
+                    created=now - timedelta(seconds=i))
+
+        pictures = Profile.objects.values_list('pk', flat=True)[::2]
+        Profile.objects.filter(pk__in=list(pictures)).update(
+            picture='users/pictures/avatar.png')
+        Profile.objects.filter(pk__in=list(pictures)[::2]).update(
+            picture_variants={'source': 'users/pictures/avatar.png',
+                              'medium': 'users/pictures/variants/a/m.jpg'})
+        Ride.objects.filter(pk__lte=5).update(offered_by=None, rating=4)
+        Membership.objects.filter(pk__lte=5).update(
+            invited_by=User.objects.first())
+        Circle.objects.filter(pk=1).update(picture='circles/pictures/a.png',
+                                           is_limited=True, members_limit=50)
+        self.context = {'request': Request(RequestFactory().get('/'))}
+
+    def assertSameJSON(self, model_serializer_class, row_serializer_class,
+                       queryset):
+        expected = model_serializer_class(queryset, many=True,
+                                          context=self.context).data
+        serializer = row_serializer_class(context=self.context)
+        data = serializer.serialize(serializer.values(queryset))
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_rides(self):
+        """ Rides with and without driver, rating and passengers. """
+        self.assertSameJSON(RideModelSerializer, RideRowSerializer,
+                            Ride.objects.order_by('departure_date'))
+
+    def test_memberships(self):
+        """ Members with and without inviter and picture. """
+        self.assertSameJSON(MembershipModelSerializer,
+                            MembershipRowSerializer,
+                            Membership.objects.all())
+
+    def test_circles(self):
+        """ Circles with and without picture and members limit. """
+        self.assertSameJSON(CircleModelSerializer, CircleRowSerializer,
+                            Circle.objects.all())
@@ -0,0 +1,327 @@
+""" Circle sharding tests. """
+
+# Django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.events.models import OutboxEvent
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+
+# Tasks
+from cride.taskapp.tasks import disable_finished_rides, notify_new_ride
+
+# Utilities
+from cride.events.outbox import record, relay_events
+from cride.rides.suggestions import suggest_rides
+from cride.utils import shards
+from cride.taskapp.celery import add_shard_header
+from cride.utils.shards import pick_shard, reserve_ids, use_shard
+from datetime import timedelta
+from typing import Dict
+from unittest import mock
+import io
+
+
+SHARDS = ['default', 'shard_1', 'shard_2']
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardingTestCase(TransactionTestCase):
+    """ Circle sharding test case.
+
+    Every shard is a separate database. """
+
+    databases = set(SHARDS)
+
+    def setUp(self):
+        """ Test case setup. """
+        for alias in SHARDS:
+            reserve_ids(alias)
+        self.users = {}
+        for name in ('driver', 'ana'):
+            user = User.objects.create(
+                first_name=name,
+                last_name='Catalano',
+                email='{}@comparteride.com'.format(name),
+                username=name,
+                password='nico1234'
+            )
+            Profile.objects.create(user=user)
+            self.users[name] = user
+        self.circle = self.create_circle('fciencias', 'shard_1')
+
+    def create_circle(self, slug_name, shard):
+        circle = Circle.objects.create(
+            name=slug_name,
+            slug_name=slug_name,
+            about='Grupo oficial',
+            shard=shard
+        )
+        with use_shard(shard):
+            for user in self.users.values():
+                Membership.objects.create(user=user, profile=user.profile,
+                                          circle=circle)
+        return circle
+
+    def client_for(self, name):
+        token, _ = Token.objects.get_or_create(user=self.users[name])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token {}'.format(token.key))
+        return client
+
+    def offer_ride(self, slug_name='fciencias'):
+        departure = timezone.now() + timedelta(days=1)
+        return self.client_for('driver').post(
+            '/circles/{}/rides/'.format(slug_name), {
+                'available_seats': 3,
+                'departure_location': 'Ciudad Universitaria',
+                'departure_date': departure.isoformat(),
+                'arrival_location': 'Centro',
+                'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+            }, format='json')
+
+    def test_reference_tables_are_copied(self):
+        """ Users, profiles and circles are written to every shard. """
+        for alias in ('shard_1', 'shard_2'):
+            self.assertEqual(User.objects.using(alias).count(), 2)
+            self.assertEqual(Profile.objects.using(alias).count(), 2)
+            self.assertTrue(Circle.objects.using(alias).filter(
+                slug_name='fciencias', shard='shard_1').exists())
+
+        self.circle.name = 'Ciencias'
+        self.circle.save()
+        self.users['ana'].delete()
+        for alias in ('shard_1', 'shard_2'):
+            self.assertEqual(Circle.objects.using(alias).get().name,
+                             'Ciencias')
+            self.assertFalse(User.objects.using(alias).filter(
+                username='ana').exists())
+        self.assertFalse(Membership.objects.using('shard_1').filter(
+            user__username='ana').exists())
+
+    def test_reference_tables_are_copied_on_commit(self):
+        """ Reference rows reach the shards once committed, and the admin
+        membership of a new circle its shard right after. """
+        with transaction.atomic():
+            self.circle.name = 'Ciencias'
+            self.circle.save()
+            User.objects.filter(username='ana').delete()
+            transaction.set_rollback(True)
+        self.assertEqual(Circle.objects.using('shard_2').get().name,
+                         'fciencias')
+        self.assertTrue(User.objects.using('shard_2').filter(
+            username='ana').exists())
+
+        response = self.client_for('ana').post('/circles/', {
+            'name': 'Facultad de Ingenieria',
+            'slug_name': 'fingenieria',
+            'about': 'Grupo oficial',
+        })
+        self.assertEqual(response.status_code, 201)
+        circle = Circle.objects.get(slug_name='fingenieria')
+        self.assertTrue(Membership.objects.using(circle.shard).filter(
+            circle=circle, user=self.users['ana'], is_admin=True).exists())
+
+    def test_circle_data_is_routed_to_its_shard(self):
+        """ Rides, passengers and memberships stay on the circle shard. """
+        response = self.offer_ride()
+        self.assertEqual(response.status_code, 201)
+        ride = Ride.objects.using('shard_1').get()
+        self.assertGreater(ride.pk, settings.DATABASE_SHARD_ID_SPACING)
+        self.assertFalse(Ride.objects.using('default').exists())
+        self.assertFalse(Membership.objects.using('default').exists())
+
+        response = self.client_for('ana').post(
+            '/circles/fciencias/rides/{}/join/'.format(ride.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Ride.objects.using('shard_1').get().passenger
+                              .values_list('username', flat=True)), ['ana'])
+        self.assertEqual(Membership.objects.using('shard_1').get(
+            user=self.users['ana']).rides_taken, 1)
+        # Counters updated in bulk are copied as well.
+        relay_events()
+        self.assertEqual(Profile.objects.using('shard_1').get(
+            user=self.users['ana']).rides_taken, 1)
+
+        response = self.client_for('ana').get('/circles/fciencias/rides/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['id'], ride.pk)
+
+    def test_move_circle(self):
+        """ Moved circles keep their data and primary keys. """
+        self.offer_ride()
+        ride = Ride.objects.using('shard_1').get()
+        self.client_for('ana').post(
+            '/circles/fciencias/rides/{}/join/'.format(ride.pk))
+
+        call_command('move_circle', 'fciencias', 'shard_2', grace=0,
+                     stdout=io.StringIO())
+
+        self.assertFalse(Ride.objects.using('shard_1').exists())
+        self.assertFalse(Membership.objects.using('shard_1').exists())
+        moved = Ride.objects.using('shard_2').get()
+        self.assertEqual(moved.pk, ride.pk)
+        self.assertEqual(moved.passenger.get(), self.users['ana'])
+        self.assertEqual(Membership.objects.using('shard_2').count(), 2)
+        self.assertEqual(Circle.objects.using('shard_1').get().shard,
+                         'shard_2')
+
+        response = self.client_for('ana').get('/circles/fciencias/rides/')
+        self.assertEqual(response.data['results'][0]['id'], ride.pk)
+        self.assertEqual(self.offer_ride().status_code, 201)
+        self.assertEqual(Ride.objects.using('shard_2').count(), 2)
+
+    def test_move_aborted_by_writes(self):
+        """ Rows written to the circle while it's copied abort the move. """
+        self.offer_ride()
+        original = shards.batches
+
+        def batches(queryset, size):
+            yield from original(queryset, size)
+            if queryset.model is OutboxEvent:
+                with use_shard('shard_1'):
+                    record(OutboxEvent.RIDE_LEFT, self.circle, ride=1)
+
+        with mock.patch('cride.utils.shards.batches', batches):
+            with self.assertRaises(CommandError):
+                call_command('move_circle', 'fciencias', 'shard_2', grace=0,
+                             stdout=io.StringIO())
+        circle = Circle.objects.get()
+        self.assertEqual((circle.shard, circle.moving), ('shard_1', False))
+        self.assertEqual(Ride.objects.using('shard_1').count(), 1)
+        self.assertEqual(OutboxEvent.objects.using('shard_1').count(), 1)
+        self.assertFalse(Ride.objects.using('shard_2').exists())
+        self.assertFalse(OutboxEvent.objects.using('shard_2').exists())
+
+    def test_moving_circle_is_left_by_tasks(self):
+        """ Tasks don't write to a circle being moved. """
+        self.offer_ride()
+        Ride.objects.using('shard_1').update(arrival_date=timezone.now())
+        self.circle.moving = True
+        self.circle.save()
+        self.assertEqual(relay_events(), 0)
+        self.assertEqual(disable_finished_rides(), 0)
+        ride = Ride.objects.using('shard_1').get()
+        with self.assertRaises(shards.CircleMoveInProgress):
+            notify_new_ride(ride.pk, self.circle.pk)
+
+        self.circle.moving = False
+        self.circle.save()
+        self.assertEqual(disable_finished_rides(), 1)
+        self.assertEqual(relay_events(), 2)
+
+    def test_moving_circle_refuses_writes(self):
+        """ Writes to a circle being moved answer 503. """
+        self.circle.moving = True
+        self.circle.save()
+        self.assertEqual(self.offer_ride().status_code, 503)
+        response = self.client_for('ana').get('/circles/fciencias/rides/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_circles_of_every_shard(self):
+        """ The user details list its circles of every shard. """
+        self.create_circle('fingenieria', 'shard_2')
+        response = self.client_for('ana').get('/users/ana/')
+        self.assertEqual(
+            sorted(circle['slug_name'] for circle in response.data['circle']),
+            ['fciencias', 'fingenieria'])
+
+    def test_suggestions_of_every_shard(self):
+        """ Suggestions include the rides of every shard, with their
+        passengers. """
+        self.create_circle('fingenieria', 'shard_2')
+        self.offer_ride()
+        self.offer_ride('fingenieria')
+        ride = Ride.objects.using('shard_1').get()
+        self.client_for('ana').post(
+            '/circles/fciencias/rides/{}/join/'.format(ride.pk))
+
+        user = User.objects.create(first_name='juan', last_name='Catalano',
+                                   email='juan@comparteride.com',
+                                   username='juan', password='nico1234')
+        Profile.objects.create(user=user)
+        self.users['juan'] = user
+        for circle in Circle.objects.all():
+            with use_shard(circle.shard):
+                Membership.objects.create(user=user, profile=user.profile,
+                                          circle=circle)
+        departure = ride.departure_date
+        response = self.client_for('juan').get('/rides/suggestions/', {
+            'origin': 'Ciudad Universitaria',
+            'destination': 'Centro',
+            'departure_after': (departure - timedelta(hours=1)).isoformat(),
+            'departure_before': (departure + timedelta(hours=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        rides = {item['offered_in']: item for item in response.data}
+        self.assertEqual(sorted(rides), ['fciencias', 'fingenieria'])
+        self.assertEqual(rides['fciencias']['id'], ride.pk)
+        self.assertEqual([passenger['username'] for passenger in
+                          rides['fciencias']['passenger']], ['ana'])
+
+    def test_suggestions_merge_shards(self):
+        """ Candidates of every shard are scored by departure date, the
+        earliest rides of every shard fit in the budget. """
+        self.create_circle('fingenieria', 'shard_2')
+        departure = timezone.now() + timedelta(days=1)
+        for slug_name, hours in (('fciencias', 0), ('fciencias', 1),
+                                 ('fingenieria', 2), ('fciencias', 3)):
+            circle = Circle.objects.get(slug_name=slug_name)
+            with use_shard(circle.shard):
+                Ride.objects.create(
+                    offered_by=self.users['driver'],
+                    offered_in=circle,
+                    available_seats=3,
+                    departure_location='Ciudad Universitaria',
+                    departure_date=departure + timedelta(hours=hours),
+                    arrival_location='Centro',
+                    arrival_date=departure + timedelta(hours=hours + 1),
+                )
+
+        with mock.patch('cride.rides.suggestions.BATCH_SIZE', 3):
+            suggestions = suggest_rides(
+                self.users['ana'], 'Ciudad Universitaria', 'Centro',
+                departure, departure + timedelta(hours=3), budget=0)
+        self.assertEqual(sorted(alias for _, _, alias in suggestions),
+                         ['shard_1', 'shard_1', 'shard_2'])
+
+    def test_pick_shard(self):
+        """ New circles go to the shard with the fewest circles. """
+        self.create_circle('fingenieria', 'default')
+        self.assertEqual(pick_shard(), 'shard_2')
+
+    def test_full_id_range(self):
+        """ Keys past the range of a shard fail the checks loudly. """
+        self.create_circle('fingenieria', 'default')
+        self.assertEqual(shards.check_id_ranges(databases=SHARDS), [])
+        Membership.objects.using('default').filter(
+            user=self.users['ana']
+        ).update(id=settings.DATABASE_SHARD_ID_SPACING)
+
+        with self.assertRaises(ImproperlyConfigured):
+            reserve_ids('default')
+        errors = shards.check_id_ranges(databases=SHARDS)
+        self.assertEqual([(error.id, error.obj) for error in errors],
+                         [('shards.E001', Membership)])
+        self.assertEqual(shards.check_id_ranges(databases=['shard_1']), [])
+
+    def test_tasks_shard_header(self):
+        """ Tasks queued from a shard are routed to it. """
+        headers: Dict[str, str] = {}
+        add_shard_header(headers=headers)
+        self.assertEqual(headers, {})
+        with use_shard('shard_1'):
+            add_shard_header(headers=headers)
+        self.assertEqual(headers, {'shard': 'shard_1'})
@@ -0,0 +1,150 @@
+""" Utility views. """
+
+# Django
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Django REST Framework
+from rest_framework import mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Metrics
+from cride.utils.metrics import registry
+
+# Serializers
+from cride.utils.serializers import RowSerializer
+
+# Utilities
+from typing import TYPE_CHECKING, Optional, Type
+import hmac
+
+
+if TYPE_CHECKING:
+    # Viewset mixins are checked as the viewsets they're used in.
+    from rest_framework.viewsets import GenericViewSet as ViewSetMixin
+else:
+    ViewSetMixin = object
+
+
+def metrics(request):
+    """ Export request metrics in text exposition format.
+
+    Only available to requests sending METRICS_TOKEN as a bearer token, the
+    client address isn't trusted behind the proxy. """
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    if not token or scheme.lower() != 'bearer' or \
+            not hmac.compare_digest(credentials.encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
+class RowSerializerMixin(ViewSetMixin):
+    """ Build the view's row serializer from the request.
+
+    ?fields=a,b.c outputs only the listed fields (dotted paths for nested
+    ones) and ?expand=b,d only expands the listed relations, representing
+    the rest by their key. Both default to everything. Pictures link
+    their picture_variant variant. """
+
+    row_serializer_class: Optional[Type[RowSerializer]] = None
+    picture_variant = 'small'
+
+    def get_row_serializer_class(self):
+        """ Return the row serializer class of the view. """
+        assert self.row_serializer_class is not None, (
+            '{} should set row_serializer_class.'.format(
+                self.__class__.__name__))
+        return self.row_serializer_class
+
+    def get_selection_param(self, name):
+        """ Return the paths of a selection parameter, None if missing. """
+        if name not in self.request.query_params:
+            return None
+        paths = [path.strip() for path in
+                 self.request.query_params[name].split(',')]
+        paths = [path for path in paths if path]
+        unknown = set(paths) - set(self.get_row_serializer_class().paths())
+        if unknown:
+            raise ValidationError({name: 'Unknown fields: {}.'.format(
+                ', '.join(sorted(unknown)))})
+        return paths
+
+    def get_row_serializer(self):
+        context = self.get_serializer_context()
+        context['picture_variant'] = self.picture_variant
+        return self.get_row_serializer_class()(
+            context=context,
+            fields=self.get_selection_param('fields'),
+            expand=self.get_selection_param('expand')
+        )
+
+
+class RowListModelMixin(RowSerializerMixin, mixins.ListModelMixin):
+    """ List a queryset using the view's row serializer.
+
+    Row serializers build the page straight from .values() rows, see
+    cride.utils.serializers. """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_row_serializer()
+        rows = serializer.values(queryset)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.serialize(page, using=rows.db))
+        return Response(serializer.serialize(rows, using=rows.db))
+
+
+class BatchRetrieveMixin(RowSerializerMixin):
+    """ Retrieve many objects by their lookup field in a single request.
+
+    GET <list url>/batch/?<batch_param>=a,b,c answers up to batch_max_size
+    objects in the requested order, built by the view's row serializer
+    with a constant number of queries. Permissions are checked for the
+    whole batch: get_batch_queryset must only return the objects the user
+    may retrieve. Values not found or not allowed are listed under
+    missing, without telling which. """
+
+    batch_param: Optional[str] = None
+    batch_max_size = 100
+
+    def get_batch_queryset(self):
+        """ Return the objects the user may retrieve. """
+        return self.get_queryset()
+
+    def get_batch_values(self, request):
+        """ Return the requested lookup values, without duplicates. """
+        values = [value.strip() for value in
+                  request.query_params.get(self.batch_param, '').split(',')]
+        values = list(dict.fromkeys(value for value in values if value))
+        if not values:
+            raise ValidationError({self.batch_param: 'This field is required.'})
+        if len(values) > self.batch_max_size:
+            raise ValidationError({self.batch_param: (
+                'Ensure this field has no more than {} values.'.format(
+                    self.batch_max_size))})
+        return values
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request, *args, **kwargs):
+        """ Return the objects of a list of lookup values. """
+        values = self.get_batch_values(request)
+        queryset = self.get_batch_queryset().filter(
+            **{self.lookup_field + '__in': values})
+        serializer = self.get_row_serializer()
+        rows = list(serializer.values(queryset.order_by(), self.lookup_field))
+        found = {row[self.lookup_field]: data
+                 for row, data in zip(rows, serializer.serialize(
+                     rows, using=queryset.db))}
+        return Response({
+            'results': [found[value] for value in values if value in found],
+            'missing': [value for value in values if value not in found],
+        })